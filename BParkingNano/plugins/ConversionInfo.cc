@@ -105,124 +105,155 @@ bool ConversionInfo::match(const edm::Handle<reco::BeamSpot>& beamSpot,
 			   const edm::Handle<edm::View<reco::Conversion> >& conversions,
 			   const pat::Electron& ele,
 			   ConversionInfo& info) {
+  ConversionLookup lookup(beamSpot,conversions);
+  return lookup.match(ele,info);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+//
+void ConversionInfo::fill(const reco::Conversion& conv, const reco::BeamSpot& beamSpot) {
+
+  // Quality
+  valid = conv.conversionVertex().isValid(); // (=true)
+  chi2prob = ChiSquaredProbability(conv.conversionVertex().chi2(),conv.conversionVertex().ndof()); // (<0.005)
+  quality_high_purity = conv.quality(reco::Conversion::highPurity); // (=true)
+  quality_high_efficiency = conv.quality(reco::Conversion::highEfficiency); // (none)
+
+  // Tracks
+  ntracks = conv.tracks().size(); // (=2)
+  min_trk_pt = -1.; // (>0.5)
+  for ( const auto& trk : conv.tracks() ) {
+    if ( trk.isNonnull() && trk.isAvailable() &&
+	 ( min_trk_pt < 0. || trk->pt() < min_trk_pt ) ) { min_trk_pt = trk->pt(); }
+  }
+  ilead = -1; itrail = -1;
+  if ( conv.tracks().size() == 2 ) {
+    edm::RefToBase<reco::Track> trk1 = conv.tracks().front();
+    edm::RefToBase<reco::Track> trk2 = conv.tracks().back();
+    if ( trk1.isNonnull() && trk1.isAvailable() &&
+	 trk2.isNonnull() && trk2.isAvailable() ) {
+      if ( trk1->pt() > trk2->pt() ) { ilead = 0; itrail = 1; }
+      else                           { ilead = 1; itrail = 0; }
+    }
+  }
+
+  // Transverse displacement (with respect to beamspot) and vertex radius
+  math::XYZVectorF p_refitted =  conv.refittedPairMomentum();
+  float dx = conv.conversionVertex().x() - beamSpot.x0();
+  float dy = conv.conversionVertex().y() - beamSpot.y0();
+  l_xy = (p_refitted.x()*dx + p_refitted.y()*dy) / p_refitted.rho();
+  vtx_radius = sqrt(conv.conversionVertex().position().perp2()); // (1.5<r<4.)
+
+  // invariant mass from track pair from conversion
+  mass_from_conv = conv.pairInvariantMass();
   
+  // Invariant mass from Pin before fit to common vertex 
+  if ( conv.tracksPin().size() >= 2 &&
+       ilead > -1 && itrail > -1 ) {
+    math::XYZVectorF lead_Pin = conv.tracksPin().at(ilead);
+    math::XYZVectorF trail_Pin = conv.tracksPin().at(itrail);
+    mass_from_Pin = mee( lead_Pin.x(), lead_Pin.y(), lead_Pin.z(),
+      			trail_Pin.x(), trail_Pin.y(), trail_Pin.z() );
+    // Opening angle
+    delta_cot_from_Pin = 1. / tan(trail_Pin.theta()) - 1. / tan(lead_Pin.theta());
+  }
+
+  // Invariant mass before fit to common vertex
+  if ( conv.tracks().size() >= 2 &&
+       ilead > -1 && itrail > -1 ) {
+    edm::RefToBase<reco::Track> lead_before_vtx_fit = conv.tracks().at(ilead);
+    edm::RefToBase<reco::Track> trail_before_vtx_fit = conv.tracks().at(itrail);
+    mass_before_fit = mee( lead_before_vtx_fit->px(), lead_before_vtx_fit->py(), lead_before_vtx_fit->pz(),
+      			  trail_before_vtx_fit->px(), trail_before_vtx_fit->py(), trail_before_vtx_fit->pz() );
+  }
+
+  // Invariant mass after the fit to common vertex
+  if ( conv.conversionVertex().refittedTracks().size() >=2 &&
+       ilead > -1 && itrail > -1 ) {
+    const reco::Track lead_after_vtx_fit = conv.conversionVertex().refittedTracks().at(ilead);
+    const reco::Track trail_after_vtx_fit = conv.conversionVertex().refittedTracks().at(itrail);
+    mass_after_fit = mee( lead_after_vtx_fit.px(), lead_after_vtx_fit.py(), lead_after_vtx_fit.pz(),
+      			 trail_after_vtx_fit.px(), trail_after_vtx_fit.py(), trail_after_vtx_fit.pz());
+    // Difference in expeted hits
+    delta_expected_nhits_inner =
+      lead_after_vtx_fit.hitPattern().numberOfLostHits(reco::HitPattern::MISSING_INNER_HITS)
+      - trail_after_vtx_fit.hitPattern().numberOfLostHits(reco::HitPattern::MISSING_INNER_HITS);
+  }
+  
+  // Hits prior to vertex
+  if ( ilead > -1 && itrail > -1 ) {
+    lead_nhits_before_vtx  = conv.nHitsBeforeVtx().size() > 1 ? conv.nHitsBeforeVtx().at(ilead) : 0;
+    trail_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ? conv.nHitsBeforeVtx().at(itrail) : 0;
+    max_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ?
+      ( conv.nHitsBeforeVtx().at(0) > conv.nHitsBeforeVtx().at(1) ?
+	conv.nHitsBeforeVtx().at(0) :
+	conv.nHitsBeforeVtx().at(1) ) : 0;
+    sum_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ?
+      conv.nHitsBeforeVtx().at(0) +
+      conv.nHitsBeforeVtx().at(1) : 0;
+  }
+
+}
+
+////////////////////////////////////////////////////////////////////////////////
+//
+ConversionLookup::ConversionLookup(const edm::Handle<reco::BeamSpot>& beamSpot,
+				   const edm::Handle<edm::View<reco::Conversion> >& conversions) {
+
   // Valid handles?
   if ( !(beamSpot.isValid()) ) {
     edm::LogError("ConversionInfo::match")
       << " !(beamSpot.isValid())" << std::endl;
-    return false;
+    return;
   }
   if ( !(conversions.isValid()) ) {
     edm::LogError("ConversionInfo::match")
       << " !(conversions.isValid())" << std::endl;
-    return false;
+    return;
   }
-  
-  // Iterate through conversions and calculate quantities (requirement from Nancy)
+  valid_ = true;
+
+  // Iterate through conversions and calculate quantities (requirement from Nancy):
+  // each conversion overwrites the quantities of the previous one, whatever the electron
   for ( const auto& conv : *conversions ) {
 
     // Filter
     if ( conv.tracks().size() != 2 ) { continue; }
 
-    // Quality
-    info.valid = conv.conversionVertex().isValid(); // (=true)
-    info.chi2prob = ChiSquaredProbability(conv.conversionVertex().chi2(),conv.conversionVertex().ndof()); // (<0.005)
-    info.quality_high_purity = conv.quality(reco::Conversion::highPurity); // (=true)
-    info.quality_high_efficiency = conv.quality(reco::Conversion::highEfficiency); // (none)
-
-    // Tracks
-    info.ntracks = conv.tracks().size(); // (=2)
-    info.min_trk_pt = -1.; // (>0.5)
-    for ( const auto& trk : conv.tracks() ) {
-      if ( trk.isNonnull() && trk.isAvailable() &&
-	   ( info.min_trk_pt < 0. || trk->pt() < info.min_trk_pt ) ) { info.min_trk_pt = trk->pt(); }
-    }
-    info.ilead = -1; info.itrail = -1;
-    if ( conv.tracks().size() == 2 ) {
-      edm::RefToBase<reco::Track> trk1 = conv.tracks().front();
-      edm::RefToBase<reco::Track> trk2 = conv.tracks().back();
-      if ( trk1.isNonnull() && trk1.isAvailable() &&
-	   trk2.isNonnull() && trk2.isAvailable() ) {
-	if ( trk1->pt() > trk2->pt() ) { info.ilead = 0; info.itrail = 1; }
-	else                           { info.ilead = 1; info.itrail = 0; }
-      }
-    }
+    quantities_.fill(conv,*beamSpot);
 
-    // Transverse displacement (with respect to beamspot) and vertex radius
-    math::XYZVectorF p_refitted =  conv.refittedPairMomentum();
-    float dx = conv.conversionVertex().x() - beamSpot->x0();
-    float dy = conv.conversionVertex().y() - beamSpot->y0();
-    info.l_xy = (p_refitted.x()*dx + p_refitted.y()*dy) / p_refitted.rho();
-    info.vtx_radius = sqrt(conv.conversionVertex().position().perp2()); // (1.5<r<4.)
-
-    // invariant mass from track pair from conversion
-    info.mass_from_conv = conv.pairInvariantMass();
-    
-    // Invariant mass from Pin before fit to common vertex 
-    if ( conv.tracksPin().size() >= 2 &&
-	 info.ilead > -1 && info.itrail > -1 ) {
-      math::XYZVectorF lead_Pin = conv.tracksPin().at(info.ilead);
-      math::XYZVectorF trail_Pin = conv.tracksPin().at(info.itrail);
-      info.mass_from_Pin = mee( lead_Pin.x(), lead_Pin.y(), lead_Pin.z(),
-				trail_Pin.x(), trail_Pin.y(), trail_Pin.z() );
-      // Opening angle
-      info.delta_cot_from_Pin = 1. / tan(trail_Pin.theta()) - 1. / tan(lead_Pin.theta());
-    }
-
-    // Invariant mass before fit to common vertex
-    if ( conv.tracks().size() >= 2 &&
-	 info.ilead > -1 && info.itrail > -1 ) {
-      edm::RefToBase<reco::Track> lead_before_vtx_fit = conv.tracks().at(info.ilead);
-      edm::RefToBase<reco::Track> trail_before_vtx_fit = conv.tracks().at(info.itrail);
-      info.mass_before_fit = mee( lead_before_vtx_fit->px(), lead_before_vtx_fit->py(), lead_before_vtx_fit->pz(),
-				  trail_before_vtx_fit->px(), trail_before_vtx_fit->py(), trail_before_vtx_fit->pz() );
-    }
-
-    // Invariant mass after the fit to common vertex
-    if ( conv.conversionVertex().refittedTracks().size() >=2 &&
-	 info.ilead > -1 && info.itrail > -1 ) {
-      const reco::Track lead_after_vtx_fit = conv.conversionVertex().refittedTracks().at(info.ilead);
-      const reco::Track trail_after_vtx_fit = conv.conversionVertex().refittedTracks().at(info.itrail);
-      info.mass_after_fit = mee( lead_after_vtx_fit.px(), lead_after_vtx_fit.py(), lead_after_vtx_fit.pz(),
-				 trail_after_vtx_fit.px(), trail_after_vtx_fit.py(), trail_after_vtx_fit.pz());
-      // Difference in expeted hits
-      info.delta_expected_nhits_inner =
-	lead_after_vtx_fit.hitPattern().numberOfLostHits(reco::HitPattern::MISSING_INNER_HITS)
-	- trail_after_vtx_fit.hitPattern().numberOfLostHits(reco::HitPattern::MISSING_INNER_HITS);
-    }
-    
-    // Hits prior to vertex
-    if ( info.ilead > -1 && info.itrail > -1 ) {
-      info.lead_nhits_before_vtx  = conv.nHitsBeforeVtx().size() > 1 ? conv.nHitsBeforeVtx().at(info.ilead) : 0;
-      info.trail_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ? conv.nHitsBeforeVtx().at(info.itrail) : 0;
-      info.max_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ?
-	( conv.nHitsBeforeVtx().at(0) > conv.nHitsBeforeVtx().at(1) ?
-	  conv.nHitsBeforeVtx().at(0) :
-	  conv.nHitsBeforeVtx().at(1) ) : 0;
-      info.sum_nhits_before_vtx = conv.nHitsBeforeVtx().size() > 1 ?
-	conv.nHitsBeforeVtx().at(0) +
-	conv.nHitsBeforeVtx().at(1) : 0;
-    }
-    
-    // Attempt to match conversion track to electron
+    // Index the conversion tracks, with their role in this conversion
     for ( uint itrk = 0; itrk < conv.tracks().size(); ++itrk ) {
-
       edm::RefToBase<reco::Track> trk = conv.tracks()[itrk];
       if ( trk.isNull() ) { continue; }
-      
-      reco::GsfTrackRef gsf = ele.gsfTrack();
-      if ( gsf.isNull() ) { continue; }
-
-      if ( gsf.id() == trk.id() && gsf.key() == trk.key() )  { 
-	info.matched = true;
-	if ( (int)itrk == info.ilead ) { info.matched_lead = trk; }
-	if ( (int)itrk == info.itrail ) { info.matched_trail = trk; }
-      }
-      
-    } // track loop
-    
+      tracks_[trackKey(trk.id(),trk.key())].push_back({trk,
+	    (int)itrk == quantities_.ilead,
+	    (int)itrk == quantities_.itrail});
+    }
+
   } // conversions loop
 
+}
+
+////////////////////////////////////////////////////////////////////////////////
+//
+bool ConversionLookup::match(const pat::Electron& ele, ConversionInfo& info) const {
+
+  if ( !valid_ ) { return false; }
+  info = quantities_;
+
+  // Attempt to match conversion tracks to electron
+  reco::GsfTrackRef gsf = ele.gsfTrack();
+  if ( gsf.isNull() ) { return info.matched; }
+  auto found = tracks_.find(trackKey(gsf.id(),gsf.key()));
+  if ( found == tracks_.end() ) { return info.matched; }
+  for ( const auto& trk : found->second ) {
+    if ( gsf.id() != trk.trk.id() || gsf.key() != trk.trk.key() ) { continue; }
+    info.matched = true;
+    if ( trk.lead ) { info.matched_lead = trk.trk; }
+    if ( trk.trail ) { info.matched_trail = trk.trk; }
+  }
+
   return info.matched;
 
 }
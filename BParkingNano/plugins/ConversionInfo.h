@@ -8,8 +8,13 @@
 #include "DataFormats/Common/interface/RefToBase.h"
 #include "DataFormats/Common/interface/View.h"
 #include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/Provenance/interface/ProductID.h"
 #include "DataFormats/TrackReco/interface/Track.h"
 
+#include <cstdint>
+#include <unordered_map>
+#include <vector>
+
 class ConversionInfo {
   
  public:
@@ -38,6 +43,9 @@ class ConversionInfo {
   static float mee(float ipx1, float ipy1, float ipz1, 
 		   float ipx2, float ipy2, float ipz2);
 
+  // sets the quantities of a (two-track) conversion, the ones not defined for it are left as they are
+  void fill(const reco::Conversion& conv, const reco::BeamSpot& beamSpot);
+
 public:
 
   // quality
@@ -79,4 +87,37 @@ public:
   
 };
 
+// Per-event lookup for ConversionInfo::match: the conversion quantities are
+// computed once per event, and the conversion tracks indexed by (product, key)
+// so that each electron only looks up its GSF track.
+class ConversionLookup {
+
+ public:
+
+  ConversionLookup(const edm::Handle<reco::BeamSpot>& beamSpot,
+		   const edm::Handle<edm::View<reco::Conversion> >& conversions);
+
+  // same result as ConversionInfo::match
+  bool match(const pat::Electron& ele, ConversionInfo& info) const;
+
+ private:
+
+  struct TrackMatch {
+    edm::RefToBase<reco::Track> trk;
+    bool lead;
+    bool trail;
+  };
+
+  static uint64_t trackKey(const edm::ProductID& id, size_t key) {
+    return (uint64_t(id.processIndex()) << 48) | (uint64_t(id.productIndex()) << 32) | uint32_t(key);
+  }
+
+  bool valid_ = false;
+  // quantities as left by the loop over the conversions, which are the same for all the electrons
+  ConversionInfo quantities_;
+  // conversion tracks, in conversion order
+  std::unordered_map<uint64_t, std::vector<TrackMatch> > tracks_;
+
+};
+
 #endif // ConversionInfo_h
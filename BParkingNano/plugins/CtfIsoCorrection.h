@@ -0,0 +1,72 @@
+#ifndef DoubleElectronNANO_BParkingNano_CtfIsoCorrection
+#define DoubleElectronNANO_BParkingNano_CtfIsoCorrection
+
+// Isolation correction of ElectronMerger: lowPt electrons that do not overlap
+// with a PF electron are reconstructed by PF as charged hadrons, the pt of
+// their closest CTF track is subtracted from the isolation sums of the other
+// electrons within 0.3 / 0.4. The tracks are indexed in an EtaPhiGrid, the
+// ones in the cone are summed in selection order, as the former loop over all
+// the electrons did, so that the float sums are unchanged.
+
+#include <algorithm>
+#include <utility>
+#include <vector>
+
+#include "DataFormats/Math/interface/deltaR.h"
+#include "EtaPhiGrid.h"
+
+class CtfIsoCorrection {
+
+public:
+
+  struct Sums {
+    float tosub0p3 = 0.;
+    float tosub0p4 = 0.;
+  };
+
+  // cells a bit larger than the 0.4 cone, so that rounding of the binning cannot drop a track at the edge
+  CtfIsoCorrection(): grid_(0.41) {}
+
+  // CTF track of the output electron iele, (eta, phi) being the ones of the electron itself
+  void add(unsigned int iele, double eta, double phi, double ctfEta, double ctfPhi, double ctfPt) {
+    tracks_.push_back({iele, eta, phi, ctfEta, ctfPhi, ctfPt});
+    ctfEtaPhi_.emplace_back(ctfEta, ctfPhi);
+  }
+
+  // to be called once all the tracks are added
+  void build() { grid_.fill(ctfEtaPhi_); }
+
+  // sums for the electron at (eta, phi), order[iele] being the selection
+  // position of the output electron iele
+  Sums sums(double eta, double phi, const std::vector<unsigned int>& order) {
+    Sums ret;
+    inCone_.clear();
+    grid_.forEachCandidate(eta, phi, 0.4, [this](unsigned int itrk) { inCone_.push_back(itrk); });
+    std::sort(inCone_.begin(), inCone_.end(), [this, &order] (unsigned int i1, unsigned int i2) {
+                return order[tracks_[i1].iele] < order[tracks_[i2].iele]; });
+    for (unsigned int itrk : inCone_) {
+      const Track& trk = tracks_[itrk];
+      float dR_gsf = reco::deltaR(eta, phi, trk.eta, trk.phi);
+      float dR_ctf = reco::deltaR(eta, phi, trk.ctfEta, trk.ctfPhi);
+      if (dR_gsf < 0.001) continue; // skip if lp is same as reference --> cut comes down to numerical precision
+      if (dR_ctf < 0.3) ret.tosub0p3 += trk.ctfPt;
+      if (dR_ctf < 0.4) ret.tosub0p4 += trk.ctfPt;
+    }
+    return ret;
+  }
+
+private:
+
+  struct Track {
+    unsigned int iele;
+    double eta, phi;
+    double ctfEta, ctfPhi, ctfPt;
+  };
+
+  std::vector<Track> tracks_;
+  std::vector<std::pair<float, float>> ctfEtaPhi_;
+  EtaPhiGrid grid_;
+  std::vector<unsigned int> inCone_;
+};
+
+#endif
@@ -14,6 +14,8 @@
 #include "DataFormats/PatCandidates/interface/Lepton.h"
 #include "DataFormats/PatCandidates/interface/Muon.h"
 #include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/PatCandidates/interface/TriggerObjectStandAlone.h"
+#include "FWCore/Utilities/interface/Exception.h"
 
 #include "TrackingTools/TransientTrack/interface/TransientTrackBuilder.h"
 #include "TrackingTools/Records/interface/TransientTrackRecord.h"
@@ -26,17 +28,11 @@
 #include "ConversionInfo.h"
 #include "CommonTools/Egamma/interface/EffectiveAreas.h"
 
-// for regression variables
-#include "DataFormats/EcalDetId/interface/EBDetId.h"
-#include "DataFormats/EcalDetId/interface/EEDetId.h"
-#include "DataFormats/EcalDetId/interface/EcalSubdetector.h"
-#include "Geometry/Records/interface/CaloTopologyRecord.h"
-#include "Geometry/Records/interface/CaloGeometryRecord.h"
-#include "EgammaAnalysis/ElectronTools/interface/SuperClusterHelper.h"
-
 #include <limits>
 #include <algorithm>
 #include "helper.h"
+#include "EtaPhiGrid.h"
+#include "CtfIsoCorrection.h"
 
 class ElectronMerger : public edm::global::EDProducer<> {
 
@@ -48,12 +44,13 @@ public:
 
   explicit ElectronMerger(const edm::ParameterSet &cfg):
     ttbToken_(esConsumes(edm::ESInputTag{"","TransientTrackBuilder"})),
-    ecalTopologyToken_(esConsumes()),
-    caloGeometryToken_(esConsumes()),
     triggerLeptons_{ consumes<edm::View<reco::Candidate> >( cfg.getParameter<edm::InputTag>("trgLepton") )},
     triggerBits_{consumes<edm::TriggerResults>(cfg.getParameter<edm::InputTag>("trgBits"))},
     lowpt_src_{consumes<pat::ElectronCollection>( cfg.getParameter<edm::InputTag>("lowptSrc") )},
     pf_src_{ consumes<pat::ElectronCollection>( cfg.getParameter<edm::InputTag>("pfSrc") )},
+    trg_objects_{ consumes<pat::TriggerObjectStandAloneCollection>( cfg.getParameter<edm::InputTag>("trgObjects") )},
+    pf_trg_matches_{ consumes<std::vector<int>>( cfg.getParameter<edm::InputTag>("pfTrgMatches") )},
+    lowpt_trg_matches_{ consumes<std::vector<int>>( cfg.getParameter<edm::InputTag>("lowptTrgMatches") )},
     rho_pfiso_{ consumes<double>(cfg.getParameter<edm::InputTag>("rho_PFIso")) },
     ea_pfiso_{std::make_unique<EffectiveAreas>((cfg.getParameter<edm::FileInPath>("EAFile_PFIso")).fullPath())},
     pf_mvaId_src_(),
@@ -80,8 +77,7 @@ public:
     saveLowPtE_{cfg.getParameter<bool>("saveLowPtE")},
     filterEle_{cfg.getParameter<bool>("filterEle")},
     addUserVarsExtra_{cfg.getParameter<bool>("addUserVarsExtra")},
-    efficiencyStudy_{cfg.getParameter<bool>("efficiencyStudy")},
-    saveRegressionVars_{cfg.getParameter<bool>("saveRegressionVars")}
+    efficiencyStudy_{cfg.getParameter<bool>("efficiencyStudy")}
     {
       produces<pat::ElectronCollection>("SelectedElectrons");
       produces<TransientTrackCollection>("SelectedTransientElectrons");
@@ -98,9 +94,6 @@ public:
         pf_mvaId_src_run3_ = consumes<edm::ValueMap<float> > ( cfg.getParameter<edm::InputTag>("pfmvaId_Run3") );
       }
 
-      ecalRecHitsEBToken_ = mayConsume<EcalRecHitCollection>(cfg.getParameter<edm::InputTag>("recHitCollectionEB"));
-      ecalRecHitsEEToken_ = mayConsume<EcalRecHitCollection>(cfg.getParameter<edm::InputTag>("recHitCollectionEE"));
-
     }
 
   ~ElectronMerger() override {}
@@ -110,17 +103,38 @@ public:
   static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
 
 private:
-  const edm::ESGetToken<TransientTrackBuilder, TransientTrackRecord> ttbToken_;
-  const edm::ESGetToken<CaloTopology, CaloTopologyRecord> ecalTopologyToken_;
-  const edm::ESGetToken<CaloGeometry, CaloGeometryRecord> caloGeometryToken_;
+  // save useful information related to the matched trigger object
+  void addTriggerMatch(pat::Electron& ele, int imatch, const pat::TriggerObjectStandAloneCollection& trgObjects) const;
+  // index of the first trigger lepton (in collection order) outside the drTrg cone and within dzTrg of the electron,
+  // -1 if none; trgVz holds the (vz, index) of the trigger leptons sorted by vz
+  int firstTrgLepton(const reco::Candidate::PolarLorentzVector& p4, double vz, const edm::View<reco::Candidate>& trgLeptons,
+                     const std::vector<std::pair<double, unsigned int>>& trgVz, std::vector<unsigned int>& candidates) const;
+  // p4 of the output electron: regression or gsf mode if requested, electron mass
+  reco::Candidate::PolarLorentzVector electronP4(const pat::Electron& ele) const;
+
+  // input electron passing the selection, copied to the output once its position is known
+  struct SelectedElectron {
+    const pat::Electron* src;
+    size_t index;                            // in the PF or lowPt collection
+    bool isPF;
+    reco::Candidate::PolarLorentzVector p4;  // electronP4
+    bool pTcut;                              // cuts failed, kept with efficiencyStudy
+    bool etaCut;
+    int itrg;                                // firstTrgLepton, -1 = skipEle
+    bool pfOverlap;                          // lowPt only
+    float mvaId;                             // lowPt only
+  };
 
-  edm::EDGetTokenT<EcalRecHitCollection> ecalRecHitsEBToken_;
-  edm::EDGetTokenT<EcalRecHitCollection> ecalRecHitsEEToken_;
+  const edm::ESGetToken<TransientTrackBuilder, TransientTrackRecord> ttbToken_;
 
   const edm::EDGetTokenT<edm::View<reco::Candidate> > triggerLeptons_;
   const edm::EDGetTokenT<edm::TriggerResults> triggerBits_;
   const edm::EDGetTokenT<pat::ElectronCollection> lowpt_src_;
   const edm::EDGetTokenT<pat::ElectronCollection> pf_src_;
+  // trigger objects and index of the one matched to each pf / lowpt electron (-1 if none)
+  const edm::EDGetTokenT<pat::TriggerObjectStandAloneCollection> trg_objects_;
+  const edm::EDGetTokenT<std::vector<int>> pf_trg_matches_;
+  const edm::EDGetTokenT<std::vector<int>> lowpt_trg_matches_;
   edm::EDGetTokenT<double> rho_pfiso_;
   std::unique_ptr<EffectiveAreas> ea_pfiso_;
   edm::EDGetTokenT<edm::ValueMap<float>> pf_mvaId_src_;
@@ -150,10 +164,71 @@ private:
   const bool filterEle_;
   const bool addUserVarsExtra_;
   const bool efficiencyStudy_;
-  const bool saveRegressionVars_;
 
 };
 
+void ElectronMerger::addTriggerMatch(pat::Electron& ele, int imatch, const pat::TriggerObjectStandAloneCollection& trgObjects) const {
+  bool isTriggering = false;
+  float drTrg = 999.;
+  float dPtOverPtTrg = 999.;
+
+  if(imatch >= 0){ // one object at most since ambiguity resolved
+    const auto& trg = trgObjects.at(imatch);
+    isTriggering = true;
+    drTrg = reco::deltaR(ele, trg);
+    dPtOverPtTrg = std::abs(ele.pt() - trg.pt())/ele.pt();
+  }
+
+  ele.addUserInt("isTriggering", isTriggering);
+  ele.addUserFloat("drTrg", drTrg);
+  ele.addUserFloat("dPtOverPtTrg", dPtOverPtTrg);
+}
+
+int ElectronMerger::firstTrgLepton(const reco::Candidate::PolarLorentzVector& p4, double vz, const edm::View<reco::Candidate>& trgLeptons,
+                                   const std::vector<std::pair<double, unsigned int>>& trgVz, std::vector<unsigned int>& candidates) const {
+  candidates.clear();
+  if(dzTrg_cleaning_ > 0){
+    // the leptons within dz are contiguous in vz around the electron, and |dz| grows away from it
+    auto next = std::lower_bound(trgVz.begin(), trgVz.end(), std::make_pair(vz, 0u));
+    for(auto it = next; it != trgVz.end() && !(fabs(vz - it->first) > dzTrg_cleaning_); ++it)
+      candidates.push_back(it->second);
+    for(auto it = next; it != trgVz.begin() && !(fabs(vz - (it-1)->first) > dzTrg_cleaning_); --it)
+      candidates.push_back((it-1)->second);
+    std::sort(candidates.begin(), candidates.end());
+  }
+  else {
+    for(unsigned int itrg = 0; itrg < trgLeptons.size(); ++itrg) candidates.push_back(itrg);
+  }
+
+  for(unsigned int itrg : candidates){
+    if(reco::deltaR(p4, trgLeptons[itrg]) < drTrg_cleaning_ && drTrg_cleaning_ > 0)
+      continue;
+    return itrg; // one trg lepton to pass is enough
+  }
+  return -1;
+}
+
+reco::Candidate::PolarLorentzVector ElectronMerger::electronP4(const pat::Electron& ele) const {
+  // take modes?
+  if (use_regression_for_p4_) {
+    // pt from regression, eta and phi from gsf track mode
+    return reco::Candidate::PolarLorentzVector(ele.pt(),
+                                               ele.gsfTrack()->etaMode(),
+                                               ele.gsfTrack()->phiMode(),
+                                               ELECTRON_MASS);
+  }else if(use_gsf_mode_for_p4_) {
+    return reco::Candidate::PolarLorentzVector(ele.gsfTrack()->ptMode(),
+                                               ele.gsfTrack()->etaMode(),
+                                               ele.gsfTrack()->phiMode(),
+                                               ELECTRON_MASS);
+  }
+  // Fix the mass to the proper one
+  return reco::Candidate::PolarLorentzVector(ele.pt(),
+                                             ele.eta(),
+                                             ele.phi(),
+                                             ELECTRON_MASS);
+}
+
 void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup const & iSetup) const {
 
   //input
@@ -165,6 +240,18 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
   if ( saveLowPtE_ ) evt.getByToken(lowpt_src_, lowpt);
   edm::Handle<pat::ElectronCollection> pf;
   evt.getByToken(pf_src_, pf);
+  const auto& trgObjects = evt.get(trg_objects_);
+  const auto& pfTrgMatches = evt.get(pf_trg_matches_);
+  if ( pfTrgMatches.size() != pf->size() )
+    throw cms::Exception("Configuration") << "ElectronMerger: " << pfTrgMatches.size() << " trigger matches for "
+                                          << pf->size() << " PF electrons, pfSrc must keep the order of the matched collection";
+  edm::Handle<std::vector<int>> lowptTrgMatches;
+  if ( saveLowPtE_ ) {
+    evt.getByToken(lowpt_trg_matches_, lowptTrgMatches);
+    if ( lowptTrgMatches->size() != lowpt->size() )
+      throw cms::Exception("Configuration") << "ElectronMerger: " << lowptTrgMatches->size() << " trigger matches for "
+                                            << lowpt->size() << " lowPt electrons, lowptSrc must keep the order of the matched collection";
+  }
   edm::Handle<edm::ValueMap<float> > pfmvaId;
   if ( !pf_mvaId_src_Tag_.label().empty() ) { evt.getByToken(pf_mvaId_src_, pfmvaId); }
   edm::Handle<edm::ValueMap<float> > pfmvaIdcustom;
@@ -193,10 +280,18 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
   std::vector<std::pair<float, float>> pfEtaPhi;
   std::vector<float> pfVz;
 
-  // -> changing order of loops ert Arabella's fix this without need for more vectors
-  size_t ipfele=-1;
-  for(pat::Electron ele : *pf) {
-   ipfele++;
+  // trigger leptons sorted by vz, for the dz cleaning
+  std::vector<std::pair<double, unsigned int>> trgVz;
+  for(unsigned int itrg = 0; itrg < trgLepton->size(); ++itrg) trgVz.emplace_back((*trgLepton)[itrg].vz(), itrg);
+  std::sort(trgVz.begin(), trgVz.end());
+  std::vector<unsigned int> trgCandidates;
+
+  // the selection reads the input electrons in place; the selected ones are copied
+  // to the output once, in their final order, and annotated there
+  std::vector<SelectedElectron> selected;
+
+  for(size_t ipfele = 0; ipfele < pf->size(); ++ipfele) {
+   const pat::Electron& ele = (*pf)[ipfele];
 
    if (debug) std::cout << "ElectronMerger, Event " << (evt.id()).event()
 			<< " => PF: ele.superCluster()->rawEnergy() = " << ele.superCluster()->rawEnergy()
@@ -207,142 +302,29 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
    //cuts
    bool pTcut = ele.pt()<ptMin_ || ele.pt() < pf_ptMin_;
    bool etaCut = fabs(ele.eta()) > etaMax_;
+   if(!efficiencyStudy_ && (pTcut || etaCut)) continue;
 
-   if(!efficiencyStudy_){
-     if(pTcut || etaCut) continue;
-   }
-   else {
-     ele.addUserInt("selection_pTcut", !pTcut); // True if cut is passed -- use as mask
-     ele.addUserInt("selection_etaCut", !etaCut);
-   }
-
-   // take modes?
-   if (use_regression_for_p4_) {
-     // pt from regression, eta and phi from gsf track mode
-     reco::Candidate::PolarLorentzVector p4(ele.pt(),
-					    ele.gsfTrack()->etaMode(),
-					    ele.gsfTrack()->phiMode(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   }else if(use_gsf_mode_for_p4_) {
-     reco::Candidate::PolarLorentzVector p4(ele.gsfTrack()->ptMode(),
-					    ele.gsfTrack()->etaMode(),
-					    ele.gsfTrack()->phiMode(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   } else {
-     // Fix the mass to the proper one
-     reco::Candidate::PolarLorentzVector p4(ele.pt(),
-					    ele.eta(),
-					    ele.phi(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   }
+   const reco::Candidate::PolarLorentzVector p4 = electronP4(ele);
 
    // skip electrons inside tag's jet or from different PV
-   bool skipEle=true;
-   float dzTrg = 0.0;
-   for(const auto & trg : *trgLepton) {
-     if(reco::deltaR(ele, trg) < drTrg_cleaning_ && drTrg_cleaning_ > 0)
-        continue;
-     if(fabs(ele.vz() - trg.vz()) > dzTrg_cleaning_ && dzTrg_cleaning_ > 0)
-        continue;
-     skipEle=false;
-     dzTrg = ele.vz() - trg.vz();
-     break; // one trg muon to pass is enough :)
-   }
+   int itrg = firstTrgLepton(p4, ele.vz(), *trgLepton, trgVz, trgCandidates);
    // we skip evts without trg muon
-   if (filterEle_ && skipEle) continue;
-
-   // for PF e we set BDT outputs to much higher number than the max
-   // No Iso scores
-   edm::Ref<pat::ElectronCollection> ref(pf,ipfele);
-   float pf_mva_id = 20.;
-   if ( !pf_mvaId_src_Tag_.label().empty() ) { pf_mva_id = float((*pfmvaId)[ref]); }
-   else pf_mva_id = ele.userFloat("ElectronMVAEstimatorRun2BParkRetrainRawValues"); // needed for 2022 PromptReco, when manually embedding Run 3 WP; refs to electronMVAValueMapProducer products are not usable here
-
-   float pf_mva_id_run2 = 20.;
-   if ( !pf_mvaId_src_Tag_run2_.label().empty() ) { pf_mva_id_run2 = float((*pfmvaId_run2)[ref]); }
-   else pf_mva_id_run2 = ele.userFloat("ElectronMVAEstimatorRun2Fall17NoIsoV2Values"); // same as above
-
-   float pf_mva_id_run3 = 20.;
-   if ( !pf_mvaId_src_Tag_run3_.label().empty() ) { pf_mva_id_run3 = float((*pfmvaId_run3)[ref]); }
-   else pf_mva_id_run3 = ele.userFloat("ElectronMVAEstimatorRun2RunIIIWinter22NoIsoV1Values"); // same as above
-
-   // Iso scores
-   float pf_mva_id_run2_iso = ele.userFloat("ElectronMVAEstimatorRun2Fall17IsoV2Values");
-   float pf_mva_id_run3_iso = ele.userFloat("ElectronMVAEstimatorRun2RunIIIWinter22IsoV1Values");
-
-   float pf_mvacustom_id = 20.;
-   if ( !pf_mvaIdcustom_src_Tag_.label().empty() ) { pf_mvacustom_id = float((*pfmvaIdcustom)[ref]); }
-   else pf_mvacustom_id = ele.userFloat("ElectronMVAEstimatorRun2RunIIICustomJPsitoEERawValues");   
-
-
-   ele.addUserInt("isPF", 1);
-   ele.addUserInt("isLowPt", 0);
-   // Custom IDs
-   ele.addUserFloat("LPEleSeed_Fall17PtBiasedV1Value", 20.); // was called "ptBiased"
-   ele.addUserFloat("LPEleSeed_Fall17UnBiasedV1Value", 20.); // was called "unBiased"
-   ele.addUserFloat("LPEleMvaID_2020Sept15Value", 20.); // was called "mvaId"
-   ele.addUserFloat("PFEleMvaID_RetrainedValue", pf_mva_id); // was called "pfmvaId"
-   ele.addUserFloat("PFEleMvaID_Run3CustomJpsitoEEValue", pf_mvacustom_id);   
-
-   // Run-2 PF ele ID
-   //   mva no iso
-   ele.addUserFloat("PFEleMvaID_Fall17NoIsoV2Value", pf_mva_id_run2);
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wpLoose", ref->electronID("mvaEleID-Fall17-noIso-V2-wpLoose"));
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp90", ref->electronID("mvaEleID-Fall17-noIso-V2-wp90"));
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp80", ref->electronID("mvaEleID-Fall17-noIso-V2-wp80"));
-   //   mva iso
-   ele.addUserFloat("PFEleMvaID_Fall17IsoV2Value", pf_mva_id_run2_iso);
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wpLoose", ref->electronID("mvaEleID-Fall17-iso-V2-wpLoose"));
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wp90", ref->electronID("mvaEleID-Fall17-iso-V2-wp90"));
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wp80", ref->electronID("mvaEleID-Fall17-iso-V2-wp80"));
-   //   cut based
-   ele.addUserInt("PFEleCutID_Fall17V2wpLoose", ref->electronID("cutBasedElectronID-Fall17-94X-V2-loose"));
-   ele.addUserInt("PFEleCutID_Fall17V2wpMedium", ref->electronID("cutBasedElectronID-Fall17-94X-V2-medium"));
-   ele.addUserInt("PFEleCutID_Fall17V2wpTight", ref->electronID("cutBasedElectronID-Fall17-94X-V2-tight"));
-
-   // Run-3 PF ele ID
-   // mva no iso
-   ele.addUserFloat("PFEleMvaID_Winter22NoIsoV1Value", pf_mva_id_run3);
-   ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp90", ref->electronID("mvaEleID-RunIIIWinter22-noIso-V1-wp90"));
-   ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp80", ref->electronID("mvaEleID-RunIIIWinter22-noIso-V1-wp80"));
-   // mva iso
-   ele.addUserFloat("PFEleMvaID_Winter22IsoV1Value", pf_mva_id_run3_iso);
-   ele.addUserInt("PFEleMvaID_Winter22IsoV1wp90", ref->electronID("mvaEleID-RunIIIWinter22-iso-V1-wp90"));
-   ele.addUserInt("PFEleMvaID_Winter22IsoV1wp80", ref->electronID("mvaEleID-RunIIIWinter22-iso-V1-wp80"));
-   // cut based
-   ele.addUserInt("PFEleCutID_Winter22V1wpLoose", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-loose"));
-   ele.addUserInt("PFEleCutID_Winter22V1wpMedium", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-medium"));
-   ele.addUserInt("PFEleCutID_Winter22V1wpTight", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-tight"));
-
-   ele.addUserFloat("chargeMode", ele.charge());
-   ele.addUserInt("isPFoverlap", 0);
-   ele.addUserFloat("dzTrg", dzTrg);
-   ele.addUserInt("skipEle",skipEle);
-
-   //Add for low pt id
-   ele.addUserFloat("ids", -999.);
-
-   // Attempt to match electrons to conversions in "gsfTracksOpenConversions" collection (NO MATCHES EXPECTED)
-   ConversionInfo info;
-   ConversionInfo::match(beamSpot,conversions,ele,info);
-   info.addUserVars(ele);
-   if ( addUserVarsExtra_ ) { info.addUserVarsExtra(ele); }
-
-   pfEtaPhi.push_back(std::pair<float, float>(ele.eta(), ele.phi()));
+   if (filterEle_ && itrg < 0) continue;
+
+   selected.push_back({&ele, ipfele, true, p4, pTcut, etaCut, itrg, false, 20.});
+   pfEtaPhi.push_back(std::pair<float, float>(p4.eta(), p4.phi()));
    pfVz.push_back(ele.vz());
-   ele_out       -> emplace_back(ele);
   }
 
-  unsigned int pfSelectedSize = pfEtaPhi.size();
+  // selected PF electrons indexed in eta-phi for the overlap flagging, cells larger than the
+  // cleaning cone so that only the neighbouring ones are visited
+  EtaPhiGrid pfGrid(std::max(0.1, 1.1 * dr_cleaning_));
+  pfGrid.fill(pfEtaPhi);
 
   if ( saveLowPtE_ ) {
-  size_t iele=-1;
   /// add and clean low pT e
-  for(auto ele : *lowpt) {
-    iele++;
+  for(size_t iele = 0; iele < lowpt->size(); ++iele) {
+    const pat::Electron& ele = (*lowpt)[iele];
 
     if (debug) std::cout << "ElectronMerger, Event " << (evt.id()).event()
 			 << " => LPT: ele.superCluster()->rawEnergy() = " << ele.superCluster()->rawEnergy()
@@ -350,137 +332,223 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
 			 << ", ele gsf track chi2 = " << ele.gsfTrack()->normalizedChi2()
 			 << ", ele.p = " << ele.p() << std::endl;
 
-   // take modes?
-   if (use_regression_for_p4_) {
-     // pt from regression, eta and phi from gsf track mode
-     reco::Candidate::PolarLorentzVector p4(ele.pt(),
-					    ele.gsfTrack()->etaMode(),
-					    ele.gsfTrack()->phiMode(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   }else if(use_gsf_mode_for_p4_) {
-     reco::Candidate::PolarLorentzVector p4(ele.gsfTrack()->ptMode(),
-					    ele.gsfTrack()->etaMode(),
-					    ele.gsfTrack()->phiMode(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   } else {
-     // Fix the mass to the proper one
-     reco::Candidate::PolarLorentzVector p4(ele.pt(),
-					    ele.eta(),
-					    ele.phi(),
-					    ELECTRON_MASS);
-     ele.setP4(p4);
-   }
+   const reco::Candidate::PolarLorentzVector p4 = electronP4(ele);
 
    //same cuts as in PF
-   bool pTcut = ele.pt() < ptMin_;
-   bool etaCut = fabs(ele.eta()) > etaMax_;
-
-   if(!efficiencyStudy_){
-     if(pTcut || etaCut) continue;
-   }
-   else {
-     ele.addUserInt("selection_pTcut", !pTcut); // True if cut is passed -- use as mask
-     ele.addUserInt("selection_etaCut", !etaCut);
-   }
+   bool pTcut = p4.pt() < ptMin_;
+   bool etaCut = fabs(p4.eta()) > etaMax_;
+   if(!efficiencyStudy_ && (pTcut || etaCut)) continue;
 
    //assigning BDT values
    float mva_id = ( ele.isElectronIDAvailable("ID") ? ele.electronID("ID") : -100. );
    //  if ( unbiased_seedBDT <bdtMin_) continue; //extra cut for low pT e on BDT
    if ( mva_id < bdtMin_) continue; //extra cut for low pT e on BDT
 
-
-   bool skipEle=true;
-   float dzTrg = 0.0;
-   for(const auto & trg : *trgLepton) {
-     if(reco::deltaR(ele, trg) < drTrg_cleaning_ && drTrg_cleaning_ > 0)
-        continue;
-     if(fabs(ele.vz() - trg.vz()) > dzTrg_cleaning_ && dzTrg_cleaning_ > 0)
-        continue;
-     skipEle=false;
-     dzTrg = ele.vz() - trg.vz();
-     break;  // one trg muon is enough
-   }
+   int itrg = firstTrgLepton(p4, ele.vz(), *trgLepton, trgVz, trgCandidates);
    // same here Do we need evts without trg muon? now we skip them
-   if (filterEle_ && skipEle) continue;
+   if (filterEle_ && itrg < 0) continue;
 
    //pf cleaning
    bool clean_out = false;
-   for(unsigned int iEle=0; iEle<pfSelectedSize; ++iEle) {
+   pfGrid.forEachCandidate(p4.eta(), p4.phi(), dr_cleaning_, [&](unsigned int iEle) {
 
       clean_out |= (
 	           fabs(pfVz[iEle] - ele.vz()) < dz_cleaning_ &&
-                   reco::deltaR(ele.eta(), ele.phi(), pfEtaPhi[iEle].first, pfEtaPhi[iEle].second) < dr_cleaning_   );
+                   reco::deltaR(p4.eta(), p4.phi(), pfEtaPhi[iEle].first, pfEtaPhi[iEle].second) < dr_cleaning_   );
 
-   }
+   });
    if(clean_out && flagAndclean_) continue;
-   else if(clean_out) ele.addUserInt("isPFoverlap", 1);
-   else ele.addUserInt("isPFoverlap", 0);
-
-   float unbiased_seedBDT = ( ele.isElectronIDAvailable("unbiased") ? ele.electronID("unbiased") : -100. );
-   float ptbiased_seedBDT = ( ele.isElectronIDAvailable("ptbiased") ? ele.electronID("ptbiased") : -100. );
-   ele.addUserInt("isPF", 0);
-   ele.addUserInt("isLowPt", 1);
-
-   // Custom IDs
-   ele.addUserFloat("LPEleSeed_Fall17PtBiasedV1Value", ptbiased_seedBDT); // was called "ptBiased"
-   ele.addUserFloat("LPEleSeed_Fall17UnBiasedV1Value", unbiased_seedBDT); // was called "unBiased"
-   ele.addUserFloat("LPEleMvaID_2020Sept15Value", mva_id); // was called "mvaId"
-   ele.addUserFloat("PFEleMvaID_RetrainedValue", 20.); // was called "pfmvaId"
-   ele.addUserFloat("PFEleMvaID_Run3CustomJpsitoEEValue", 20);   
-
-   //need to add as placeholders
-   // Run-2 PF ele ID
-   ele.addUserFloat("PFEleMvaID_Fall17NoIsoV2Value", 20.); // Run 2 ID
-   ele.addUserFloat("PFEleMvaID_Fall17IsoV2Value", 20.); // Run 2 ID
-
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wpLoose", 0);
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp90", 0);
-   ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp80", 0);
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wpLoose", 0);
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wp90", 0);
-   ele.addUserInt("PFEleMvaID_Fall17IsoV2wp80", 0);
-   ele.addUserInt("PFEleCutID_Fall17V2wpLoose", 0);
-   ele.addUserInt("PFEleCutID_Fall17V2wpMedium", 0);
-   ele.addUserInt("PFEleCutID_Fall17V2wpTight", 0);
-
-   // Run-3 PF ele ID
-   ele.addUserFloat("PFEleMvaID_Winter22NoIsoV1Value", 20.); // Run 3 ID
-   ele.addUserFloat("PFEleMvaID_Winter22IsoV1Value", 20.); // Run 3 ID
-
-   ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp90", 0);
-   ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp80", 0);
-   ele.addUserInt("PFEleMvaID_Winter22IsoV1wp90", 0);
-   ele.addUserInt("PFEleMvaID_Winter22IsoV1wp80", 0);
-   ele.addUserInt("PFEleCutID_Winter22V1wpLoose", 0);
-   ele.addUserInt("PFEleCutID_Winter22V1wpMedium", 0);
-   ele.addUserInt("PFEleCutID_Winter22V1wpTight", 0);
-
-   ele.addUserFloat("chargeMode", ele.gsfTrack()->chargeMode());
-   ele.addUserFloat("dzTrg", dzTrg);
-   ele.addUserInt("skipEle",skipEle);
-
-   // Attempt to match electrons to conversions in "gsfTracksOpenConversions" collection
-   ConversionInfo info;
-   ConversionInfo::match(beamSpot,conversions,ele,info);
-   info.addUserVars(ele);
-   if ( addUserVarsExtra_ ) { info.addUserVarsExtra(ele); }
-   if (debug && info.wpOpen()) {
-     std::cout << "[ElectronMerger::produce]"
-	       << " iele: " << iele
-	       << ", convOpen: " << (info.wpOpen()?1:0)
-	       << ", convLoose: " << (info.wpLoose()?1:0)
-	       << ", convTight: " << (info.wpTight()?1:0)
-	       << ", convLead: " << int(info.matched_lead.isNonnull()?info.matched_lead.key():-1)
-	       << ", convTrail: " << int(info.matched_trail.isNonnull()?info.matched_trail.key():-1)
-	       << std::endl;
-   }
 
-   ele_out       -> emplace_back(ele);
+   selected.push_back({&ele, iele, false, p4, pTcut, etaCut, itrg, clean_out, mva_id});
   }
 }//end of if(saveLowPtE_)
 
+  // output order: by decreasing pt if requested, otherwise PF then lowPt as selected
+  std::vector<unsigned int> order(selected.size());
+  for(unsigned int isel = 0; isel < selected.size(); ++isel) order[isel] = isel;
+  if(sortOutputCollections_){
+
+    //sorting increases sligtly the time but improves the code efficiency in the Bcandidate builder
+    //easier identification of leading and subleading with smarter loop
+    std::stable_sort(order.begin(), order.end(), [&selected] (unsigned int i1, unsigned int i2) -> bool {
+                       return selected[i1].p4.pt() > selected[i2].p4.pt();});
+  }
+
+  // conversion quantities computed once for all the electrons
+  ConversionLookup conversionLookup(beamSpot,conversions);
+
+  ele_out->reserve(selected.size());
+  for(unsigned int isel : order) {
+   const SelectedElectron& sel = selected[isel];
+   ele_out->emplace_back(*sel.src);
+   pat::Electron& ele = ele_out->back();
+   ele.setP4(sel.p4);
+   if(efficiencyStudy_){
+     ele.addUserInt("selection_pTcut", !sel.pTcut); // True if cut is passed -- use as mask
+     ele.addUserInt("selection_etaCut", !sel.etaCut);
+   }
+   bool skipEle = sel.itrg < 0;
+   float dzTrg = skipEle ? 0.0 : ele.vz() - (*trgLepton)[sel.itrg].vz();
+
+   if(sel.isPF){
+     edm::Ref<pat::ElectronCollection> ref(pf, sel.index);
+     // for PF e we set BDT outputs to much higher number than the max
+     // No Iso scores
+     float pf_mva_id = 20.;
+     if ( !pf_mvaId_src_Tag_.label().empty() ) { pf_mva_id = float((*pfmvaId)[ref]); }
+     else pf_mva_id = ele.userFloat("ElectronMVAEstimatorRun2BParkRetrainRawValues"); // needed for 2022 PromptReco, when manually embedding Run 3 WP; refs to electronMVAValueMapProducer products are not usable here
+
+     float pf_mva_id_run2 = 20.;
+     if ( !pf_mvaId_src_Tag_run2_.label().empty() ) { pf_mva_id_run2 = float((*pfmvaId_run2)[ref]); }
+     else pf_mva_id_run2 = ele.userFloat("ElectronMVAEstimatorRun2Fall17NoIsoV2Values"); // same as above
+
+     float pf_mva_id_run3 = 20.;
+     if ( !pf_mvaId_src_Tag_run3_.label().empty() ) { pf_mva_id_run3 = float((*pfmvaId_run3)[ref]); }
+     else pf_mva_id_run3 = ele.userFloat("ElectronMVAEstimatorRun2RunIIIWinter22NoIsoV1Values"); // same as above
+
+     // Iso scores
+     float pf_mva_id_run2_iso = ele.userFloat("ElectronMVAEstimatorRun2Fall17IsoV2Values");
+     float pf_mva_id_run3_iso = ele.userFloat("ElectronMVAEstimatorRun2RunIIIWinter22IsoV1Values");
+
+     float pf_mvacustom_id = 20.;
+     if ( !pf_mvaIdcustom_src_Tag_.label().empty() ) { pf_mvacustom_id = float((*pfmvaIdcustom)[ref]); }
+     else pf_mvacustom_id = ele.userFloat("ElectronMVAEstimatorRun2RunIIICustomJPsitoEERawValues");   
+
+
+     ele.addUserInt("isPF", 1);
+     ele.addUserInt("isLowPt", 0);
+     // Custom IDs
+     ele.addUserFloat("LPEleSeed_Fall17PtBiasedV1Value", 20.); // was called "ptBiased"
+     ele.addUserFloat("LPEleSeed_Fall17UnBiasedV1Value", 20.); // was called "unBiased"
+     ele.addUserFloat("LPEleMvaID_2020Sept15Value", 20.); // was called "mvaId"
+     ele.addUserFloat("PFEleMvaID_RetrainedValue", pf_mva_id); // was called "pfmvaId"
+     ele.addUserFloat("PFEleMvaID_Run3CustomJpsitoEEValue", pf_mvacustom_id);   
+
+     // Run-2 PF ele ID
+     //   mva no iso
+     ele.addUserFloat("PFEleMvaID_Fall17NoIsoV2Value", pf_mva_id_run2);
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wpLoose", ref->electronID("mvaEleID-Fall17-noIso-V2-wpLoose"));
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp90", ref->electronID("mvaEleID-Fall17-noIso-V2-wp90"));
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp80", ref->electronID("mvaEleID-Fall17-noIso-V2-wp80"));
+     //   mva iso
+     ele.addUserFloat("PFEleMvaID_Fall17IsoV2Value", pf_mva_id_run2_iso);
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wpLoose", ref->electronID("mvaEleID-Fall17-iso-V2-wpLoose"));
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wp90", ref->electronID("mvaEleID-Fall17-iso-V2-wp90"));
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wp80", ref->electronID("mvaEleID-Fall17-iso-V2-wp80"));
+     //   cut based
+     ele.addUserInt("PFEleCutID_Fall17V2wpLoose", ref->electronID("cutBasedElectronID-Fall17-94X-V2-loose"));
+     ele.addUserInt("PFEleCutID_Fall17V2wpMedium", ref->electronID("cutBasedElectronID-Fall17-94X-V2-medium"));
+     ele.addUserInt("PFEleCutID_Fall17V2wpTight", ref->electronID("cutBasedElectronID-Fall17-94X-V2-tight"));
+
+     // Run-3 PF ele ID
+     // mva no iso
+     ele.addUserFloat("PFEleMvaID_Winter22NoIsoV1Value", pf_mva_id_run3);
+     ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp90", ref->electronID("mvaEleID-RunIIIWinter22-noIso-V1-wp90"));
+     ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp80", ref->electronID("mvaEleID-RunIIIWinter22-noIso-V1-wp80"));
+     // mva iso
+     ele.addUserFloat("PFEleMvaID_Winter22IsoV1Value", pf_mva_id_run3_iso);
+     ele.addUserInt("PFEleMvaID_Winter22IsoV1wp90", ref->electronID("mvaEleID-RunIIIWinter22-iso-V1-wp90"));
+     ele.addUserInt("PFEleMvaID_Winter22IsoV1wp80", ref->electronID("mvaEleID-RunIIIWinter22-iso-V1-wp80"));
+     // cut based
+     ele.addUserInt("PFEleCutID_Winter22V1wpLoose", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-loose"));
+     ele.addUserInt("PFEleCutID_Winter22V1wpMedium", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-medium"));
+     ele.addUserInt("PFEleCutID_Winter22V1wpTight", ref->electronID("cutBasedElectronID-RunIIIWinter22-V1-tight"));
+
+     ele.addUserFloat("chargeMode", ele.charge());
+     ele.addUserInt("isPFoverlap", 0);
+     ele.addUserFloat("dzTrg", dzTrg);
+     ele.addUserInt("skipEle",skipEle);
+
+     //Add for low pt id
+     ele.addUserFloat("ids", -999.);
+
+     // Attempt to match electrons to conversions in "gsfTracksOpenConversions" collection (NO MATCHES EXPECTED)
+     ConversionInfo info;
+     conversionLookup.match(ele,info);
+     info.addUserVars(ele);
+     if ( addUserVarsExtra_ ) { info.addUserVarsExtra(ele); }
+
+     addTriggerMatch(ele, pfTrgMatches[sel.index], trgObjects);
+   }
+   else {
+     float mva_id = sel.mvaId;
+     if(sel.pfOverlap) ele.addUserInt("isPFoverlap", 1);
+     else ele.addUserInt("isPFoverlap", 0);
+
+     float unbiased_seedBDT = ( ele.isElectronIDAvailable("unbiased") ? ele.electronID("unbiased") : -100. );
+     float ptbiased_seedBDT = ( ele.isElectronIDAvailable("ptbiased") ? ele.electronID("ptbiased") : -100. );
+     ele.addUserInt("isPF", 0);
+     ele.addUserInt("isLowPt", 1);
+
+     // Custom IDs
+     ele.addUserFloat("LPEleSeed_Fall17PtBiasedV1Value", ptbiased_seedBDT); // was called "ptBiased"
+     ele.addUserFloat("LPEleSeed_Fall17UnBiasedV1Value", unbiased_seedBDT); // was called "unBiased"
+     ele.addUserFloat("LPEleMvaID_2020Sept15Value", mva_id); // was called "mvaId"
+     ele.addUserFloat("PFEleMvaID_RetrainedValue", 20.); // was called "pfmvaId"
+     ele.addUserFloat("PFEleMvaID_Run3CustomJpsitoEEValue", 20);   
+
+     //need to add as placeholders
+     // Run-2 PF ele ID
+     ele.addUserFloat("PFEleMvaID_Fall17NoIsoV2Value", 20.); // Run 2 ID
+     ele.addUserFloat("PFEleMvaID_Fall17IsoV2Value", 20.); // Run 2 ID
+
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wpLoose", 0);
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp90", 0);
+     ele.addUserInt("PFEleMvaID_Fall17NoIsoV2wp80", 0);
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wpLoose", 0);
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wp90", 0);
+     ele.addUserInt("PFEleMvaID_Fall17IsoV2wp80", 0);
+     ele.addUserInt("PFEleCutID_Fall17V2wpLoose", 0);
+     ele.addUserInt("PFEleCutID_Fall17V2wpMedium", 0);
+     ele.addUserInt("PFEleCutID_Fall17V2wpTight", 0);
+
+     // Run-3 PF ele ID
+     ele.addUserFloat("PFEleMvaID_Winter22NoIsoV1Value", 20.); // Run 3 ID
+     ele.addUserFloat("PFEleMvaID_Winter22IsoV1Value", 20.); // Run 3 ID
+
+     ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp90", 0);
+     ele.addUserInt("PFEleMvaID_Winter22NoIsoV1wp80", 0);
+     ele.addUserInt("PFEleMvaID_Winter22IsoV1wp90", 0);
+     ele.addUserInt("PFEleMvaID_Winter22IsoV1wp80", 0);
+     ele.addUserInt("PFEleCutID_Winter22V1wpLoose", 0);
+     ele.addUserInt("PFEleCutID_Winter22V1wpMedium", 0);
+     ele.addUserInt("PFEleCutID_Winter22V1wpTight", 0);
+
+     ele.addUserFloat("chargeMode", ele.gsfTrack()->chargeMode());
+     ele.addUserFloat("dzTrg", dzTrg);
+     ele.addUserInt("skipEle",skipEle);
+
+     // Attempt to match electrons to conversions in "gsfTracksOpenConversions" collection
+     ConversionInfo info;
+     conversionLookup.match(ele,info);
+     info.addUserVars(ele);
+     if ( addUserVarsExtra_ ) { info.addUserVarsExtra(ele); }
+     if (debug && info.wpOpen()) {
+       std::cout << "[ElectronMerger::produce]"
+  	       << " iele: " << sel.index
+  	       << ", convOpen: " << (info.wpOpen()?1:0)
+  	       << ", convLoose: " << (info.wpLoose()?1:0)
+  	       << ", convTight: " << (info.wpTight()?1:0)
+  	       << ", convLead: " << int(info.matched_lead.isNonnull()?info.matched_lead.key():-1)
+  	       << ", convTrail: " << int(info.matched_trail.isNonnull()?info.matched_trail.key():-1)
+  	       << std::endl;
+     }
+
+     addTriggerMatch(ele, (*lowptTrgMatches)[sel.index], trgObjects);
+   }
+  }
+
+  // CTF tracks of the lowPt electrons not overlapping with PF, for the isolation correction
+  CtfIsoCorrection ctfIso;
+  for(unsigned int ilp = 0; ilp < ele_out->size(); ++ilp){
+    const pat::Electron &lp = (*ele_out)[ilp];
+    if ((lp.userInt("isPF")) || lp.userInt("isPFoverlap")) continue; // skip if lp is known to overlap with PF ele --> no correction needed
+    if (!lp.closestCtfTrackRef().isNonnull()) continue;       // skip if lp has no associated CTF track --> no correction possible
+    const auto& ctf = lp.closestCtfTrackRef();
+    ctfIso.add(ilp, lp.eta(), lp.phi(), ctf->eta(), ctf->phi(), ctf->pt());
+  }
+  ctfIso.build();
+
   // Isolation (+ correction)
   size_t ie=-1;
   for(pat::Electron &ele : *ele_out){
@@ -491,21 +559,9 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
     float pfisoall0p4 = ele.chargedHadronIso() + std::max(0.0, ele.neutralHadronIso() + ele.photonIso() - rho * ea * 16. / 9.);
 
     // Correction for cases where LowPT electrons don't overlap with PF --> PF reconstructs it as charged hadron --> Need to subtract CTF pt from isolation sum
-    float tosub0p3=0.;
-    float tosub0p4=0.;
-
-    size_t ilp=-1;
-    for(pat::Electron &lp : *ele_out){
-      ilp+=1;
-      if ((lp.userInt("isPF")) || lp.userInt("isPFoverlap")) continue; // skip if lp is known to overlap with PF ele --> no correction needed
-      if (!lp.closestCtfTrackRef().isNonnull()) continue;       // skip if lp has no associated CTF track --> no correction possible
-
-      float dR_gsf = reco::deltaR(ele.eta(), ele.phi(), lp.eta(), lp.phi());
-      float dR_ctf = reco::deltaR(ele.eta(), ele.phi(), lp.closestCtfTrackRef()->eta(), lp.closestCtfTrackRef()->phi());
-      if (dR_gsf<0.001) continue; // skip if lp is same as reference --> cut comes down to numerical precision
-      if (dR_ctf < 0.3) tosub0p3+=lp.closestCtfTrackRef()->pt();
-      if (dR_ctf < 0.4) tosub0p4+=lp.closestCtfTrackRef()->pt();
-    }
+    CtfIsoCorrection::Sums ctfSums = ctfIso.sums(ele.eta(), ele.phi(), order);
+    float tosub0p3 = ctfSums.tosub0p3;
+    float tosub0p4 = ctfSums.tosub0p4;
     ele.addUserFloat("PFIsoAll03", pfisoall0p3);
     ele.addUserFloat("PFIsoAll03_corr", pfisoall0p3 - tosub0p3);
     ele.addUserFloat("PFIsoChg03_corr", ele.pfIsolationVariables().sumChargedHadronPt - tosub0p3);
@@ -514,149 +570,8 @@ void ElectronMerger::produce(edm::StreamID, edm::Event &evt, edm::EventSetup con
     ele.addUserFloat("PFIsoChg04_corr", ele.chargedHadronIso() - tosub0p4);
   }
 
-  if(sortOutputCollections_){
-
-    //sorting increases sligtly the time but improves the code efficiency in the Bcandidate builder
-    //easier identification of leading and subleading with smarter loop
-    std::sort( ele_out->begin(), ele_out->end(), [] (pat::Electron e1, pat::Electron e2) -> bool {return e1.pt() > e2.pt();}
-             );
-  }
-
-  // TRIGGER MATCHING
-
-  // save useful information related to matched trigger object
-  for(pat::Electron &ele : *ele_out){
-    bool isTriggering = false;
-    float drTrg = 999.;
-    float dPtOverPtTrg = 999.;
-
-    if(ele.triggerObjectMatches().size() != 0){
-      isTriggering = true;
-      for(auto &trg : ele.triggerObjectMatches()){ //size always 1 since ambiguity resolved
-        drTrg = reco::deltaR(ele, trg);
-        dPtOverPtTrg = std::abs(ele.pt() - trg.pt())/ele.pt();
-      }
-    }
-
-    ele.addUserInt("isTriggering", isTriggering);
-    ele.addUserFloat("drTrg", drTrg);
-    ele.addUserFloat("dPtOverPtTrg", dPtOverPtTrg);
-  }
-
-  // REGRESSION VARIABLES
-  if(saveRegressionVars_){
-
-    // retrieve ECAL topology, ECAL Rec Hits
-    edm::Handle<EcalRecHitCollection> ecalRecHitsEBH;
-    edm::Handle<EcalRecHitCollection> ecalRecHitsEEH;
-    evt.getByToken(ecalRecHitsEBToken_, ecalRecHitsEBH);
-    evt.getByToken(ecalRecHitsEEToken_, ecalRecHitsEEH);
-
-    const EcalRecHitCollection* recHits = nullptr;
-
-    // retrieve topology
-    const auto& topology = iSetup.getData(ecalTopologyToken_);
-    const auto& geometry = iSetup.getData(caloGeometryToken_);    
-
-    for(auto &ele : *ele_out){
-      bool isEB = ele.seed()->seed().subdetId() == EcalBarrel;      
-      ele.addUserInt("isEB", isEB);
-
-      // retrieve correct collection of rec hits
-      if(isEB){
-        recHits = ecalRecHitsEBH.product();
-      } else {
-        recHits = ecalRecHitsEEH.product();
-      }
-
-      // Define ShowerClusterHelper to retrieve variables of interest
-      SuperClusterHelper* mySCHelper = new SuperClusterHelper(&ele, recHits, &topology, &geometry);
-
-      // SHOWER SHAPE VARIABLES
-      ele.addUserFloat("e3x3", mySCHelper->e3x3());
-
-      // SEED ETA/PHI INDEX
-      // code from https://github.com/cms-egamma/SHarper-UserCode/blob/31c0e6a5df7e477436b6951f843945ee35ca5b84/TrigNtup/src/EGRegTreeStruct.cc
-      int iEtaOrX = -999, iPhiOrY = -999, iEtaMod5 = -999, iPhiMod2 = -999, iEtaMod20 = -999, iPhiMod20 = -999;
-
-      if(isEB){
-        // create SuperClusterHelper
-        EBDetId ebDetId(ele.superCluster()->seed()->seed());
-        iEtaOrX = ebDetId.ieta();
-        iPhiOrY = ebDetId.iphi();
-
-        const int iEtaCorr = ebDetId.ieta() - (ebDetId.ieta() > 0 ? +1 : -1);
-        const int iEtaCorr26 = ebDetId.ieta() - (ebDetId.ieta() > 0 ? +26 : -26);
-        iEtaMod5 = iEtaCorr % 5;
-        iEtaMod20 = std::abs(ebDetId.ieta()) <= 25 ? iEtaCorr % 20 : iEtaCorr26 % 20;
-        iPhiMod2 = (ebDetId.iphi() - 1) % 2;
-        iPhiMod20 = (ebDetId.iphi() - 1) % 20;
-      } else {
-        EEDetId eeDetId(ele.superCluster()->seed()->seed());
-        iEtaOrX = eeDetId.ix();
-        iPhiOrY = eeDetId.iy();
-      }
-
-      ele.addUserInt("iEtaOrX", iEtaOrX);
-      ele.addUserInt("iPhiOrY", iPhiOrY);
-      ele.addUserInt("iEtaMod5", iEtaMod5);
-      ele.addUserInt("iPhiMod2", iPhiMod2);
-      ele.addUserInt("iEtaMod20", iEtaMod20);
-      ele.addUserInt("iPhiMod20", iPhiMod20);
-
-      ele.addUserInt("etaCrySeed", mySCHelper->etaCrySeed());
-      ele.addUserInt("phiCrySeed", mySCHelper->phiCrySeed());
-      
-      // SUBCLUSTERS
-      ele.addUserFloat("eSubClusters", mySCHelper->eSubClusters());
-
-      for(int i = 1; i < 4; i++){
-        ele.addUserFloat("subClusterEnergy"+std::to_string(i), mySCHelper->subClusterEnergy(i));
-        ele.addUserFloat("subClusterEta"+std::to_string(i), mySCHelper->subClusterEta(i));
-        ele.addUserFloat("subClusterPhi"+std::to_string(i), mySCHelper->subClusterPhi(i));
-        ele.addUserFloat("subClusterEmax"+std::to_string(i), mySCHelper->subClusterEmax(i));
-        ele.addUserFloat("subClusterE3x3"+std::to_string(i), mySCHelper->subClusterE3x3(i));
-        ele.addUserFloat("subClusterDEta"+std::to_string(i), mySCHelper->subClusterEta(i) - ele.seed()->eta());
-        ele.addUserFloat("subClusterDPhi"+std::to_string(i), reco::deltaPhi(mySCHelper->subClusterPhi(i), ele.seed()->phi()));
-      }
-
-      ele.addUserFloat("eESClusters", mySCHelper->eESClusters());
-      ele.addUserInt("nPreshowerClusters", mySCHelper->nPreshowerClusters());
-      for(int i = 0; i < 3; i++){
-        ele.addUserFloat("esClusterEnergy"+std::to_string(i), mySCHelper->esClusterEnergy(i));
-        ele.addUserFloat("esClusterEta"+std::to_string(i), mySCHelper->esClusterEta(i));
-        ele.addUserFloat("esClusterPhi"+std::to_string(i), mySCHelper->esClusterPhi(i));
-      }
-
-      // code adapted from https://github.com/cms-egamma/SHarper-UserCode/blob/31c0e6a5df7e477436b6951f843945ee35ca5b84/TrigNtup/src/EGRegTreeStruct.cc#L222
-      float maxDR2 = 0;
-      float clusterMaxDR = -999., clusterMaxDRDPhi = -999., clusterMaxDRDEta = -999., clusterMaxDRRawEnergy = -999.;
-      float seedEta = ele.superCluster()->seed()->eta(), seedPhi = ele.superCluster()->seed()->phi();
-
-      if(ele.superCluster()->clusters().isNonnull() && ele.superCluster()->clusters().isAvailable()){
-        for(auto& clus : ele.superCluster()->clusters()){
-          if(clus == ele.superCluster()->seed()) continue;
-          float dR2 = reco::deltaR2(seedEta, seedPhi, clus->eta(), clus->phi());
-          if(dR2 > maxDR2){
-            maxDR2 = dR2;
-            clusterMaxDR = std::sqrt(dR2);
-            clusterMaxDRDPhi = reco::deltaPhi(clus->phi(),seedPhi);
-            clusterMaxDRDEta = clus->eta()-seedEta;
-            clusterMaxDRRawEnergy = clus->energy();
-          }
-        }
-      }
-
-      ele.addUserFloat("clusterMaxDR", clusterMaxDR);
-      ele.addUserFloat("clusterMaxDRDPhi", clusterMaxDRDPhi);
-      ele.addUserFloat("clusterMaxDRDEta", clusterMaxDRDEta);
-      ele.addUserFloat("clusterMaxDRRawEnergy", clusterMaxDRRawEnergy);
-
-    }    
-  }
-
-
   // build transient track collection
+  trans_ele_out->reserve(ele_out->size());
   for(pat::Electron &ele : *ele_out){
     float regErrorRatio = std::abs(ele.corrections().combinedP4Error/ele.p()/ele.gsfTrack()->qoverpModeError()*ele.gsfTrack()->qoverpMode());
     const reco::TransientTrack eleTT = use_regression_for_p4_ ?
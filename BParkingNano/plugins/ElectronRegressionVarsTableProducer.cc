@@ -0,0 +1,241 @@
+// Regression variables of the electrons (saveRegressionVars), as an extension
+// of the electron table. They are computed after the dielectron builder, only
+// for the electrons of src used by at least one of its pairs: the others, most
+// of the merged electrons, are filled with -999 and hasRegressionVars = 0.
+// The rechit collections are only read in events with such electrons, and the
+// variables of an electron are computed once whatever its number of pairs.
+
+#include <cmath>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "FWCore/Framework/interface/Frameworkfwd.h"
+#include "FWCore/Framework/interface/global/EDProducer.h"
+#include "FWCore/Framework/interface/Event.h"
+#include "FWCore/Framework/interface/EventSetup.h"
+#include "FWCore/Framework/interface/MakerMacros.h"
+#include "FWCore/ParameterSet/interface/ParameterSet.h"
+#include "FWCore/ParameterSet/interface/ConfigurationDescriptions.h"
+#include "FWCore/Utilities/interface/Exception.h"
+#include "FWCore/Utilities/interface/InputTag.h"
+
+#include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/PatCandidates/interface/CompositeCandidate.h"
+#include "DataFormats/NanoAOD/interface/FlatTable.h"
+#include "DataFormats/Math/interface/deltaR.h"
+#include "DataFormats/Math/interface/deltaPhi.h"
+#include "DataFormats/EcalRecHit/interface/EcalRecHitCollections.h"
+#include "DataFormats/EcalDetId/interface/EBDetId.h"
+#include "DataFormats/EcalDetId/interface/EEDetId.h"
+#include "DataFormats/EcalDetId/interface/EcalSubdetector.h"
+#include "Geometry/Records/interface/CaloTopologyRecord.h"
+#include "Geometry/Records/interface/CaloGeometryRecord.h"
+#include "Geometry/CaloTopology/interface/CaloTopology.h"
+#include "Geometry/CaloGeometry/interface/CaloGeometry.h"
+#include "EgammaAnalysis/ElectronTools/interface/SuperClusterHelper.h"
+
+class ElectronRegressionVarsTableProducer : public edm::global::EDProducer<> {
+
+public:
+
+  explicit ElectronRegressionVarsTableProducer(const edm::ParameterSet &cfg):
+    name_(cfg.getParameter<std::string>("name")),
+    src_(consumes<pat::ElectronCollection>(cfg.getParameter<edm::InputTag>("src"))),
+    pairs_(consumes<pat::CompositeCandidateCollection>(cfg.getParameter<edm::InputTag>("pairs"))),
+    ecalRecHitsEB_(consumes<EcalRecHitCollection>(cfg.getParameter<edm::InputTag>("recHitCollectionEB"))),
+    ecalRecHitsEE_(consumes<EcalRecHitCollection>(cfg.getParameter<edm::InputTag>("recHitCollectionEE"))),
+    ecalTopologyToken_(esConsumes()),
+    caloGeometryToken_(esConsumes())
+  {
+    produces<nanoaod::FlatTable>();
+  }
+
+  ~ElectronRegressionVarsTableProducer() override {}
+
+  void produce(edm::StreamID, edm::Event&, edm::EventSetup const&) const override;
+
+  static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
+
+private:
+
+  // one entry per electron of src
+  struct Columns {
+    explicit Columns(size_t n):
+      hasRegressionVars(n, 0), e3x3(n, -999.), eSubClusters(n, -999),
+      iEtaOrX(n, -999), iPhiOrY(n, -999), iEtaMod5(n, -999), iPhiMod2(n, -999), iEtaMod20(n, -999), iPhiMod20(n, -999),
+      etaCrySeed(n, -999), phiCrySeed(n, -999),
+      subClusterEnergy(3, std::vector<float>(n, -999.)), subClusterEta(3, std::vector<float>(n, -999.)),
+      subClusterPhi(3, std::vector<float>(n, -999.)), subClusterEmax(3, std::vector<float>(n, -999.)),
+      subClusterE3x3(3, std::vector<float>(n, -999.)),
+      clusterMaxDR(n, -999.), clusterMaxDRDPhi(n, -999.), clusterMaxDRDEta(n, -999.), clusterMaxDRRawEnergy(n, -999.),
+      nPreshowerClusters(n, -999), eESClusters(n, -999.),
+      esClusterEnergy(3, std::vector<float>(n, -999.)), esClusterEta(3, std::vector<float>(n, -999.)),
+      esClusterPhi(3, std::vector<float>(n, -999.)) {}
+
+    std::vector<uint8_t> hasRegressionVars;
+    std::vector<float> e3x3;
+    std::vector<int> eSubClusters; // an int column, as it was in the electron table
+    std::vector<int> iEtaOrX, iPhiOrY, iEtaMod5, iPhiMod2, iEtaMod20, iPhiMod20;
+    std::vector<int> etaCrySeed, phiCrySeed;
+    std::vector<std::vector<float>> subClusterEnergy, subClusterEta, subClusterPhi, subClusterEmax, subClusterE3x3;
+    std::vector<float> clusterMaxDR, clusterMaxDRDPhi, clusterMaxDRDEta, clusterMaxDRRawEnergy;
+    std::vector<int> nPreshowerClusters;
+    std::vector<float> eESClusters;
+    std::vector<std::vector<float>> esClusterEnergy, esClusterEta, esClusterPhi;
+  };
+
+  void fill(const pat::Electron& ele, size_t iele, const EcalRecHitCollection& recHitsEB, const EcalRecHitCollection& recHitsEE,
+            const CaloTopology& topology, const CaloGeometry& geometry, Columns& columns) const;
+
+  const std::string name_;
+  const edm::EDGetTokenT<pat::ElectronCollection> src_;
+  const edm::EDGetTokenT<pat::CompositeCandidateCollection> pairs_;
+  const edm::EDGetTokenT<EcalRecHitCollection> ecalRecHitsEB_;
+  const edm::EDGetTokenT<EcalRecHitCollection> ecalRecHitsEE_;
+  const edm::ESGetToken<CaloTopology, CaloTopologyRecord> ecalTopologyToken_;
+  const edm::ESGetToken<CaloGeometry, CaloGeometryRecord> caloGeometryToken_;
+};
+
+
+void ElectronRegressionVarsTableProducer::fill(const pat::Electron& ele, size_t iele,
+                                               const EcalRecHitCollection& recHitsEB, const EcalRecHitCollection& recHitsEE,
+                                               const CaloTopology& topology, const CaloGeometry& geometry, Columns& columns) const {
+  bool isEB = ele.seed()->seed().subdetId() == EcalBarrel;
+  columns.hasRegressionVars[iele] = 1;
+
+  // Define ShowerClusterHelper to retrieve variables of interest
+  SuperClusterHelper scHelper(&ele, isEB ? &recHitsEB : &recHitsEE, &topology, &geometry);
+
+  // SHOWER SHAPE VARIABLES
+  columns.e3x3[iele] = scHelper.e3x3();
+
+  // SEED ETA/PHI INDEX
+  // code from https://github.com/cms-egamma/SHarper-UserCode/blob/31c0e6a5df7e477436b6951f843945ee35ca5b84/TrigNtup/src/EGRegTreeStruct.cc
+  if(isEB){
+    EBDetId ebDetId(ele.superCluster()->seed()->seed());
+    columns.iEtaOrX[iele] = ebDetId.ieta();
+    columns.iPhiOrY[iele] = ebDetId.iphi();
+
+    const int iEtaCorr = ebDetId.ieta() - (ebDetId.ieta() > 0 ? +1 : -1);
+    const int iEtaCorr26 = ebDetId.ieta() - (ebDetId.ieta() > 0 ? +26 : -26);
+    columns.iEtaMod5[iele] = iEtaCorr % 5;
+    columns.iEtaMod20[iele] = std::abs(ebDetId.ieta()) <= 25 ? iEtaCorr % 20 : iEtaCorr26 % 20;
+    columns.iPhiMod2[iele] = (ebDetId.iphi() - 1) % 2;
+    columns.iPhiMod20[iele] = (ebDetId.iphi() - 1) % 20;
+  } else {
+    EEDetId eeDetId(ele.superCluster()->seed()->seed());
+    columns.iEtaOrX[iele] = eeDetId.ix();
+    columns.iPhiOrY[iele] = eeDetId.iy();
+  }
+
+  columns.etaCrySeed[iele] = scHelper.etaCrySeed();
+  columns.phiCrySeed[iele] = scHelper.phiCrySeed();
+
+  // SUBCLUSTERS
+  columns.eSubClusters[iele] = scHelper.eSubClusters();
+  for(int i = 1; i < 4; i++){
+    columns.subClusterEnergy[i-1][iele] = scHelper.subClusterEnergy(i);
+    columns.subClusterEta[i-1][iele] = scHelper.subClusterEta(i);
+    columns.subClusterPhi[i-1][iele] = scHelper.subClusterPhi(i);
+    columns.subClusterEmax[i-1][iele] = scHelper.subClusterEmax(i);
+    columns.subClusterE3x3[i-1][iele] = scHelper.subClusterE3x3(i);
+  }
+
+  columns.eESClusters[iele] = scHelper.eESClusters();
+  columns.nPreshowerClusters[iele] = scHelper.nPreshowerClusters();
+  for(int i = 0; i < 3; i++){
+    columns.esClusterEnergy[i][iele] = scHelper.esClusterEnergy(i);
+    columns.esClusterEta[i][iele] = scHelper.esClusterEta(i);
+    columns.esClusterPhi[i][iele] = scHelper.esClusterPhi(i);
+  }
+
+  // code adapted from https://github.com/cms-egamma/SHarper-UserCode/blob/31c0e6a5df7e477436b6951f843945ee35ca5b84/TrigNtup/src/EGRegTreeStruct.cc#L222
+  float maxDR2 = 0;
+  float seedEta = ele.superCluster()->seed()->eta(), seedPhi = ele.superCluster()->seed()->phi();
+  if(ele.superCluster()->clusters().isNonnull() && ele.superCluster()->clusters().isAvailable()){
+    for(auto& clus : ele.superCluster()->clusters()){
+      if(clus == ele.superCluster()->seed()) continue;
+      float dR2 = reco::deltaR2(seedEta, seedPhi, clus->eta(), clus->phi());
+      if(dR2 > maxDR2){
+        maxDR2 = dR2;
+        columns.clusterMaxDR[iele] = std::sqrt(dR2);
+        columns.clusterMaxDRDPhi[iele] = reco::deltaPhi(clus->phi(),seedPhi);
+        columns.clusterMaxDRDEta[iele] = clus->eta()-seedEta;
+        columns.clusterMaxDRRawEnergy[iele] = clus->energy();
+      }
+    }
+  }
+}
+
+
+void ElectronRegressionVarsTableProducer::produce(edm::StreamID, edm::Event &evt, edm::EventSetup const &iSetup) const {
+  const auto electrons = evt.getHandle(src_);
+  const auto& pairs = evt.get(pairs_);
+
+  // electrons of the surviving pairs
+  std::vector<bool> used(electrons->size(), false);
+  bool any = false;
+  for(const auto& pair : pairs){
+    for(const std::string lep : {"l1", "l2"}){
+      const reco::CandidatePtr ptr = pair.userCand(lep);
+      if(ptr.id() != electrons.id())
+        throw cms::Exception("Configuration") << "ElectronRegressionVarsTableProducer: the pairs are not built from "
+                                              << "src, the table would not extend the electron table";
+      used[ptr.key()] = true;
+      any = true;
+    }
+  }
+
+  Columns columns(electrons->size());
+  if(any){
+    const auto& recHitsEB = evt.get(ecalRecHitsEB_);
+    const auto& recHitsEE = evt.get(ecalRecHitsEE_);
+    const auto& topology = iSetup.getData(ecalTopologyToken_);
+    const auto& geometry = iSetup.getData(caloGeometryToken_);
+    for(size_t iele = 0; iele < electrons->size(); ++iele){
+      if(used[iele]) fill((*electrons)[iele], iele, recHitsEB, recHitsEE, topology, geometry, columns);
+    }
+  }
+
+  auto tab = std::make_unique<nanoaod::FlatTable>(electrons->size(), name_, false, true);
+  tab->addColumn<uint8_t>("hasRegressionVars", columns.hasRegressionVars, "regression variables computed (electron used by a DiElectron pair), -999 otherwise");
+  tab->addColumn<float>("e3x3", columns.e3x3, "e3x3 of the supercluster, calculated with full 5x5 region", 10);
+  tab->addColumn<int>("iEtaOrX", columns.iEtaOrX, "ieta of the supercluster seed");
+  tab->addColumn<int>("iPhiOrY", columns.iPhiOrY, "iphi of the supercluster seed");
+  tab->addColumn<int>("iEtaMod5", columns.iEtaMod5, "ieta of the supercluster seed mod 5");
+  tab->addColumn<int>("iPhiMod2", columns.iPhiMod2, "iphi of the supercluster seed mod 2");
+  tab->addColumn<int>("iEtaMod20", columns.iEtaMod20, "ieta of the supercluster seed mod 20");
+  tab->addColumn<int>("iPhiMod20", columns.iPhiMod20, "iphi of the supercluster seed mod 20");
+  tab->addColumn<int>("etaCrySeed", columns.etaCrySeed, "eta of seed in crystal indices");
+  tab->addColumn<int>("phiCrySeed", columns.phiCrySeed, "phi of seed in crystal indices");
+  tab->addColumn<int>("eSubClusters", columns.eSubClusters, "number of subclusters in the supercluster");
+  const char* ordinals[3] = {"first", "second", "third"};
+  for(int i = 0; i < 3; i++){
+    const std::string n = std::to_string(i+1);
+    const std::string which = std::string(" of the ") + ordinals[i] + " subcluster (excluding seed)";
+    tab->addColumn<float>("subClusterEnergy"+n, columns.subClusterEnergy[i], "energy"+which, 10);
+    tab->addColumn<float>("subClusterEta"+n, columns.subClusterEta[i], "eta"+which, 10);
+    tab->addColumn<float>("subClusterPhi"+n, columns.subClusterPhi[i], "phi"+which, 10);
+    tab->addColumn<float>("subClusterEmax"+n, columns.subClusterEmax[i], "Emax"+which, 10);
+    tab->addColumn<float>("subClusterE3x3_"+n, columns.subClusterE3x3[i], "E3x3"+which, 10);
+  }
+  tab->addColumn<float>("clusterMaxDR", columns.clusterMaxDR, "maximum dR of subclusters wrt seed");
+  tab->addColumn<float>("clusterMaxDRDPhi", columns.clusterMaxDRDPhi, "dphi of subcluster with maximum dR wrt seed");
+  tab->addColumn<float>("clusterMaxDRDEta", columns.clusterMaxDRDEta, "deta of subcluster with maximum dR wrt seed");
+  tab->addColumn<float>("clusterMaxDRRawEnergy", columns.clusterMaxDRRawEnergy, "raw energy of subcluster with maximum dR wrt seed");
+  tab->addColumn<int>("nPreshowerClusters", columns.nPreshowerClusters, "number of preshower clusters in the supercluster");
+  tab->addColumn<float>("eESClusters", columns.eESClusters, "energy of the first preshower cluster", 10);
+  for(int i = 0; i < 3; i++){
+    const std::string n = std::to_string(i);
+    const std::string which = std::string(" of the ") + ordinals[i] + " preshower cluster";
+    tab->addColumn<float>("esClusterEnergy"+n, columns.esClusterEnergy[i], "energy"+which, 10);
+    tab->addColumn<float>("esClusterEta"+n, columns.esClusterEta[i], "eta"+which, 10);
+    tab->addColumn<float>("esClusterPhi"+n, columns.esClusterPhi[i], "phi"+which, 10);
+  }
+  evt.put(std::move(tab));
+}
+
+
+//define this as a plug-in
+DEFINE_FWK_MODULE(ElectronRegressionVarsTableProducer);
@@ -0,0 +1,135 @@
+// Matches the PF and the low-pT electrons to the unpacked trigger objects in one
+// go, with the same criteria as PATTriggerMatcherDRDPtLessByR (deltaR and pT
+// difference relative to the trigger object pT, best match by deltaR). The trigger objects passing
+// matchedCuts are indexed once in eta-phi and both flavours are matched
+// independently against them.
+// Instead of embedding the match in a copy of the electrons, the index of the
+// matched trigger object (-1 if none) is stored for each electron, in the order
+// of the input collections: "pf" and "lowpt" products.
+
+#include <algorithm>
+#include <cmath>
+#include <memory>
+#include <vector>
+
+#include "FWCore/Framework/interface/Frameworkfwd.h"
+#include "FWCore/Framework/interface/global/EDProducer.h"
+#include "FWCore/Framework/interface/Event.h"
+#include "FWCore/Framework/interface/MakerMacros.h"
+#include "FWCore/ParameterSet/interface/ParameterSet.h"
+#include "FWCore/ParameterSet/interface/ConfigurationDescriptions.h"
+#include "FWCore/Utilities/interface/InputTag.h"
+
+#include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/PatCandidates/interface/TriggerObjectStandAlone.h"
+#include "DataFormats/Math/interface/deltaR.h"
+#include "CommonTools/Utils/interface/StringCutObjectSelector.h"
+
+#include "EtaPhiGrid.h"
+
+class ElectronTriggerMatcher : public edm::global::EDProducer<> {
+
+public:
+
+  explicit ElectronTriggerMatcher(const edm::ParameterSet &cfg):
+    pfSrc_(consumes<pat::ElectronCollection>(cfg.getParameter<edm::InputTag>("pfSrc"))),
+    lowptSrc_(consumes<pat::ElectronCollection>(cfg.getParameter<edm::InputTag>("lowptSrc"))),
+    matched_(consumes<pat::TriggerObjectStandAloneCollection>(cfg.getParameter<edm::InputTag>("matched"))),
+    matchedCuts_(cfg.getParameter<std::string>("matchedCuts")),
+    maxDeltaR_(cfg.getParameter<double>("maxDeltaR")),
+    maxDPtRel_(cfg.getParameter<double>("maxDPtRel")),
+    resolveAmbiguities_(cfg.getParameter<bool>("resolveAmbiguities")),
+    resolveByMatchQuality_(cfg.getParameter<bool>("resolveByMatchQuality"))
+  {
+    produces<std::vector<int>>("pf");
+    produces<std::vector<int>>("lowpt");
+  }
+
+  ~ElectronTriggerMatcher() override {}
+
+  void produce(edm::StreamID, edm::Event&, edm::EventSetup const&) const override;
+
+  static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
+
+private:
+
+  std::unique_ptr<std::vector<int>> match(const pat::ElectronCollection& electrons,
+                                          const pat::TriggerObjectStandAloneCollection& objects,
+                                          const std::vector<unsigned int>& selected,
+                                          const EtaPhiGrid& grid) const;
+
+  const edm::EDGetTokenT<pat::ElectronCollection> pfSrc_;
+  const edm::EDGetTokenT<pat::ElectronCollection> lowptSrc_;
+  const edm::EDGetTokenT<pat::TriggerObjectStandAloneCollection> matched_;
+  const StringCutObjectSelector<pat::TriggerObjectStandAlone> matchedCuts_;
+  const double maxDeltaR_;
+  const double maxDPtRel_;
+  const bool resolveAmbiguities_;    // only one match per trigger object
+  const bool resolveByMatchQuality_; // best pairs first, otherwise electrons in input order
+};
+
+
+std::unique_ptr<std::vector<int>> ElectronTriggerMatcher::match(const pat::ElectronCollection& electrons,
+                                                                const pat::TriggerObjectStandAloneCollection& objects,
+                                                                const std::vector<unsigned int>& selected,
+                                                                const EtaPhiGrid& grid) const {
+  struct Pair {
+    unsigned int electron;
+    unsigned int object;
+    float dr;
+  };
+
+  // all the (electron, trigger object) pairs within the cuts, by electron then by deltaR
+  std::vector<Pair> pairs;
+  for (unsigned int iele = 0; iele < electrons.size(); ++iele) {
+    const pat::Electron& ele = electrons[iele];
+    size_t first = pairs.size();
+    grid.forEachCandidate(ele.eta(), ele.phi(), maxDeltaR_, [&](unsigned int isel) {
+      const pat::TriggerObjectStandAlone& obj = objects[selected[isel]];
+      float dr = reco::deltaR(ele, obj);
+      if (dr < maxDeltaR_ && std::abs(ele.pt() - obj.pt()) / obj.pt() < maxDPtRel_)
+        pairs.push_back({iele, selected[isel], dr});
+    });
+    // the grid visits cells, not objects, in order: ties in deltaR go to the first object
+    std::sort(pairs.begin() + first, pairs.end(), [](const Pair& a, const Pair& b) {
+      return a.dr < b.dr || (a.dr == b.dr && a.object < b.object);
+    });
+  }
+  if (resolveByMatchQuality_)
+    std::stable_sort(pairs.begin(), pairs.end(), [](const Pair& a, const Pair& b) { return a.dr < b.dr; });
+
+  auto matches = std::make_unique<std::vector<int>>(electrons.size(), -1);
+  std::vector<bool> used(objects.size(), false);
+  for (const Pair& pair : pairs) {
+    if ((*matches)[pair.electron] >= 0) continue;
+    if (resolveAmbiguities_ && used[pair.object]) continue;
+    (*matches)[pair.electron] = pair.object;
+    used[pair.object] = true;
+  }
+  return matches;
+}
+
+
+void ElectronTriggerMatcher::produce(edm::StreamID, edm::Event &evt, edm::EventSetup const &) const {
+  const auto& pf = evt.get(pfSrc_);
+  const auto& lowpt = evt.get(lowptSrc_);
+  const auto& objects = evt.get(matched_);
+
+  // trigger objects passing the selection, evaluated once for both flavours
+  std::vector<unsigned int> selected;
+  std::vector<std::pair<float, float>> etaPhi;
+  for (unsigned int iobj = 0; iobj < objects.size(); ++iobj) {
+    if (!matchedCuts_(objects[iobj])) continue;
+    selected.push_back(iobj);
+    etaPhi.emplace_back(objects[iobj].eta(), objects[iobj].phi());
+  }
+  EtaPhiGrid grid(maxDeltaR_);
+  grid.fill(etaPhi);
+
+  evt.put(match(pf, objects, selected, grid), "pf");
+  evt.put(match(lowpt, objects, selected, grid), "lowpt");
+}
+
+
+//define this as a plug-in
+DEFINE_FWK_MODULE(ElectronTriggerMatcher);
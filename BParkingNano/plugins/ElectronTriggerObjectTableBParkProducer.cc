@@ -1,6 +1,8 @@
 // system include files
+#include <cmath>
 #include <memory>
 #include <sstream>
+#include <unordered_map>
 
 // user include files
 #include "FWCore/Framework/interface/Frameworkfwd.h"
@@ -24,6 +26,8 @@
 #include "DataFormats/Math/interface/deltaR.h"
 #include "DataFormats/NanoAOD/interface/FlatTable.h"
 
+#include "EtaPhiGrid.h"
+
 class ElectronTriggerObjectTableBParkProducer : public edm::stream::EDProducer<> {
     public:
         explicit ElectronTriggerObjectTableBParkProducer(const edm::ParameterSet &iConfig) :
@@ -46,6 +50,12 @@ class ElectronTriggerObjectTableBParkProducer : public edm::stream::EDProducer<>
             idDoc_ = idstr.str();
             bitsDoc_ = qualitystr.str();
 
+            for (const auto & sel : sels_) {
+                l1Index_.emplace_back(sel.l1DR2);
+                l1Index2_.emplace_back(sel.l1DR2_2);
+                l2Index_.emplace_back(sel.l2DR2);
+            }
+
             produces<nanoaod::FlatTable>();
         }
 
@@ -98,8 +108,53 @@ class ElectronTriggerObjectTableBParkProducer : public edm::stream::EDProducer<>
         };
 
         std::vector<SelectedObject> sels_;
+
+        // seeds passing the l1 / l2 cut of a selection, binned in eta-phi;
+        // filled at the first lookup in the event, so each cut is evaluated once per seed
+        struct SeedIndex {
+            bool filled;
+            std::vector<unsigned int> passing;
+            EtaPhiGrid grid;
+
+            explicit SeedIndex(float dr2) :
+                filled(false),
+                grid(dr2 > 0 ? std::sqrt(dr2) : 1.f) {}
+        };
+        std::vector<SeedIndex> l1Index_, l1Index2_, l2Index_; // one per selection
+        std::vector<std::pair<float, float>> etaPhi_;
+
+        // index of the last seed passing cut within dR2 < maxDR2 of obj, -1 if none
+        int matchSeed(SeedIndex & index, const std::vector<pat::TriggerObjectStandAlone> & seeds,
+                      const StringCutObjectSelector<pat::TriggerObjectStandAlone> & cut, float maxDR2,
+                      const pat::TriggerObjectStandAlone & obj);
 };
 
+int
+ElectronTriggerObjectTableBParkProducer::matchSeed(SeedIndex & index, const std::vector<pat::TriggerObjectStandAlone> & seeds,
+                                                   const StringCutObjectSelector<pat::TriggerObjectStandAlone> & cut, float maxDR2,
+                                                   const pat::TriggerObjectStandAlone & obj)
+{
+    if (!index.filled) {
+        index.passing.clear();
+        etaPhi_.clear();
+        for (unsigned int iseed = 0; iseed < seeds.size(); ++iseed) {
+            if (!cut(seeds[iseed])) continue;
+            index.passing.push_back(iseed);
+            etaPhi_.emplace_back(seeds[iseed].eta(), seeds[iseed].phi());
+        }
+        index.grid.fill(etaPhi_);
+        index.filled = true;
+    }
+
+    // the last seed in the collection wins, as in the former linear scan
+    int match = -1;
+    index.grid.forEachCandidate(obj.eta(), obj.phi(), std::sqrt(maxDR2), [&](unsigned int ipass) {
+        int iseed = index.passing[ipass];
+        if (iseed > match && deltaR2(seeds[iseed], obj) < maxDR2) match = iseed;
+    });
+    return match;
+}
+
 // ------------ method called to produce the data  ------------
 void
 ElectronTriggerObjectTableBParkProducer::produce(edm::Event& iEvent, const edm::EventSetup& iSetup) 
@@ -118,79 +173,86 @@ ElectronTriggerObjectTableBParkProducer::produce(edm::Event& iEvent, const edm::
         }
     }
 
-    // Self-cleaning
-    std::map<const pat::TriggerObjectStandAlone *,int> selected_bits;
+    // Self-cleaning: objects of the same id with the same pt and direction are merged
+    // into the first one, keeping the filters of all. They are looked up by pt,
+    // binned at the 1e-6 tolerance so that only the neighbouring bins can match.
+    std::vector<int> selected_bits;
+    std::unordered_map<long long, std::vector<unsigned int>> kept_by_pt;
+    unsigned int nkept = 0;
     for(unsigned int i = 0; i < selected.size(); ++i) {
         const auto & obj = *selected[i].first;
         const auto & sel = *selected[i].second;
-        selected_bits[&obj] = int(sel.qualityBits(obj));
-
-	for(unsigned int j=0; j<i; ++j){
-	  const auto & obj2 = *selected[j].first;
-	  const auto & sel2 = *selected[j].second;
-	  if(sel.id==sel2.id && abs(obj.pt()-obj2.pt())<1e-6 && deltaR2(obj,obj2)<1e-6){
-	    selected_bits[&obj2] |= selected_bits[&obj]; //Keep filters from all the objects
-	    selected.erase(selected.begin()+i);
-	    i--;
-	  }
-	}
+        int obj_bits = int(sel.qualityBits(obj));
+        long long ptbin = std::llround(std::floor(obj.pt() * 1e6));
+
+        bool duplicate = false;
+        for (long long bin = ptbin - 1; bin <= ptbin + 1; ++bin) {
+            auto kept = kept_by_pt.find(bin);
+            if (kept == kept_by_pt.end()) continue;
+            for (unsigned int j : kept->second) {
+                const auto & obj2 = *selected[j].first;
+                const auto & sel2 = *selected[j].second;
+                if(sel.id==sel2.id && abs(obj.pt()-obj2.pt())<1e-6 && deltaR2(obj,obj2)<1e-6){
+                    selected_bits[j] |= obj_bits; //Keep filters from all the objects
+                    duplicate = true;
+                }
+            }
+        }
+        if (duplicate) continue;
+        // kept objects are moved to the front, in their original order
+        selected[nkept] = selected[i];
+        selected_bits.push_back(obj_bits);
+        kept_by_pt[ptbin].push_back(nkept);
+        ++nkept;
     }
+    selected.resize(nkept);
 
     edm::Handle<l1t::EGammaBxCollection> l1EGamma;
     iEvent.getByToken(l1EGamma_, l1EGamma);
     
-    std::vector<pair<pat::TriggerObjectStandAlone,int>> l1Objects;
-
+    std::vector<pat::TriggerObjectStandAlone> l1Objects;
+    std::vector<int> l1Isos;
 
     for(l1t::EGammaBxCollection::const_iterator it=l1EGamma->begin(0); it!=l1EGamma->end(0); it++){
       pat::TriggerObjectStandAlone l1obj(it->p4());
       l1obj.setCollection("L1NoIsoEG");
       l1obj.addTriggerObjectType(trigger::TriggerL1NoIsoEG); //see https://github.com/cms-sw/cmssw/blob/b53a38080341c1b62b3fd83aa13c36a9ba145562/HLTriggerOffline/Egamma/python/TriggerTypeDefs_cfi.py#L15
       l1obj.setCharge(it->charge());
-      l1Objects.emplace_back(l1obj,it->hwIso());
+      l1Objects.push_back(l1obj);
+      l1Isos.push_back(it->hwIso());
     }
 
+    for (auto & index : l1Index_) index.filled = false;
+    for (auto & index : l1Index2_) index.filled = false;
+    for (auto & index : l2Index_) index.filled = false;
+
     unsigned int nobj = selected.size();
     std::vector<float> pt(nobj,0), eta(nobj,0), phi(nobj,0), l1pt(nobj, 0), l1pt_2(nobj, 0), l2pt(nobj, 0);
     std::vector<int>   id(nobj,0), bits(nobj, 0), l1iso(nobj, 0), l1charge(nobj,0);
     for (unsigned int i = 0; i < nobj; ++i) {
         const auto & obj = *selected[i].first;
         const auto & sel = *selected[i].second;
+        unsigned int isel = &sel - &sels_.front();
         pt[i] = obj.pt(); 
         eta[i] = obj.eta(); 
         phi[i] = obj.phi(); 
         id[i] = sel.id;
-        bits[i] = selected_bits[&obj];
+        bits[i] = selected_bits[i];
         if (sel.l1DR2 > 0) {   
-            float best = sel.l1DR2;
-            for (const auto & l1obj : l1Objects) {
-	        const auto & seed = l1obj.first;
-                float dr2 = deltaR2(seed, obj);
-                if (dr2 < best && sel.l1cut(seed)) {
-                    l1pt[i] = seed.pt();
-                    l1iso[i] = l1obj.second;
-                    l1charge[i] = seed.charge();
-                }
+            int iseed = matchSeed(l1Index_[isel], l1Objects, sel.l1cut, sel.l1DR2, obj);
+            if (iseed >= 0) {
+                l1pt[i] = l1Objects[iseed].pt();
+                l1iso[i] = l1Isos[iseed];
+                l1charge[i] = l1Objects[iseed].charge();
             }
         }
         if (sel.l1DR2_2 > 0) {   
-            float best = sel.l1DR2_2;
-            for (const auto & l1obj : l1Objects) {
-	        const auto & seed = l1obj.first;
-                float dr2 = deltaR2(seed, obj);
-                if (dr2 < best && sel.l1cut_2(seed)) {
-                    l1pt_2[i] = seed.pt();
-                }
-            }
+            int iseed = matchSeed(l1Index2_[isel], l1Objects, sel.l1cut_2, sel.l1DR2_2, obj);
+            if (iseed >= 0) l1pt_2[i] = l1Objects[iseed].pt();
         }
         if (sel.l2DR2 > 0) {
-            float best = sel.l2DR2;
-            for (const auto & seed : *src) {
-                float dr2 = deltaR2(seed, obj);
-                if (dr2 < best && sel.l2cut(seed)) {
-                    l2pt[i] = seed.pt();
-                }
-            }
+            int iseed = matchSeed(l2Index_[isel], *src, sel.l2cut, sel.l2DR2, obj);
+            if (iseed >= 0) l2pt[i] = (*src)[iseed].pt();
         }
     }
 
@@ -11,6 +11,8 @@
 #include "FWCore/Utilities/interface/StreamID.h"
 #include "FWCore/Framework/interface/EventSetup.h"
 #include "FWCore/Framework/interface/ESHandle.h"
+#include "FWCore/Framework/interface/Run.h"
+#include "FWCore/Utilities/interface/Exception.h"
 
 #include "DataFormats/VertexReco/interface/Vertex.h"
 #include "DataFormats/VertexReco/interface/VertexFwd.h"
@@ -29,11 +31,17 @@
 #include "MagneticField/Records/interface/IdealMagneticFieldRecord.h"
 
 #include <TLorentzVector.h>
+#include <algorithm>
+#include <bitset>
+#include <unordered_map>
 #include "helper.h"
 
 using namespace std;
 
 constexpr int debug = 0;
+// maximum number of HLT paths / L1 seeds, one bit each in the trigger object masks
+constexpr size_t maxTriggers = 64;
+typedef std::bitset<maxTriggers> TriggerMask;
 
 class ElectronTriggerSelector : public edm::stream::EDProducer<> {
     
@@ -47,6 +55,11 @@ public:
 private:
 
     virtual void produce(edm::Event&, const edm::EventSetup&);
+    void beginRun(edm::Run const&, edm::EventSetup const&) override;
+    // bits of the patterns (HLTPaths_ / L1Seeds_, matched as "<pattern>*") that any of names matches
+    TriggerMask triggerMask(const std::vector<std::string>& names,
+                            const std::vector<std::string>& patterns,
+                            std::unordered_map<std::string, TriggerMask>& cache) const;
     void print(edm::Event&,
 	       edm::Handle<edm::TriggerResults>&,
 	       edm::Handle<std::vector<pat::TriggerObjectStandAlone>>&);
@@ -55,6 +68,9 @@ private:
     edm::EDGetTokenT<std::vector<pat::Electron>> electronSrc_;
     edm::EDGetTokenT<edm::TriggerResults> triggerBits_;
     edm::EDGetTokenT<std::vector<pat::TriggerObjectStandAlone>> triggerObjects_;
+    // trigger objects and index of the one matched to each electron (-1 if none)
+    edm::EDGetTokenT<std::vector<pat::TriggerObjectStandAlone>> matchedObjects_;
+    edm::EDGetTokenT<std::vector<int>> matches_;
     edm::EDGetTokenT<pat::PackedTriggerPrescales> triggerPrescales_;
     edm::EDGetTokenT<reco::VertexCollection> vertexSrc_;
     //for trigger match
@@ -68,6 +84,11 @@ private:
     const double absEtaMax_;      //max eta ""
     std::vector<std::string> HLTPaths_;
     std::vector<std::string> L1Seeds_;
+    // one "firedPaths" userInt (bit i = HLTPaths_[i]) instead of one userInt per path
+    const bool packBits_;
+    // pattern bits of each trigger path / algorithm name, rebuilt every run
+    std::unordered_map<std::string, TriggerMask> pathMasks_;
+    std::unordered_map<std::string, TriggerMask> seedMasks_;
 };
 
 
@@ -76,6 +97,8 @@ ElectronTriggerSelector::ElectronTriggerSelector(const edm::ParameterSet &iConfi
   electronSrc_( consumes<std::vector<pat::Electron>> ( iConfig.getParameter<edm::InputTag>( "electronCollection" ) ) ),
   triggerBits_(consumes<edm::TriggerResults>(iConfig.getParameter<edm::InputTag>("bits"))),
   triggerObjects_(consumes<std::vector<pat::TriggerObjectStandAlone>>(iConfig.getParameter<edm::InputTag>("objects"))),
+  matchedObjects_(consumes<std::vector<pat::TriggerObjectStandAlone>>(iConfig.getParameter<edm::InputTag>("matchedObjects"))),
+  matches_(consumes<std::vector<int>>(iConfig.getParameter<edm::InputTag>("matches"))),
   triggerPrescales_(consumes<pat::PackedTriggerPrescales>(iConfig.getParameter<edm::InputTag>("prescales"))),
   vertexSrc_( consumes<reco::VertexCollection> ( iConfig.getParameter<edm::InputTag>( "vertexCollection" ) ) ), 
   maxdR_(iConfig.getParameter<double>("maxdR_matching")),
@@ -84,12 +107,43 @@ ElectronTriggerSelector::ElectronTriggerSelector(const edm::ParameterSet &iConfi
   ptMin_(iConfig.getParameter<double>("ptMin")),
   absEtaMax_(iConfig.getParameter<double>("absEtaMax")), 
   HLTPaths_(iConfig.getParameter<std::vector<std::string>>("HLTPaths")),
-  L1Seeds_(iConfig.getParameter<std::vector<std::string>>("L1seeds"))
+  L1Seeds_(iConfig.getParameter<std::vector<std::string>>("L1seeds")),
+  packBits_(iConfig.getParameter<bool>("packBits"))
 {
   // produce 2 collections: trgElectrons (tags) and SelectedElectrons (probes & tags if survive preselection cuts)
     produces<pat::ElectronCollection>("trgElectrons"); 
     produces<pat::ElectronCollection>("SelectedElectrons");
     produces<TransientTrackCollection>("SelectedTransientElectrons");  
+    if (HLTPaths_.size() > maxTriggers || L1Seeds_.size() > maxTriggers)
+      throw cms::Exception("Configuration") << "ElectronTriggerSelector supports at most "
+                                            << maxTriggers << " HLT paths and " << maxTriggers << " L1 seeds";
+    if (packBits_ && HLTPaths_.size() > 32)
+      throw cms::Exception("Configuration") << "ElectronTriggerSelector packs at most 32 HLT paths in the firedPaths userInt";
+}
+
+
+void ElectronTriggerSelector::beginRun(edm::Run const&, edm::EventSetup const&) {
+  pathMasks_.clear();
+  seedMasks_.clear();
+}
+
+
+TriggerMask ElectronTriggerSelector::triggerMask(const std::vector<std::string>& names,
+                                                 const std::vector<std::string>& patterns,
+                                                 std::unordered_map<std::string, TriggerMask>& cache) const {
+  TriggerMask mask;
+  for (const std::string& name: names) {
+    auto cached = cache.find(name);
+    if (cached == cache.end()) {
+      // same as the "<pattern>*" wildcard of hasPathName / hasAlgorithmName: name starts with pattern
+      TriggerMask bits;
+      for (size_t i = 0; i < patterns.size(); ++i)
+        if (name.compare(0, patterns[i].size(), patterns[i]) == 0) bits.set(i);
+      cached = cache.emplace(name, bits).first;
+    }
+    mask |= cached->second;
+  }
+  return mask;
 }
 
 
@@ -196,6 +250,14 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
     //now check for reco electrons matched to triggering electrons
     edm::Handle<std::vector<pat::Electron>> electrons;
     iEvent.getByToken(electronSrc_, electrons);
+    edm::Handle<std::vector<pat::TriggerObjectStandAlone>> matchedObjects;
+    iEvent.getByToken(matchedObjects_, matchedObjects);
+    edm::Handle<std::vector<int>> matches;
+    iEvent.getByToken(matches_, matches);
+    if(matches->size()!=electrons->size())
+      throw cms::Exception("Configuration") << "ElectronTriggerSelector: " << matches->size()
+                                            << " trigger matches for " << electrons->size()
+                                            << " electrons, the matcher must run on electronCollection";
 
     std::vector<int> electronIsTrigger(electrons->size(), 0);
     std::vector<float> electronDR(electrons->size(),-1.);
@@ -214,7 +276,7 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
     int nele = 0;
     int mele = 0;
     for(const pat::Electron & electron : *electrons){
-      //unsigned int iEle(&electron - &(electrons->at(0)) );
+        unsigned int iEle(&electron - &(electrons->at(0)) );
         if(electron.pt()<ptMin_) continue;
         if(fabs(electron.eta())>absEtaMax_) continue;
 	if(debug>1)
@@ -224,7 +286,7 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
 		    << " phi=" << electron.phi()
 		    << std::endl;
 	nele++;
-	if(electron.triggerObjectMatches().empty()) continue;
+	if((*matches)[iEle]<0) continue;
 	mele++;
     }
 
@@ -240,113 +302,48 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
 		<< std::endl;
 
     for(const pat::Electron &electron : *electrons){
+        unsigned int iEle(&electron - &(electrons->at(0)));
         if(debug>1)
 	  std::cout << "Electron Pt=" << electron.pt() 
 		    << " Eta=" << electron.eta() 
 		    << " Phi=" << electron.phi()
-		    << " NtriggerObjectMatches=" << electron.triggerObjectMatches().size()
+		    << " triggerMatch=" << (*matches)[iEle]
 		    << std::endl;
         std::vector<int> frs(HLTPaths_.size(),0); //path fires for each reco electron
         std::vector<int> sds(L1Seeds_.size(),0);// L1 Seeds for each L1 electron
         std::vector<float> temp_matched_to(HLTPaths_.size(),1000.);
         std::vector<float> temp_DR(HLTPaths_.size(),1000.);
         std::vector<float> temp_DPT(HLTPaths_.size(),1000.);
-        int ipath=-1;
-        int iseed=-1;
-
-        for (const std::string& seed: L1Seeds_){
-	  iseed++;
-	  char cstr[(seed+"*").size()+1];
-	  strcpy( cstr,(seed+"*").c_str());
-	  if(electron.triggerObjectMatches().size()!=0){
-	    for(size_t i=0;i<electron.triggerObjectMatches().size(); i++){
-	      if(debug>1) {
-          std::cout << "  iMatch=" << i << " PathNames=";
-          for(auto const & name : electron.triggerObjectMatch(i)->pathNames()){
-            std::cout << " " << name;
-          }
-          std::cout << " AlgoNames=";
-          for(auto const & name : electron.triggerObjectMatch(i)->algorithmNames()){
-            std::cout << " " << name;
+
+        // trigger object matched to this electron by myElectronTriggerMatches, if any
+        const int imatch=(*matches)[iEle];
+        const pat::TriggerObjectStandAlone* obj = imatch>=0 ? &(*matchedObjects)[imatch] : nullptr;
+        // paths with the object in their L3 filter (hasPathName(path*, false, true)) and
+        // seeds with the object in an accepted condition (hasAlgorithmName(seed*, true))
+        TriggerMask paths, seeds;
+        if(obj!=0){
+          paths = triggerMask(obj->pathNames(false,true), HLTPaths_, pathMasks_);
+          seeds = triggerMask(obj->algorithmNames(true), L1Seeds_, seedMasks_);
+          for(size_t iseed=0; iseed<L1Seeds_.size(); iseed++) if(seeds[iseed]) sds[iseed]=1;
+          if(debug>1)
+            std::cout << "  iMatch=" << imatch << " paths=" << paths << " seeds=" << seeds << std::endl;
+        }
+        if(paths.any()){
+          // the following vectors are used in order to find the minimum DR between a reco electron and all the HLT objects that is matched with it so as a reco electron will be matched with only one HLT object every time so as there is a one-to-one correspondance between the two collection. DPt_rel is not used to create this one-to-one correspondance but only to create a few plots, debugging and be sure thateverything is working fine.
+          // RB: deltaR match determined for trigger (eta,phi) and electron SuperCluster (eta,phi) positions ...
+          float dr=TMath::Sqrt(pow(obj->eta()-electron.superCluster()->eta(),2.)+
+                               pow(obj->phi()-electron.superCluster()->phi(),2.));
+          float dpt=(obj->pt()-electron.pt())/obj->pt();
+          if(debug>1)std::cout <<" HLT  Pt="<<obj->pt() <<" Eta="<<obj->eta() <<" Phi="<<obj->phi() <<" DR = " << dr << endl;
+          // the matcher resolves ambiguities: one object per electron, it gives the minimum DR
+          for(size_t ipath=0; ipath<HLTPaths_.size(); ipath++){
+            if(!paths[ipath]) continue;
+            frs[ipath]=1;
+            temp_DR[ipath]=dr;
+            temp_DPT[ipath]=dpt;
+            temp_matched_to[ipath]=obj->pt();
           }
-          std::cout << std::endl;
-	      }
-	      if(electron.triggerObjectMatch(i)!=0 && electron.triggerObjectMatch(i)->hasAlgorithmName(cstr,true)){
-		sds[iseed]=1;
-		if(debug>1)
-		  std::cout << "  L1 Seed=" << cstr
-			    << " fired=" << sds[iseed]
-			    << std::endl;
-	      }
-	    }
-	  }
         }
-
-        for (const std::string& path: HLTPaths_){
-            ipath++;
-            // the following vectors are used in order to find the minimum DR between a reco electron and all the HLT objects that is matched with it so as a reco electron will be matched with only one HLT object every time so as there is a one-to-one correspondance between the two collection. DPt_rel is not used to create this one-to-one correspondance but only to create a few plots, debugging and be sure thateverything is working fine.
-	    // RB: deltaR match determined for trigger (eta,phi) and electron SuperCluster (eta,phi) positions ...
-            std::vector<float> temp_dr(electron.triggerObjectMatches().size(),1000.);
-            std::vector<float> temp_dpt(electron.triggerObjectMatches().size(),1000.);
-            std::vector<float> temp_pt(electron.triggerObjectMatches().size(),1000.);
-            char cstr[ (path+"*").size() + 1];
-	    strcpy( cstr, (path+"*").c_str() );       
-	    if(debug>1) 
-	      std::cout << "  HLT path=" << cstr << endl;
-            //Here we find all the HLT objects from each HLT path each time that are matched with the reco electron.
-            if(electron.triggerObjectMatches().size()!=0){
-                for(size_t i=0; i<electron.triggerObjectMatches().size();i++){
-//                if(electron.triggerObjectMatch(i)!=0 && electron.triggerObjectMatch(i)->hasAlgorithm)
-		  if(debug>1) {
-		    if (electron.triggerObjectMatch(i)!=0) {
-		      std::cout << "  iMatch=" << i << " PathNames=";
-		      for(auto const & name : electron.triggerObjectMatch(i)->pathNames()){
-			std::cout << " " << name;
-		      }
-		      std::cout << " AlgoNames=";
-		      for(auto const & name : electron.triggerObjectMatch(i)->algorithmNames()){
-			std::cout << " " << name;
-		      }
-		      std::cout << std::endl;
-		    }
-		  }
-		  if(debug>1) {
-		    if(electron.triggerObjectMatch(i)!=0 ) {
-		      std::cout << "HERE0 "
-				<< cstr << " "
-				<< electron.triggerObjectMatch(i)->hasPathName(cstr,false,false) << " "
-				<< electron.triggerObjectMatch(i)->hasPathName(cstr,false,true) << " "
-				<< electron.triggerObjectMatch(i)->hasPathName(cstr,true,false) << " "
-				<< electron.triggerObjectMatch(i)->hasPathName(cstr,true,true) << " "
-				<< electron.triggerObjectMatch(i)->hasPathLastFilterAccepted() << " "
-				<< electron.triggerObjectMatch(i)->hasPathL3FilterAccepted() << " "
-				<< std::endl;
-		    }
-		  }
-		    if(electron.triggerObjectMatch(i)!=0 && electron.triggerObjectMatch(i)->hasPathName(cstr,false,true)){
-		      //if(abs(electron.triggerObjectMatch(i)->eta())>1.5) std::cout << "HEEEEEEEEEEEEEEEEEEREEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEE eta=" <<electron.triggerObjectMatch(i)->eta();
-		        if(debug>1) std::cout << "HERE1" << std::endl;
-                        frs[ipath]=1;
-			// RB: deltaR match determined for trigger (eta,phi) and electron SuperCluster (eta,phi) positions ...
-                        float dr=TMath::Sqrt(pow(electron.triggerObjectMatch(i)->eta()-electron.superCluster()->eta(),2.)+
-					     pow(electron.triggerObjectMatch(i)->phi()-electron.superCluster()->phi(),2.));
-                        float dpt=(electron.triggerObjectMatch(i)->pt()-electron.pt())/electron.triggerObjectMatch(i)->pt();
-                        temp_dr[i]=dr;
-                        temp_dpt[i]=dpt;
-                        temp_pt[i]=electron.triggerObjectMatch(i)->pt();                   
-                        //if(debug>1)std::cout <<" Path=" <<cstr << endl;
-                        if(debug>1)std::cout <<" HLT  Pt="<<electron.triggerObjectMatch(i)->pt() <<" Eta="<<electron.triggerObjectMatch(i)->eta() <<" Phi="<<electron.triggerObjectMatch(i)->phi() << endl;
-                        if(debug>1)std::cout <<" Electron Pt="<< electron.pt() << " Eta=" << electron.eta() << " Phi=" << electron.phi()  <<endl;
-                        if(debug>1)std::cout <<" DR = " << temp_dr[i] <<endl;
-                    }
-                }
-                // and now we find the real minimum between the reco electron and all its matched HLT objects. 
-                temp_DR[ipath]=*min_element(temp_dr.begin(),temp_dr.end());
-                int position=std::min_element(temp_dr.begin(),temp_dr.end()) - temp_dr.begin();
-                temp_DPT[ipath]=temp_dpt[position];
-                temp_matched_to[ipath]=temp_pt[position];
-                }
-            }
         //and now since we have found the minimum DR we save a few variables for plots       
         fires.push_back(frs);//This is used in order to see if a reco electron fired a Trigger (1) or not (0).
         matcher.push_back(temp_matched_to); //This is used in order to see if a reco electron is matched with a HLT object. PT of the reco electron is saved in this vector. 
@@ -356,9 +353,19 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
     }
 
     //now, check for different reco electrons that are matched to the same HLTObject.
+    //Only the electrons that fired the path can share its HLT object, so the pairs are
+    //taken from the list of those, in the same order as a loop over all the pairs.
+    std::vector<unsigned int> fired;
+    fired.reserve(electrons->size());
     for(unsigned int path=0; path<HLTPaths_.size(); path++){
+        fired.clear();
         for(unsigned int iEle=0; iEle<electrons->size(); iEle++){
-            for(unsigned int ie=(iEle+1); ie<electrons->size(); ie++){
+            if(matcher[iEle][path]!=1000.) fired.push_back(iEle);
+        }
+        for(unsigned int i=0; i<fired.size(); i++){
+            unsigned int iEle=fired[i];
+            for(unsigned int j=(i+1); j<fired.size(); j++){
+                unsigned int ie=fired[j];
                 if(matcher[iEle][path]!=1000. && matcher[iEle][path]==matcher[ie][path]){
                     if(DR[iEle][path]<DR[ie][path]){ //Keep the one that has the minimum DR with the HLT object
                         fires[ie][path]=0;
@@ -383,14 +390,17 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
     }
     if(debug>1)std::cout << "number of Electrons=" <<electrons->size() << endl;
 
-    //And now create a collection with all trg electrons
+    //And now create a collection with all trg electrons, and the sorted vz of them for the dz cleaning
+    std::vector<double> trgVz;
     for(const pat::Electron & electron : *electrons){
         unsigned int iEle(&electron -&(electrons->at(0)));
         if(electronIsTrigger[iEle]==1){
             pat::Electron recoTriggerElectronCand(electron);
             trgelectrons_out->emplace_back(recoTriggerElectronCand);
+            trgVz.push_back(trgelectrons_out->back().vz());
         }
     }
+    std::sort(trgVz.begin(), trgVz.end());
 
     //and now save the reco electron triggering or not 
     for(const pat::Electron & electron : *electrons){
@@ -402,10 +412,13 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
         bool SkipElectron=true;
         if(dzTrg_cleaning_<0) SkipElectron=false;
         if(debug>1 && trgelectrons_out->size()==0) std::cout <<"HERE!! trgelectrons_out->size()==0" << endl;
-        for(const pat::Electron & trgele : *trgelectrons_out){
-            if(fabs(electron.vz()-trgele.vz())> dzTrg_cleaning_ && dzTrg_cleaning_>0) continue;
-            SkipElectron=false;
+        if(dzTrg_cleaning_>0){
+            // only the trigger electrons closest in vz, on either side, can be within dz
+            auto next = std::lower_bound(trgVz.begin(), trgVz.end(), electron.vz());
+            if(next!=trgVz.end() && !(fabs(electron.vz()-*next)> dzTrg_cleaning_)) SkipElectron=false;
+            if(next!=trgVz.begin() && !(fabs(electron.vz()-*(next-1))> dzTrg_cleaning_)) SkipElectron=false;
         }
+        else if(!trgVz.empty()) SkipElectron=false;
         if(filterElectron_ && SkipElectron) continue;
 
         const reco::TransientTrack electronTT((*(electron.bestTrack())),&bField); // need this?
@@ -418,7 +431,14 @@ void ElectronTriggerSelector::produce(edm::Event& iEvent, const edm::EventSetup&
         electrons_out->back().addUserInt("looseId",loose_id[iEle]);
         electrons_out->back().addUserInt("skipElectron",SkipElectron);
 
-        for(unsigned int i=0; i<HLTPaths_.size(); i++){electrons_out->back().addUserInt(HLTPaths_[i],fires[iEle][i]);}
+        if(packBits_){
+          uint32_t firedPaths = 0;
+          for(unsigned int i=0; i<HLTPaths_.size(); i++){if(fires[iEle][i]) firedPaths |= uint32_t(1) << i;}
+          electrons_out->back().addUserInt("firedPaths", int(firedPaths));
+        }
+        else{
+          for(unsigned int i=0; i<HLTPaths_.size(); i++){electrons_out->back().addUserInt(HLTPaths_[i],fires[iEle][i]);}
+        }
         trans_electrons_out->emplace_back(electronTT);
 
 
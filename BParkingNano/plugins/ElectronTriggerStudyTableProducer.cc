@@ -0,0 +1,147 @@
+// Trigger matching study table (mode=trg): for each electron of src and each of
+// the configured HLT paths, the nMatches trigger objects of the path closest in
+// deltaR (within maxDeltaR and maxDPtRel), with their deltaR to the electron and
+// to its supercluster and the pT difference relative to the trigger object pT
+// (as PATTriggerMatcherDRDPtLessByR).
+// One row per (electron, path, rank), pointing to the electron table through
+// electronIdx, instead of embedding all the matches in copies of the electrons.
+
+#include <algorithm>
+#include <cmath>
+#include <memory>
+#include <sstream>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "FWCore/Framework/interface/Frameworkfwd.h"
+#include "FWCore/Framework/interface/global/EDProducer.h"
+#include "FWCore/Framework/interface/Event.h"
+#include "FWCore/Framework/interface/MakerMacros.h"
+#include "FWCore/ParameterSet/interface/ParameterSet.h"
+#include "FWCore/ParameterSet/interface/ConfigurationDescriptions.h"
+#include "FWCore/Utilities/interface/InputTag.h"
+
+#include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/PatCandidates/interface/TriggerObjectStandAlone.h"
+#include "DataFormats/Math/interface/deltaR.h"
+#include "DataFormats/NanoAOD/interface/FlatTable.h"
+
+#include "EtaPhiGrid.h"
+
+class ElectronTriggerStudyTableProducer : public edm::global::EDProducer<> {
+
+public:
+
+  explicit ElectronTriggerStudyTableProducer(const edm::ParameterSet &cfg):
+    name_(cfg.getParameter<std::string>("name")),
+    src_(consumes<pat::ElectronCollection>(cfg.getParameter<edm::InputTag>("src"))),
+    trgObjects_(consumes<pat::TriggerObjectStandAloneCollection>(cfg.getParameter<edm::InputTag>("trgObjects"))),
+    paths_(cfg.getParameter<std::vector<std::string>>("paths")),
+    nMatches_(cfg.getParameter<unsigned int>("nMatches")),
+    maxDeltaR_(cfg.getParameter<double>("maxDeltaR")),
+    maxDPtRel_(cfg.getParameter<double>("maxDPtRel"))
+  {
+    std::stringstream pathDoc;
+    pathDoc << "index of the HLT path: ";
+    for (size_t ipath = 0; ipath < paths_.size(); ++ipath)
+      pathDoc << (ipath ? ", " : "") << ipath << " = " << paths_[ipath];
+    pathDoc_ = pathDoc.str();
+
+    produces<nanoaod::FlatTable>();
+  }
+
+  ~ElectronTriggerStudyTableProducer() override {}
+
+  void produce(edm::StreamID, edm::Event&, edm::EventSetup const&) const override;
+
+  static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
+
+private:
+
+  const std::string name_;
+  const edm::EDGetTokenT<pat::ElectronCollection> src_;
+  const edm::EDGetTokenT<pat::TriggerObjectStandAloneCollection> trgObjects_;
+  const std::vector<std::string> paths_; // matched as "<path>*"
+  const unsigned int nMatches_;          // trigger objects kept per electron and path
+  const double maxDeltaR_;
+  const double maxDPtRel_;
+  std::string pathDoc_;
+};
+
+
+void ElectronTriggerStudyTableProducer::produce(edm::StreamID, edm::Event &evt, edm::EventSetup const &) const {
+  const auto& electrons = evt.get(src_);
+  const auto& objects = evt.get(trgObjects_);
+
+  // paths each trigger object is attached to (last filter and L3 filter accepted,
+  // as path() in the matchedCuts of the trigger matcher); objects of none are not indexed
+  std::vector<std::vector<unsigned int>> objPaths(objects.size());
+  std::vector<unsigned int> indexed;
+  std::vector<std::pair<float, float>> etaPhi;
+  for (unsigned int iobj = 0; iobj < objects.size(); ++iobj) {
+    for (const std::string& name : objects[iobj].pathNames(true, true)) {
+      for (unsigned int ipath = 0; ipath < paths_.size(); ++ipath) {
+        if (name.compare(0, paths_[ipath].size(), paths_[ipath]) == 0 &&
+            std::find(objPaths[iobj].begin(), objPaths[iobj].end(), ipath) == objPaths[iobj].end())
+          objPaths[iobj].push_back(ipath);
+      }
+    }
+    if (objPaths[iobj].empty()) continue;
+    indexed.push_back(iobj);
+    etaPhi.emplace_back(objects[iobj].eta(), objects[iobj].phi());
+  }
+  EtaPhiGrid grid(maxDeltaR_);
+  grid.fill(etaPhi);
+
+  std::vector<int> electronIdx, path, rank;
+  std::vector<float> pt, eta, phi, dr, drSC, dPtRel;
+  std::vector<std::pair<float, unsigned int>> candidates; // (deltaR, trigger object)
+  std::vector<unsigned int> found(paths_.size());
+  for (unsigned int iele = 0; iele < electrons.size(); ++iele) {
+    const pat::Electron& ele = electrons[iele];
+    candidates.clear();
+    grid.forEachCandidate(ele.eta(), ele.phi(), maxDeltaR_, [&](unsigned int iindexed) {
+      const pat::TriggerObjectStandAlone& obj = objects[indexed[iindexed]];
+      float deltaR = reco::deltaR(ele, obj);
+      if (deltaR < maxDeltaR_ && std::abs(ele.pt() - obj.pt()) / obj.pt() < maxDPtRel_)
+        candidates.emplace_back(deltaR, indexed[iindexed]);
+    });
+    std::sort(candidates.begin(), candidates.end());
+
+    // closest first: the first nMatches candidates attached to each path
+    std::fill(found.begin(), found.end(), 0);
+    for (const auto& candidate : candidates) {
+      const pat::TriggerObjectStandAlone& obj = objects[candidate.second];
+      for (unsigned int ipath : objPaths[candidate.second]) {
+        if (found[ipath] >= nMatches_) continue;
+        electronIdx.push_back(iele);
+        path.push_back(ipath);
+        rank.push_back(found[ipath]++);
+        pt.push_back(obj.pt());
+        eta.push_back(obj.eta());
+        phi.push_back(obj.phi());
+        dr.push_back(candidate.first);
+        drSC.push_back(ele.superCluster().isNonnull() ?
+                       reco::deltaR(ele.superCluster()->eta(), ele.superCluster()->phi(), obj.eta(), obj.phi()) : 999.);
+        dPtRel.push_back(std::abs(ele.pt() - obj.pt()) / obj.pt());
+      }
+    }
+  }
+
+  auto tab = std::make_unique<nanoaod::FlatTable>(electronIdx.size(), name_, false, false);
+  tab->addColumn<int>("electronIdx", electronIdx, "index of the electron in the Electron collection");
+  tab->addColumn<int>("path", path, pathDoc_);
+  tab->addColumn<int>("rank", rank, "rank of the trigger object by deltaR among the ones of the same electron and path (0 = closest)");
+  tab->addColumn<float>("pt", pt, "pt of the trigger object", 12);
+  tab->addColumn<float>("eta", eta, "eta of the trigger object", 12);
+  tab->addColumn<float>("phi", phi, "phi of the trigger object", 12);
+  tab->addColumn<float>("dR", dr, "deltaR between the electron and the trigger object", 10);
+  tab->addColumn<float>("dRSC", drSC, "deltaR between the electron supercluster and the trigger object", 10);
+  tab->addColumn<float>("dPtRel", dPtRel, "|pt(electron) - pt(trigger object)| / pt(trigger object)", 10);
+  evt.put(std::move(tab));
+}
+
+
+//define this as a plug-in
+DEFINE_FWK_MODULE(ElectronTriggerStudyTableProducer);
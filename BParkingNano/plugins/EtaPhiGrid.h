@@ -0,0 +1,84 @@
+#ifndef DoubleElectronNANO_BParkingNano_EtaPhiGrid
+#define DoubleElectronNANO_BParkingNano_EtaPhiGrid
+
+// Eta-phi binned index of a set of points, for the deltaR < maxDR neighbour
+// searches (trigger matching, overlap cleaning): only the cells around the
+// query point are visited instead of the whole collection.
+// The cells are at least cellSize wide, phi wraps around, points beyond
+// |eta| = maxEta go to the first / last eta row.
+
+#include <algorithm>
+#include <cmath>
+#include <utility>
+#include <vector>
+
+class EtaPhiGrid {
+
+public:
+
+  explicit EtaPhiGrid(float cellSize, float maxEta = 5.f):
+    nEta_(std::max(1, int(2.f * maxEta / cellSize))),
+    nPhi_(std::max(1, int(2.f * float(M_PI) / cellSize))),
+    maxEta_(maxEta),
+    etaWidth_(2.f * maxEta / nEta_),
+    phiWidth_(2.f * float(M_PI) / nPhi_),
+    offsets_(nEta_ * nPhi_ + 1, 0) {}
+
+  // indexes the points (eta, phi) by their position in etaPhi, previous content is dropped
+  void fill(const std::vector<std::pair<float, float>>& etaPhi) {
+    std::fill(offsets_.begin(), offsets_.end(), 0);
+    cellOf_.resize(etaPhi.size());
+    for (size_t i = 0; i < etaPhi.size(); ++i) {
+      cellOf_[i] = etaBin(etaPhi[i].first) * nPhi_ + phiBin(etaPhi[i].second);
+      ++offsets_[cellOf_[i] + 1];
+    }
+    for (size_t c = 1; c < offsets_.size(); ++c) offsets_[c] += offsets_[c - 1];
+    indices_.resize(etaPhi.size());
+    std::vector<unsigned int> next(offsets_.begin(), offsets_.end() - 1);
+    for (size_t i = 0; i < etaPhi.size(); ++i) indices_[next[cellOf_[i]]++] = i;
+  }
+
+  // calls f(index) for every point that can be within maxDR of (eta, phi),
+  // in increasing index order within a cell; the exact deltaR check is left to f
+  template <typename F>
+  void forEachCandidate(float eta, float phi, float maxDR, F&& f) const {
+    if (indices_.empty()) return;
+    int ieta = etaBin(eta), iphi = phiBin(phi);
+    int deta = int(std::ceil(maxDR / etaWidth_));
+    int dphi = int(std::ceil(maxDR / phiWidth_));
+    // the phi window covers the whole ring, visit each column once
+    int phiLow = iphi - dphi, phiHigh = iphi + dphi;
+    if (2 * dphi + 1 >= nPhi_) { phiLow = 0; phiHigh = nPhi_ - 1; }
+    for (int e = std::max(0, ieta - deta); e <= std::min(nEta_ - 1, ieta + deta); ++e) {
+      for (int p = phiLow; p <= phiHigh; ++p) {
+        int cell = e * nPhi_ + ((p % nPhi_) + nPhi_) % nPhi_;
+        for (unsigned int i = offsets_[cell]; i < offsets_[cell + 1]; ++i) f(indices_[i]);
+      }
+    }
+  }
+
+private:
+
+  int etaBin(float eta) const {
+    if (!std::isfinite(eta)) return 0;
+    int bin = int(std::floor((eta + maxEta_) / etaWidth_));
+    return std::min(std::max(bin, 0), nEta_ - 1);
+  }
+
+  int phiBin(float phi) const {
+    if (!std::isfinite(phi)) return 0;
+    int bin = int(std::floor((phi + float(M_PI)) / phiWidth_)) % nPhi_;
+    return bin < 0 ? bin + nPhi_ : bin;
+  }
+
+  const int nEta_;
+  const int nPhi_;
+  const float maxEta_;
+  const float etaWidth_;
+  const float phiWidth_;
+  std::vector<unsigned int> offsets_; // first entry of each cell in indices_
+  std::vector<unsigned int> indices_; // point indices, grouped by cell
+  std::vector<int> cellOf_;
+};
+
+#endif
@@ -0,0 +1,117 @@
+// Same as PATTriggerObjectStandAloneUnpacker, restricted to the trigger objects
+// used by the electron trigger matching: e/gamma objects attached to one of the
+// configured HLT paths or L1 seeds (matched as "<name>*"). The other objects are
+// dropped before their filter labels are unpacked.
+
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include "FWCore/Framework/interface/Frameworkfwd.h"
+#include "FWCore/Framework/interface/stream/EDProducer.h"
+#include "FWCore/Framework/interface/Event.h"
+#include "FWCore/Framework/interface/Run.h"
+#include "FWCore/Framework/interface/MakerMacros.h"
+#include "FWCore/ParameterSet/interface/ParameterSet.h"
+#include "FWCore/ParameterSet/interface/ConfigurationDescriptions.h"
+#include "FWCore/Common/interface/TriggerNames.h"
+
+#include "DataFormats/Common/interface/TriggerResults.h"
+#include "DataFormats/HLTReco/interface/TriggerTypeDefs.h"
+#include "DataFormats/PatCandidates/interface/TriggerObjectStandAlone.h"
+
+class PATTriggerObjectStandAloneUnpackerBPark : public edm::stream::EDProducer<> {
+
+public:
+
+  explicit PATTriggerObjectStandAloneUnpackerBPark(const edm::ParameterSet &cfg):
+    triggerObjectsToken_(consumes<pat::TriggerObjectStandAloneCollection>(cfg.getParameter<edm::InputTag>("patTriggerObjectsStandAlone"))),
+    triggerResultsToken_(consumes<edm::TriggerResults>(cfg.getParameter<edm::InputTag>("triggerResults"))),
+    unpackFilterLabels_(cfg.getParameter<bool>("unpackFilterLabels")),
+    paths_(cfg.getParameter<std::vector<std::string>>("paths")),
+    seeds_(cfg.getParameter<std::vector<std::string>>("seeds")),
+    triggerTypes_(cfg.getParameter<std::vector<int>>("triggerTypes"))
+  {
+    produces<pat::TriggerObjectStandAloneCollection>();
+  }
+
+  ~PATTriggerObjectStandAloneUnpackerBPark() override {}
+
+  void produce(edm::Event&, edm::EventSetup const&) override;
+  void beginRun(edm::Run const&, edm::EventSetup const&) override;
+
+  static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
+
+private:
+
+  // true if any of names starts with one of the patterns, cached by name
+  bool matches(const std::vector<std::string>& names,
+               const std::vector<std::string>& patterns,
+               std::unordered_map<std::string, bool>& cache) const;
+
+  const edm::EDGetTokenT<pat::TriggerObjectStandAloneCollection> triggerObjectsToken_;
+  const edm::EDGetTokenT<edm::TriggerResults> triggerResultsToken_;
+  const bool unpackFilterLabels_;
+  const std::vector<std::string> paths_;
+  const std::vector<std::string> seeds_;
+  const std::vector<int> triggerTypes_;
+  // path / algorithm names seen in this run and whether they match
+  std::unordered_map<std::string, bool> pathMatches_;
+  std::unordered_map<std::string, bool> seedMatches_;
+};
+
+
+void PATTriggerObjectStandAloneUnpackerBPark::beginRun(edm::Run const&, edm::EventSetup const&) {
+  pathMatches_.clear();
+  seedMatches_.clear();
+}
+
+
+bool PATTriggerObjectStandAloneUnpackerBPark::matches(const std::vector<std::string>& names,
+                                                      const std::vector<std::string>& patterns,
+                                                      std::unordered_map<std::string, bool>& cache) const {
+  for (const std::string& name: names) {
+    auto cached = cache.find(name);
+    if (cached == cache.end()) {
+      bool match = false;
+      for (const std::string& pattern: patterns) {
+        if (name.compare(0, pattern.size(), pattern) == 0) { match = true; break; }
+      }
+      cached = cache.emplace(name, match).first;
+    }
+    if (cached->second) return true;
+  }
+  return false;
+}
+
+
+void PATTriggerObjectStandAloneUnpackerBPark::produce(edm::Event& evt, edm::EventSetup const&) {
+  const auto& triggerObjects = evt.get(triggerObjectsToken_);
+  edm::Handle<edm::TriggerResults> triggerResults;
+  evt.getByToken(triggerResultsToken_, triggerResults);
+  const edm::TriggerNames& names = evt.triggerNames(*triggerResults);
+
+  auto unpacked = std::make_unique<pat::TriggerObjectStandAloneCollection>();
+  for (const auto& obj: triggerObjects) {
+    // the type ids are available before unpacking, check them first
+    bool egamma = false;
+    for (int type: triggerTypes_) {
+      if (obj.hasTriggerObjectType(trigger::TriggerObjectType(type))) { egamma = true; break; }
+    }
+    if (!egamma) continue;
+
+    pat::TriggerObjectStandAlone candidate(obj);
+    candidate.unpackPathNames(names);
+    if (!matches(candidate.pathNames(false, false), paths_, pathMatches_) &&
+        !matches(candidate.algorithmNames(false), seeds_, seedMatches_)) continue;
+    if (unpackFilterLabels_) candidate.unpackFilterLabels(evt, *triggerResults);
+    unpacked->push_back(std::move(candidate));
+  }
+
+  evt.put(std::move(unpacked));
+}
+
+
+//define this as a plug-in
+DEFINE_FWK_MODULE(PATTriggerObjectStandAloneUnpackerBPark);
@@ -22,15 +22,19 @@
 
 #include "DataFormats/NanoAOD/interface/FlatTable.h"
 #include "FWCore/Common/interface/TriggerNames.h"
+#include "DataFormats/Provenance/interface/ParameterSetID.h"
 #include "DataFormats/HLTReco/interface/TriggerEvent.h"
 #include "DataFormats/HLTReco/interface/TriggerObject.h"
 #include "HLTrigger/HLTcore/interface/defaultModuleLabel.h"
 #include "DataFormats/HLTReco/interface/TriggerFilterObjectWithRefs.h"
 #include "DataFormats/PatCandidates/interface/TriggerObjectStandAlone.h"
 #include "FWCore/Framework/interface/ESHandle.h"
+#include "FWCore/Framework/interface/ESWatcher.h"
 
 #include "TString.h"
+#include <algorithm>
 #include <string>
+#include <vector>
 
 #include "CondFormats/DataRecord/interface/L1TUtmTriggerMenuRcd.h"
 #include "CondFormats/L1TObjects/interface/L1TUtmTriggerMenu.h"
@@ -49,7 +53,8 @@ public:
     hltresultsToken_(consumes<edm::TriggerResults>(cfg.getParameter<edm::InputTag> ("hltresults"))),
     l1resultsToken_(consumes<GlobalAlgBlkBxCollection>(cfg.getParameter<edm::InputTag> ("l1results"))),
     hltpaths_( cfg.getParameter< std::vector<std::string> >( "paths" ) ),
-    l1seeds_( cfg.getParameter< std::vector<std::string> >( "seeds" ) )
+    l1seeds_( cfg.getParameter< std::vector<std::string> >( "seeds" ) ),
+    packBits_( cfg.getParameter<bool>( "packBits" ) )
 {
     produces<nanoaod::FlatTable>();
     // produces<nanoaod::FlatTable>("globalVariables");
@@ -66,18 +71,76 @@ public:
 
 private:
 
+  void updatePathIndices(edm::TriggerNames const& trigName);
+  // bit i of the decisions in bit i%32 of the column <name>_<i/32>
+  void addPackedColumns(nanoaod::FlatTable& tab, const std::string& name,
+                        const std::vector<uint8_t>& bits, const std::string& doc) const;
+
   const edm::ESGetToken<L1TUtmTriggerMenu, L1TUtmTriggerMenuRcd> l1GtMenuToken_;
   const edm::EDGetTokenT< edm::TriggerResults >    hltresultsToken_;
   const edm::EDGetTokenT<GlobalAlgBlkBxCollection> l1resultsToken_;
   // l1 seeds not implemented yet but can be added with litle effort
   const std::vector< std::string >                 hltpaths_;
   const std::vector< std::string >                 l1seeds_;
-  TString * algoBitToName  =  new TString[512]; 
-  bool loaded = false;
+  // one uint32 bitmask column per 32 paths / seeds instead of one uint8 column each,
+  // the names of the bits are in the run metadata (see nanoAOD_customizeTriggerBitsBPark)
+  const bool                                       packBits_;
+  // L1 menu seen by the seed cache, and the algorithm bit of each seed (-1 if not in the menu)
+  edm::ESWatcher<L1TUtmTriggerMenuRcd> l1MenuWatcher_;
+  std::vector<int> seedBits_;
+
+  // HLT menu seen by the path cache, the indices below change only with it
+  edm::ParameterSetID triggerNamesID_;
+  // for each configured path, the indices of the menu paths containing it, in menu order
+  std::vector< std::vector<unsigned int> > pathIndices_;
+  // classification of the menu paths, by index
+  std::vector<bool> isDoubleEle_;
+  std::vector<bool> isVBF_;
 };
 
 
 
+void
+TrgBitTableProducer::updatePathIndices(edm::TriggerNames const& trigName)
+{
+  unsigned int Ntrg = trigName.size();
+  isDoubleEle_.assign(Ntrg, false);
+  isVBF_.assign(Ntrg, false);
+  for ( unsigned int itrg = 0; itrg < Ntrg; ++itrg ){
+    TString TrigPath = trigName.triggerName( itrg );
+    isDoubleEle_[itrg] = TrigPath.Contains("DoubleEle", TString::kIgnoreCase);
+    isVBF_[itrg] = TrigPath.Contains("VBF", TString::kIgnoreCase);
+  }
+
+  pathIndices_.assign(hltpaths_.size(), std::vector<unsigned int>());
+  for ( unsigned int ipath = 0; ipath < hltpaths_.size(); ++ipath ){
+    for ( unsigned int itrg = 0; itrg < Ntrg; ++itrg ){
+      if ( trigName.triggerName( itrg ).find( hltpaths_[ipath] ) == std::string::npos ) continue;
+      pathIndices_[ipath].push_back( itrg );
+      if ( isVBF_[itrg] )
+        edm::LogInfo("MyProducer") << "Found a VBF path: " << trigName.triggerName( itrg ) << " for " << hltpaths_[ipath];
+    }
+  }
+  triggerNamesID_ = trigName.parameterSetID();
+}
+
+
+
+void
+TrgBitTableProducer::addPackedColumns(nanoaod::FlatTable& tab, const std::string& name,
+                                      const std::vector<uint8_t>& bits, const std::string& doc) const
+{
+  for ( unsigned int iword = 0; iword*32 < bits.size(); ++iword ){
+    uint32_t word = 0;
+    for ( unsigned int ibit = iword*32; ibit < std::min<size_t>(bits.size(), (iword+1)*32); ++ibit ){
+      if ( bits[ibit] ) word |= uint32_t(1) << (ibit - iword*32);
+    }
+    tab.addColumnValue<uint32_t> (name + "_" + std::to_string(iword), word, doc);
+  }
+}
+
+
+
 void 
 TrgBitTableProducer::produce( edm::Event &evt, edm::EventSetup const &stp) 
 {
@@ -96,8 +159,6 @@ TrgBitTableProducer::produce( edm::Event &evt, edm::EventSetup const &stp)
   hltbits.reserve( Npaths );
   unsigned int Nseeds = l1seeds_.size();
   l1bits.reserve( Nseeds );
-  edm::TriggerNames trigName = evt.triggerNames( *hltResults );   
-
 
  
   // get L1 seeds
@@ -107,27 +168,21 @@ TrgBitTableProducer::produce( edm::Event &evt, edm::EventSetup const &stp)
      l1bits.push_back( 0 );
 
   } else{
-    if (!loaded){
+    if ( l1MenuWatcher_.check(stp) ){
       const auto& menu = stp.getData(l1GtMenuToken_);
-      for (auto const & keyval: menu.getAlgorithmMap()) {
-        std::string const & trigName = keyval.second.getName();
-        algoBitToName[ int( keyval.second.getIndex() ) ] = TString( trigName );
+      const auto& algoMap = menu.getAlgorithmMap();
+      seedBits_.assign(Nseeds, -1);
+      for (unsigned int iseed = 0; iseed < Nseeds; ++iseed){
+        auto algo = algoMap.find( l1seeds_[iseed] );
+        if (algo != algoMap.end()) seedBits_[iseed] = int( algo->second.getIndex() );
       }
-      loaded=true;
     }
 
     GlobalAlgBlk const &result=l1Results->at(0, 0);
-    for ( auto& l1seed: l1seeds_ ){
-      bool sfire=false;
-      for (unsigned int itrg=0; itrg<result.maxPhysicsTriggers; ++itrg){
-        if (result.getAlgoDecisionFinal(itrg)!=1) continue;
-        std::string l1trigName = static_cast<const char *>(algoBitToName[itrg]);
-        if (l1trigName!=l1seed) continue;
-        sfire=true;
-        break;
-    }
-    if (sfire) l1bits.push_back( 1 );
-    else l1bits.push_back( 0 );
+    for ( int bit: seedBits_ ){
+      bool sfire = bit >= 0 && bit < int(result.maxPhysicsTriggers) && result.getAlgoDecisionFinal(bit);
+      if (sfire) l1bits.push_back( 1 );
+      else l1bits.push_back( 0 );
     }
   }
 
@@ -141,27 +196,18 @@ TrgBitTableProducer::produce( edm::Event &evt, edm::EventSetup const &stp)
       hltbits.push_back( 0 );
 
   } else {
-    int Ntrg = hltResults->size();
+    if ( hltResults->parameterSetID() != triggerNamesID_ )
+      updatePathIndices( evt.triggerNames( *hltResults ) );
 
-    for ( auto& hltpath: hltpaths_ ){
+    // the first fired path of the menu containing the configured one decides
+    for ( unsigned int ipath = 0; ipath < Npaths; ++ipath ){
       bool fire = false; 
-      for( int itrg = 0; itrg < Ntrg; ++itrg ){
+      for ( unsigned int itrg: pathIndices_[ipath] ){
         if ( !hltResults->accept( itrg ) ) continue;
-        TString TrigPath = trigName.triggerName( itrg );
-
-        if ( TrigPath.Contains( hltpath ) ){
-          fire=true;
-          if (TrigPath.Contains("DoubleEle", TString::kIgnoreCase)) {
-                    anyDoubleElefired_flag = true;
-          }
-          if (TrigPath.Contains("VBF", TString::kIgnoreCase)) {
-              anyVBFfired_flag = true;
-              edm::LogInfo("MyProducer") 
-                  << "Found a VBF path: " << TrigPath.Data() 
-                  << ". Setting flag to true.";
-          }
-          break; 
-        }
+        fire=true;
+        if ( isDoubleEle_[itrg] ) anyDoubleElefired_flag = true;
+        if ( isVBF_[itrg] ) anyVBFfired_flag = true;
+        break; 
       } 
       
       if( fire ) hltbits.push_back( 1 );
@@ -170,11 +216,16 @@ TrgBitTableProducer::produce( edm::Event &evt, edm::EventSetup const &stp)
   }
 
   auto tab  = std::make_unique<nanoaod::FlatTable>(1,"", true, true);
-  for (unsigned int ipath = 0; ipath <Npaths; ++ipath ){
-    tab->addColumnValue<uint8_t> (hltpaths_[ipath], hltbits[ipath], "hlt path");
-  }
-  for (unsigned int iseed = 0; iseed <Nseeds; ++iseed ){
-    tab->addColumnValue<uint8_t> (l1seeds_[iseed], l1bits[iseed], "l1 seed");
+  if ( packBits_ ){
+    addPackedColumns(*tab, "hltBits", hltbits, "hlt paths, bit i%32 of hltBits_<i/32> for the i-th path of the trgBitsHLT metadata");
+    addPackedColumns(*tab, "l1Bits", l1bits, "l1 seeds, bit i%32 of l1Bits_<i/32> for the i-th seed of the trgBitsL1 metadata");
+  } else {
+    for (unsigned int ipath = 0; ipath <Npaths; ++ipath ){
+      tab->addColumnValue<uint8_t> (hltpaths_[ipath], hltbits[ipath], "hlt path");
+    }
+    for (unsigned int iseed = 0; iseed <Nseeds; ++iseed ){
+      tab->addColumnValue<uint8_t> (l1seeds_[iseed], l1bits[iseed], "l1 seed");
+    }
   }
   
   edm::LogInfo("MyProducer") << "Final value of anyVBFfired_flag: " << (anyVBFfired_flag ? "True" : "False");
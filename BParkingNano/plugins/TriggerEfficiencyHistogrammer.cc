@@ -0,0 +1,168 @@
+// Fills trigger efficiency histograms inside the job (TFileService), for the
+// efficiency studies that otherwise keep every event only to histogram the
+// trigger bits offline.
+// For the events with at least two electrons passing cut, the configured
+// quantities of the leading / subleading electrons (pT, eta, deltaR) are filled
+// in all/<histogram> (denominator), and in <trigger>/<histogram> for each HLT
+// path and L1 seed that fired (numerators). The decisions are read from the
+// TrgBitTableProducer table, in either of its layouts; histograms of several
+// jobs are merged with hadd.
+
+#include <string>
+#include <vector>
+
+#include "FWCore/Framework/interface/Frameworkfwd.h"
+#include "FWCore/Framework/interface/one/EDAnalyzer.h"
+#include "FWCore/Framework/interface/Event.h"
+#include "FWCore/Framework/interface/MakerMacros.h"
+#include "FWCore/ParameterSet/interface/ParameterSet.h"
+#include "FWCore/ParameterSet/interface/ConfigurationDescriptions.h"
+#include "FWCore/ServiceRegistry/interface/Service.h"
+#include "FWCore/Utilities/interface/Exception.h"
+#include "FWCore/Utilities/interface/InputTag.h"
+#include "CommonTools/UtilAlgos/interface/TFileService.h"
+#include "CommonTools/Utils/interface/StringCutObjectSelector.h"
+
+#include "DataFormats/PatCandidates/interface/Electron.h"
+#include "DataFormats/NanoAOD/interface/FlatTable.h"
+#include "DataFormats/Math/interface/deltaR.h"
+
+#include "TH1F.h"
+
+class TriggerEfficiencyHistogrammer : public edm::one::EDAnalyzer<edm::one::SharedResources> {
+
+public:
+
+  explicit TriggerEfficiencyHistogrammer(const edm::ParameterSet &cfg);
+
+  ~TriggerEfficiencyHistogrammer() override {}
+
+  void analyze(const edm::Event&, const edm::EventSetup&) override;
+
+  static void fillDescriptions(edm::ConfigurationDescriptions &descriptions) {}
+
+private:
+
+  enum class Quantity { LeadPt, SubleadPt, LeadEta, SubleadEta, DeltaR };
+
+  // where the decision of a trigger is in the trigger table: the uint8 column
+  // of the same name (bit = -1), or a bit of a packed uint32 column
+  struct TriggerColumn {
+    std::string name;
+    std::string column;
+    int bit;
+    int index; // in the table, resolved at the first event
+  };
+
+  void addTriggers(const std::vector<std::string>& names, const std::string& packedPrefix);
+  bool fired(const nanoaod::FlatTable& table, TriggerColumn& trigger) const;
+
+  const edm::EDGetTokenT<pat::ElectronCollection> electrons_;
+  const edm::EDGetTokenT<nanoaod::FlatTable> trgTable_;
+  const StringCutObjectSelector<pat::Electron> cut_;
+  const bool packBits_;
+
+  std::vector<Quantity> quantities_;
+  std::vector<TH1F*> denominators_;              // one per quantity
+  std::vector<TriggerColumn> triggers_;          // HLT paths, then L1 seeds
+  std::vector<std::vector<TH1F*>> numerators_;   // per trigger, per quantity
+};
+
+
+TriggerEfficiencyHistogrammer::TriggerEfficiencyHistogrammer(const edm::ParameterSet &cfg):
+  electrons_(consumes<pat::ElectronCollection>(cfg.getParameter<edm::InputTag>("src"))),
+  trgTable_(consumes<nanoaod::FlatTable>(cfg.getParameter<edm::InputTag>("trgTable"))),
+  cut_(cfg.getParameter<std::string>("cut")),
+  packBits_(cfg.getParameter<bool>("packBits"))
+{
+  usesResource("TFileService");
+  addTriggers(cfg.getParameter<std::vector<std::string>>("paths"), "hltBits");
+  addTriggers(cfg.getParameter<std::vector<std::string>>("seeds"), "l1Bits");
+
+  edm::Service<TFileService> fs;
+  TFileDirectory all = fs->mkdir("all");
+  std::vector<TFileDirectory> dirs;
+  for (const auto& trigger : triggers_) dirs.push_back(fs->mkdir(trigger.name));
+  numerators_.resize(triggers_.size());
+
+  for (const auto& pset : cfg.getParameter<std::vector<edm::ParameterSet>>("histograms")) {
+    const std::string name = pset.getParameter<std::string>("name");
+    const std::string quantity = pset.getParameter<std::string>("quantity");
+    const std::vector<double> binning = pset.getParameter<std::vector<double>>("bins");
+    if (quantity == "leadPt") quantities_.push_back(Quantity::LeadPt);
+    else if (quantity == "subleadPt") quantities_.push_back(Quantity::SubleadPt);
+    else if (quantity == "leadEta") quantities_.push_back(Quantity::LeadEta);
+    else if (quantity == "subleadEta") quantities_.push_back(Quantity::SubleadEta);
+    else if (quantity == "dR") quantities_.push_back(Quantity::DeltaR);
+    else throw cms::Exception("Configuration") << "TriggerEfficiencyHistogrammer: unknown quantity " << quantity
+                                               << ", use leadPt, subleadPt, leadEta, subleadEta or dR";
+    if (binning.size() < 2)
+      throw cms::Exception("Configuration") << "TriggerEfficiencyHistogrammer: histogram " << name << " needs at least two bin edges";
+
+    const std::vector<float> bins(binning.begin(), binning.end());
+    denominators_.push_back(all.make<TH1F>(name.c_str(), (name + ", all events").c_str(), bins.size() - 1, bins.data()));
+    for (size_t itrg = 0; itrg < triggers_.size(); ++itrg)
+      numerators_[itrg].push_back(dirs[itrg].make<TH1F>(name.c_str(), name.c_str(), bins.size() - 1, bins.data()));
+  }
+}
+
+
+void TriggerEfficiencyHistogrammer::addTriggers(const std::vector<std::string>& names, const std::string& packedPrefix) {
+  for (size_t i = 0; i < names.size(); ++i) {
+    if (packBits_) triggers_.push_back({names[i], packedPrefix + "_" + std::to_string(i / 32), int(i % 32), -1});
+    else triggers_.push_back({names[i], names[i], -1, -1});
+  }
+}
+
+
+bool TriggerEfficiencyHistogrammer::fired(const nanoaod::FlatTable& table, TriggerColumn& trigger) const {
+  if (trigger.index < 0) {
+    trigger.index = table.columnIndex(trigger.column);
+    if (trigger.index < 0)
+      throw cms::Exception("Configuration") << "TriggerEfficiencyHistogrammer: no column " << trigger.column
+                                            << " in the trigger table, check packBits";
+  }
+  if (trigger.bit < 0) return table.columnData<uint8_t>(trigger.index)[0];
+  return (table.columnData<uint32_t>(trigger.index)[0] >> trigger.bit) & 1;
+}
+
+
+void TriggerEfficiencyHistogrammer::analyze(const edm::Event& evt, const edm::EventSetup&) {
+  // the producers may not have run, e.g. for events rejected by an earlier filter
+  edm::Handle<pat::ElectronCollection> electrons;
+  evt.getByToken(electrons_, electrons);
+  edm::Handle<nanoaod::FlatTable> table;
+  evt.getByToken(trgTable_, table);
+  if (!electrons.isValid() || !table.isValid()) return;
+
+  const pat::Electron* lead = nullptr;
+  const pat::Electron* sublead = nullptr;
+  for (const auto& ele : *electrons) {
+    if (!cut_(ele)) continue;
+    if (!lead || ele.pt() > lead->pt()) { sublead = lead; lead = &ele; }
+    else if (!sublead || ele.pt() > sublead->pt()) sublead = &ele;
+  }
+  if (!sublead) return;
+
+  std::vector<float> values;
+  values.reserve(quantities_.size());
+  for (Quantity quantity : quantities_) {
+    switch (quantity) {
+      case Quantity::LeadPt:     values.push_back(lead->pt()); break;
+      case Quantity::SubleadPt:  values.push_back(sublead->pt()); break;
+      case Quantity::LeadEta:    values.push_back(lead->eta()); break;
+      case Quantity::SubleadEta: values.push_back(sublead->eta()); break;
+      case Quantity::DeltaR:     values.push_back(reco::deltaR(*lead, *sublead)); break;
+    }
+  }
+
+  for (size_t ih = 0; ih < values.size(); ++ih) denominators_[ih]->Fill(values[ih]);
+  for (size_t itrg = 0; itrg < triggers_.size(); ++itrg) {
+    if (!fired(*table, triggers_[itrg])) continue;
+    for (size_t ih = 0; ih < values.size(); ++ih) numerators_[itrg][ih]->Fill(values[ih]);
+  }
+}
+
+
+//define this as a plug-in
+DEFINE_FWK_MODULE(TriggerEfficiencyHistogrammer);
@@ -7,6 +7,8 @@ from argparse import ArgumentParser
 
 production_tag = datetime.date.today().strftime('%Y%b%d')
 
+memory_per_extra_stream = 1000 ## MB, on top of the single-stream maxMemoryMB
+
 config = config()
 config.section_('General')
 config.General.transferOutputs = True
@@ -23,7 +25,8 @@ config.section_('JobType')
 config.JobType.pluginName = 'Analysis'
 config.JobType.psetName = 'BParkingNano/test/run_nano_cfg.py'
 config.JobType.maxJobRuntimeMin = 2000 ## default 3000
-config.JobType.maxMemoryMB = 3500
+config.JobType.maxMemoryMB = 3500 ## single stream
+config.JobType.numCores = 1
 config.JobType.allowUndistributedCMSSW = True
 
 config.section_('User')
@@ -54,8 +57,15 @@ if __name__ == '__main__':
   parser.add_argument('-m', '--mode', type=str, default="reco", help= 'reco = apply skim, eff = disable all selections, vbf = apply vbf hlts')
   parser.add_argument('-s', '--saveAllNanoContent', type=bool, default=True, help= 'Save all nano content (default = True)')
   parser.add_argument('-sr', '--saveRegressionVars', type=bool, default=False, help='Save regression variables (default = False)')
+  parser.add_argument('-c', '--compression', default='archive', help='Compression profile of the output: archive (LZMA 9, default), balanced (ZSTD) or fast (LZ4)')
+  parser.add_argument('-nt', '--nThreads', type=int, default=1, help='Number of threads per job (default = 1)')
+  parser.add_argument('-ns', '--nStreams', type=int, default=0, help='Number of streams per job (default = 0, same as nThreads)')
   args = parser.parse_args()
 
+  nstreams = args.nStreams if args.nStreams > 0 else args.nThreads
+  config.JobType.numCores = args.nThreads
+  config.JobType.maxMemoryMB += memory_per_extra_stream * (nstreams - 1)
+
   configs = []
   with open(args.yaml) as f:
     doc = yaml.load(f,Loader=yaml.FullLoader) # Parse YAML file
@@ -101,7 +111,10 @@ if __name__ == '__main__':
             'saveAllNanoContent={:.0f}'.format(int(args.saveAllNanoContent)),
             'saveRegressionVars={:.0f}'.format(int(args.saveRegressionVars)),
             'version={:s}'.format(version),
-            'isSignal={}'.format(isSignal)
+            'isSignal={}'.format(isSignal),
+            'nThreads={:d}'.format(args.nThreads),
+            'nStreams={:d}'.format(args.nStreams),
+            'compression={:s}'.format(args.compression),
         ]
 
         ext1 = {False:'data', True:'mc'}
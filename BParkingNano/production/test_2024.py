@@ -93,6 +93,11 @@ options.register('version', 'A',
     VarParsing.varType.string,
     "RUN version - A, B, C, D, etc")
 
+options.register('compression', 'archive',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Compression profile of the NANO output: archive (LZMA 9, default), balanced (ZSTD) or fast (LZ4)")
+
 options.setDefault('maxEvents', 500)
 options.setDefault('tag', '130X')
 options.parseArguments()
@@ -439,6 +444,9 @@ process.NANOAODoutput = cms.OutputModule("NanoAODOutputModule",
 
 )
 
+from DoubleElectronNANO.BParkingNano.compression_cff import setCompressionProfile
+setCompressionProfile(process.NANOAODoutput, options.compression)
+
 # Additional output definition
 
 # Other statements
@@ -458,11 +466,20 @@ process = nanoAOD_customizeTriggerBitsBPark(process)
 process = nanoAOD_customizeElectronTriggerSelectionBPark(process)
 process = nanoAOD_customizeDiElectron(process)
 
-process.nanoAOD_DiEle_step = cms.Path(process.egammaPostRecoSeq
+process.nanoAOD_DiEle_step = cms.Path(process.nanoSkimSequence
+                                    + process.egammaPostRecoSeq
                                     + process.nanoSequence
                                     + process.nanoEleSequence
                                     + process.nanoDiEleSequence)
 
+if options.saveAllNanoContent:
+    # the standard NanoAOD content only runs on events accepted by nanoAOD_DiEle_step
+    process.nanoDiEleStepFilter = cms.EDFilter("PathStatusFilter",
+        logicalExpression = cms.string('nanoAOD_DiEle_step')
+    )
+    process.nanoAOD_allNano_step = cms.Path(process.nanoDiEleStepFilter
+                                          + process.nanoContentSequence)
+
 # customisation of the process.
 if options.isMC:
     from DoubleElectronNANO.BParkingNano.nanoBPark_cff import nanoAOD_customizeMC
@@ -473,20 +490,18 @@ process.FEVTDEBUGHLToutput_step = cms.EndPath(process.FEVTDEBUGHLToutput)
 process.NANOAODoutput_step = cms.EndPath(process.NANOAODoutput)
 
 # Schedule definition
-process.schedule = cms.Schedule(process.nanoAOD_DiEle_step,
-                                process.endjob_step,
-                                process.NANOAODoutput_step)
-
+process.schedule = cms.Schedule(process.nanoAOD_DiEle_step)
+if options.saveAllNanoContent:
+    process.schedule.append(process.nanoAOD_allNano_step)
+process.schedule.append(process.endjob_step)
 if options.wantFullRECO:
-    process.schedule = cms.Schedule(process.nanoAOD_DiEle_step,
-                                    process.endjob_step,
-                                    process.FEVTDEBUGHLToutput_step,
-                                    process.NANOAODoutput_step)
+    process.schedule.append(process.FEVTDEBUGHLToutput_step)
+process.schedule.append(process.NANOAODoutput_step)
 
 from PhysicsTools.PatAlgos.tools.helpers import associatePatAlgosToolsTask
 associatePatAlgosToolsTask(process)
 process.NANOAODoutput.SelectEvents = cms.untracked.PSet(
-    SelectEvents = cms.vstring('nanoAOD_DiEle_step')
+    SelectEvents = cms.vstring('nanoAOD_allNano_step' if options.saveAllNanoContent else 'nanoAOD_DiEle_step')
 )
 
 ### from https://hypernews.cern.ch/HyperNews/CMS/get/physics-validation/3287/1/1/1/1/1.html
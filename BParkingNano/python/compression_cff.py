@@ -0,0 +1,19 @@
+import FWCore.ParameterSet.Config as cms
+
+# Compression profiles for NANOAODoutput: (algorithm, level)
+#  - archive:  smallest files, slowest to write (historical default)
+#  - balanced: close to LZMA in size, much faster to write and read back
+#  - fast:     fastest write and read back, largest files
+compressionProfiles = {
+    'archive'  : ('LZMA', 9),
+    'balanced' : ('ZSTD', 5),
+    'fast'     : ('LZ4', 4),
+}
+
+def setCompressionProfile(output, profile):
+    if profile not in compressionProfiles:
+        raise ValueError("Unknown compression profile '%s', choose among %s" % (profile, ', '.join(compressionProfiles)))
+    algorithm, level = compressionProfiles[profile]
+    output.compressionAlgorithm = cms.untracked.string(algorithm)
+    output.compressionLevel = cms.untracked.int32(level)
+    return output
@@ -0,0 +1,72 @@
+'''
+Cache of fully expanded cmsRun processes.
+
+Building the BPark NANO process imports the whole NanoAOD configuration,
+runs setupEgammaPostRecoSeq and the customisations, which takes several
+seconds. The expanded process is pickled (as CRAB does for its jobs) under a
+key made of the VarParsing options, the CMSSW release and the python sources
+of the local packages, and loaded back directly when nothing changed.
+Per-job options (input files, events, output names) are left out of the key,
+the caller sets them on the returned process, so that the shards of a
+sharded run or reprocessings of other inputs share the cache entry.
+'''
+from __future__ import print_function
+import glob
+import hashlib
+import os
+import pickle
+import sys
+
+def _sourceFiles():
+    '''python sources that can change the expanded process: the ones of the
+    packages checked out in $CMSSW_BASE/src (release ones come with the release)
+    and the calling configuration'''
+    files = []
+    base = os.environ.get('CMSSW_BASE')
+    if base:
+        files += glob.glob(os.path.join(base, 'src', '*', '*', 'python', '**', '*.py'), recursive=True)
+    else:
+        files += glob.glob(os.path.join(os.path.dirname(os.path.realpath(__file__)), '*.py'))
+    cfg = os.path.realpath(sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.py') else sys.argv[0])
+    if cfg.endswith('.py'):
+        files.append(cfg)
+    return sorted(set(os.path.realpath(f) for f in files))
+
+def cacheKey(options, jobOptions=()):
+    '''Hash of the options that change the process structure, i.e. all the
+    registered ones but jobOptions'''
+    key = hashlib.sha1()
+    key.update(os.environ.get('CMSSW_VERSION', '').encode())
+    for name in sorted(options._register):
+        if name in jobOptions: continue
+        key.update(('%s=%r;' % (name, getattr(options, name))).encode())
+    for fname in _sourceFiles():
+        key.update(fname.encode())
+        with open(fname, 'rb') as source:
+            key.update(source.read())
+    return key.hexdigest()
+
+def cachedProcess(options, build, cacheDir, jobOptions=()):
+    '''Returns the process from the cache in cacheDir if available, otherwise
+    builds it with build() and stores it. A cached process can come from a job
+    with other values of jobOptions, the caller has to apply them'''
+    path = os.path.join(cacheDir, 'process_%s.pkl' % cacheKey(options, jobOptions))
+    if os.path.isfile(path):
+        try:
+            with open(path, 'rb') as cached:
+                process = pickle.load(cached)
+            print('Loaded process from config cache', path)
+            return process
+        except Exception as e:
+            print('WARNING: could not load', path, '(%s), rebuilding the process' % e)
+
+    process = build()
+    if not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+    # write and rename, concurrent jobs never see a partial file
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'wb') as cache:
+        pickle.dump(process, cache, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    print('Stored process in config cache', path)
+    return process
@@ -1,6 +1,6 @@
 import FWCore.ParameterSet.Config as cms
 from DoubleElectronNANO.BParkingNano.common_cff import *
-from DoubleElectronNANO.BParkingNano.electronsBPark_cff import electronsForAnalysis
+from DoubleElectronNANO.BParkingNano.electronsBPark_cff import electronsForAnalysis, electronBParkTable
 
 electronPairs = cms.EDProducer(
     'DiElectronBuilder',
@@ -63,6 +63,16 @@ DiElectronSequence = cms.Sequence(
     electronPairsTable
 )
 
+# regression variables computed from the rechits (saveRegressionVars), only for
+# the electrons of the pairs, as an extension of the Electron table
+electronRegressionVarsTable = cms.EDProducer("ElectronRegressionVarsTableProducer",
+    name = electronBParkTable.name,
+    src = electronBParkTable.src,
+    pairs = cms.InputTag("electronPairs:SelectedDiLeptons"),
+    recHitCollectionEB = cms.InputTag("reducedEgamma:reducedEBRecHits"),
+    recHitCollectionEE = cms.InputTag("reducedEgamma:reducedEERecHits"),
+)
+
 
 ## MUONS
 # (could be useful eventually)
@@ -89,4 +99,8 @@ efficiencyStudy.toModify(electronPairs,
 
 efficiencyStudy.toModify(countDiElectrons,
     minNumber = cms.uint32(0),
+)
+
+regressionVars.toReplaceWith(DiElectronSequence,
+    cms.Sequence(electronPairs + countDiElectrons + electronPairsTable + electronRegressionVarsTable)
 )
\ No newline at end of file
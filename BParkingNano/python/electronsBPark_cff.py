@@ -17,13 +17,14 @@ mvaConfigsForEleProducer.append( mvaEleID_RunIII_custom_JPsitoEE_V1_producer_con
 # (Note:  custom IDs computed here instead of using PostRecoTools)
 myelectronMVAValueMapProducer = cms.EDProducer(
     'ElectronMVAValueMapProducer',
-    src = cms.InputTag('mySlimmedPFElectronsWithEmbeddedTrigger'),#,processName=cms.InputTag.skipCurrentProcess()),
+    src = cms.InputTag('customSlimmedElectrons'),#,processName=cms.InputTag.skipCurrentProcess()),
     mvaConfigurations = mvaConfigsForEleProducer,
 )
 
-# change modifiedLowPtElectrons input to use embedded trigger matching
+# trigger matching is not embedded: keeps the order of slimmedLowPtElectrons,
+# electronsForAnalysis reads it from myElectronTriggerMatches:lowpt
 customModifiedLowPtElectrons = modifiedLowPtElectrons.clone(
-                                    src = cms.InputTag("mySlimmedLPElectronsWithEmbeddedTrigger")
+                                    src = cms.InputTag("slimmedLowPtElectrons")
                                 )
 customUpdatedLowPtElectrons = updatedLowPtElectrons.clone(
                                 computePfIso = cms.bool(True), #fix low pt isolation
@@ -31,12 +32,12 @@ customUpdatedLowPtElectrons = updatedLowPtElectrons.clone(
                                 )
 
 # compute electron seed gain
-seedGainElePF = cms.EDProducer("ElectronSeedGainProducer", src = cms.InputTag("mySlimmedPFElectronsWithEmbeddedTrigger"))
+seedGainElePF = cms.EDProducer("ElectronSeedGainProducer", src = cms.InputTag("customSlimmedElectrons"))
 seedGainEleLowPt = cms.EDProducer("ElectronSeedGainProducer", src = cms.InputTag("customUpdatedLowPtElectrons"))
 
 # embed IDs and additional variables in slimmedElectrons collection
 slimmedPFElectronsWithUserData = cms.EDProducer("PATElectronUserDataEmbedder",
-    src = cms.InputTag("mySlimmedPFElectronsWithEmbeddedTrigger"), #includes trigger matching
+    src = cms.InputTag("customSlimmedElectrons"), # same order, trigger matching from myElectronTriggerMatches:pf
     userFloats = cms.PSet(
         ElectronMVAEstimatorRun2BParkRetrainRawValues = cms.InputTag("myelectronMVAValueMapProducer:ElectronMVAEstimatorRun2BParkRetrainRawValues"),
         ElectronMVAEstimatorRun2RunIIICustomJPsitoEERawValues = cms.InputTag("myelectronMVAValueMapProducer:ElectronMVAEstimatorRun2RunIIICustomJPsitoEERawValues") 
@@ -70,6 +71,10 @@ electronsForAnalysis = cms.EDProducer(
   'ElectronMerger',
   trgLepton = cms.InputTag('electronTrgSelector:trgElectrons'),
   trgBits = cms.InputTag("TriggerResults","","HLT"),
+  # index of the matched trigger object for each input electron
+  trgObjects = cms.InputTag("myUnpackedPatTrigger"),
+  pfTrgMatches = cms.InputTag("myElectronTriggerMatches", "pf"),
+  lowptTrgMatches = cms.InputTag("myElectronTriggerMatches", "lowpt"),
   # lowptSrc = cms.InputTag('slimmedLowPtElectrons'), # Only used if saveLowPtE == True
   lowptSrc = cms.InputTag('slimmedLowPtElectronsWithUserData'), # Only used if saveLowPtE == True
   # pfSrc    = cms.InputTag('slimmedElectrons'),
@@ -109,9 +114,6 @@ electronsForAnalysis = cms.EDProducer(
   # module flags
   addUserVarsExtra = cms.bool(False),
   efficiencyStudy = cms.bool(False), # If True, flag electron selections instead of cutting; saves extra variables
-  saveRegressionVars = cms.bool(False), # If True, save regression variables
-  recHitCollectionEB = cms.InputTag("reducedEgamma:reducedEBRecHits"),
-  recHitCollectionEE = cms.InputTag("reducedEgamma:reducedEERecHits"),
 )
 
 # finer trigger skim -- only select events that have >= 2 reco trigger-matched electrons
@@ -348,6 +350,19 @@ electronBParkTriggerSelection = cms.Sequence(
 
 electronBParkTables = cms.Sequence(electronBParkTable)
 
+# trigger matching study (mode=trg): closest trigger objects of each path for
+# each electron of the Electron table, in a separate ElectronTrgMatch table
+from DoubleElectronNANO.BParkingNano.electronsTrigger_cff import paths as trgPaths
+electronTrgMatchStudyTable = cms.EDProducer("ElectronTriggerStudyTableProducer",
+    name = cms.string("ElectronTrgMatch"),
+    src = electronBParkTable.src,
+    trgObjects = cms.InputTag("myUnpackedPatTrigger"),
+    paths = cms.vstring(trgPaths),
+    nMatches = cms.uint32(3),    # trigger objects kept per electron and path
+    maxDeltaR = cms.double(2.0),
+    maxDPtRel = cms.double(1.0), # |pt(ele) - pt(obj)| / pt(obj)
+)
+
 ###########
 # Modifiers
 ###########
@@ -361,6 +376,7 @@ vbfSkimming2024.toModify(countTrgElectrons, minNumber = cms.uint32(0))
 
 # Trigger matching study
 triggerMatchingStudy.toModify(countTrgElectrons, minNumber = cms.uint32(0))
+triggerMatchingStudy.toReplaceWith(electronBParkTables, cms.Sequence(electronBParkTable + electronTrgMatchStudyTable))
 
 
 # Selection efficiency study (-> disable all cuts, store them as flags)
@@ -377,8 +393,7 @@ efficiencyStudy.toModify(electronBParkTable,
 efficiencyStudy.toModify(countTrgElectrons, minNumber = cms.uint32(0))
 
 # Regression study (-> save extra variables needed for regression training and application)
-regressionVars.toModify(electronsForAnalysis, saveRegressionVars = cms.bool(True))
-
+# the ones computed from the rechits are added by electronRegressionVarsTable, see dielectron_cff.py
 regressionVars.toModify(electronBParkTable, 
     variables = cms.PSet(
         electronBParkTable.variables,
@@ -392,7 +407,6 @@ regressionVars.toModify(electronBParkTable,
         seedEta = Var("seed().eta()",float,doc="eta of the supercluster seed",precision=10),
         seedPhi = Var("seed().phi()",float,doc="phi of the supercluster seed",precision=10),
         seedEnergy = Var("seed().energy()",float,doc="energy of the supercluster seed",precision=10),
-        e3x3 = Var("userFloat('e3x3')",float,doc="e3x3 of the supercluster, calculated with full 5x5 region",precision=10),
         e5x5 = Var("full5x5_e5x5()",float,doc="e5x5 of the supercluster, calculated with full 5x5 region",precision=10),
         sigmaietaiphi = Var("full5x5_showerShape().sigmaIetaIphi",float,doc="sigma_IetaIphi of the supercluster, calculated with full 5x5 region",precision=10),
         eMax = Var("full5x5_showerShape().eMax",float,doc="eMax of the supercluster, calculated with full 5x5 region",precision=10),
@@ -421,50 +435,6 @@ regressionVars.toModify(electronBParkTable,
         dEtaSeedSC = Var("seed().eta() - superCluster().eta() ",float,doc="delta eta (seed,track) with sign",precision=10),
         dPhiSeedSC = Var("seed().phi() - superCluster().phi() ",float,doc="delta phi (seed,track) with sign",precision=10),
 
-        iEtaOrX = Var("userInt('iEtaOrX')",int,doc="ieta of the supercluster seed"),
-        iPhiOrY = Var("userInt('iPhiOrY')",int,doc="iphi of the supercluster seed"),
-        iEtaMod5 = Var("userInt('iEtaMod5')",int,doc="ieta of the supercluster seed mod 5"),
-        iPhiMod2 = Var("userInt('iPhiMod2')",int,doc="iphi of the supercluster seed mod 2"),
-        iEtaMod20 = Var("userInt('iEtaMod20')",int,doc="ieta of the supercluster seed mod 20"),
-        iPhiMod20 = Var("userInt('iPhiMod20')",int,doc="iphi of the supercluster seed mod 20"),
-
-        etaCrySeed = Var("userInt('etaCrySeed')", int, doc="eta of seed in crystal indices"),
-        phiCrySeed = Var("userInt('phiCrySeed')", int, doc="phi of seed in crystal indices"),
-
-        eSubClusters = Var("userFloat('eSubClusters')",int,doc="number of subclusters in the supercluster"),
-        subClusterEnergy1 = Var("userFloat('subClusterEnergy1')",float,doc="energy of the first subcluster (excluding seed)",precision=10),
-        subClusterEta1 = Var("userFloat('subClusterEta1')",float,doc="eta of the first subcluster (excluding seed)",precision=10),
-        subClusterPhi1 = Var("userFloat('subClusterPhi1')",float,doc="phi of the first subcluster (excluding seed)",precision=10),
-        subClusterEmax1 = Var("userFloat('subClusterEmax1')",float,doc="Emax of the first subcluster (excluding seed)",precision=10),
-        subClusterE3x3_1 = Var("userFloat('subClusterE3x31')",float,doc="E3x3 of the first subcluster (excluding seed)",precision=10),
-        subClusterEnergy2 = Var("userFloat('subClusterEnergy2')",float,doc="energy of the second subcluster (excluding seed)",precision=10),
-        subClusterEta2 = Var("userFloat('subClusterEta2')",float,doc="eta of the second subcluster (excluding seed)",precision=10),
-        subClusterPhi2 = Var("userFloat('subClusterPhi2')",float,doc="phi of the second subcluster (excluding seed)",precision=10),
-        subClusterEmax2 = Var("userFloat('subClusterEmax2')",float,doc="Emax of the second subcluster (excluding seed)",precision=10),
-        subClusterE3x3_2 = Var("userFloat('subClusterE3x32')",float,doc="E3x3 of the second subcluster (excluding seed)",precision=10),
-        subClusterEnergy3 = Var("userFloat('subClusterEnergy3')",float,doc="energy of the third subcluster (excluding seed)",precision=10),
-        subClusterEta3 = Var("userFloat('subClusterEta3')",float,doc="eta of the third subcluster (excluding seed)",precision=10),
-        subClusterPhi3 = Var("userFloat('subClusterPhi3')",float,doc="phi of the third subcluster (excluding seed)",precision=10),
-        subClusterEmax3 = Var("userFloat('subClusterEmax3')",float,doc="Emax of the third subcluster (excluding seed)",precision=10),
-        subClusterE3x3_3 = Var("userFloat('subClusterE3x33')",float,doc="E3x3 of the third subcluster (excluding seed)",precision=10),
-
-        clusterMaxDR = Var("userFloat('clusterMaxDR')", float, doc = "maximum dR of subclusters wrt seed"),
-        clusterMaxDRDPhi = Var("userFloat('clusterMaxDRDPhi')", float, doc = "dphi of subcluster with maximum dR wrt seed"),
-        clusterMaxDRDEta = Var("userFloat('clusterMaxDRDEta')", float, doc = "deta of subcluster with maximum dR wrt seed"),
-        clusterMaxDRRawEnergy = Var("userFloat('clusterMaxDRRawEnergy')", float, doc = "raw energy of subcluster with maximum dR wrt seed"),
-
-        nPreshowerClusters = Var("userInt('nPreshowerClusters')",int,doc="number of preshower clusters in the supercluster"),
-        eESClusters = Var("userFloat('eESClusters')",float,doc="energy of the first preshower cluster",precision=10),
-        esClusterEnergy0 = Var("userFloat('esClusterEnergy0')",float,doc="energy of the first preshower cluster",precision=10),
-        esClusterEta0 = Var("userFloat('esClusterEta0')",float,doc="eta of the first preshower cluster",precision=10),
-        esClusterPhi0 = Var("userFloat('esClusterPhi0')",float,doc="phi of the first preshower cluster",precision=10),
-        esClusterEnergy1 = Var("userFloat('esClusterEnergy1')",float,doc="energy of the second preshower cluster",precision=10),
-        esClusterEta1 = Var("userFloat('esClusterEta1')",float,doc="eta of the second preshower cluster",precision=10),
-        esClusterPhi1 = Var("userFloat('esClusterPhi1')",float,doc="phi of the second preshower cluster",precision=10),
-        esClusterEnergy2 = Var("userFloat('esClusterEnergy2')",float,doc="energy of the third preshower cluster",precision=10),
-        esClusterEta2 = Var("userFloat('esClusterEta2')",float,doc="eta of the third preshower cluster",precision=10),
-        esClusterPhi2 = Var("userFloat('esClusterPhi2')",float,doc="phi of the third preshower cluster",precision=10),        
-
         isEB = Var("isEB()",bool,doc="is EB?"),
     )
 )
\ No newline at end of file
@@ -45,50 +45,49 @@ else:
 paths_OR = " || ".join([ 'path( "{:s}_v*" )'.format(path) for path in paths])
 
 # https://github.com/cms-sw/cmssw/blob/master/PhysicsTools/PatAlgos/plugins/PATTriggerObjectStandAloneUnpacker.cc
-myUnpackedPatTrigger = cms.EDProducer(
+myUnpackedPatTriggerGeneric = cms.EDProducer(
     "PATTriggerObjectStandAloneUnpacker",
     patTriggerObjectsStandAlone = cms.InputTag("slimmedPatTrigger"),
     triggerResults = cms.InputTag("TriggerResults::HLT"),
     unpackFilterLabels = cms.bool(True),
 )
 
-# https://github.com/cms-sw/cmssw/blob/master/PhysicsTools/PatAlgos/python/triggerLayer1/triggerMatcherExamples_cfi.py
-# https://github.com/cms-sw/cmssw/blob/master/PhysicsTools/PatAlgos/plugins/PATTriggerMatcher.cc
-myPFTriggerMatches = cms.EDProducer(
-    # "PATTriggerMatcherDEtaLessByDR", # match by DeltaEta only, best match by DeltaR
-    #"PATTriggerMatcherDEtaLessByDEta", # match by DeltaEta only, best match by DeltaEta
-    "PATTriggerMatcherDRDPtLessByR", # match by DeltaR only, best match by DeltaR
-    src = cms.InputTag("customSlimmedElectrons"),
+# same, keeping only the e/gamma objects of the paths / seeds above:
+# the only ones the matchers below can use
+myUnpackedPatTrigger = cms.EDProducer(
+    "PATTriggerObjectStandAloneUnpackerBPark",
+    patTriggerObjectsStandAlone = cms.InputTag("slimmedPatTrigger"),
+    triggerResults = cms.InputTag("TriggerResults::HLT"),
+    unpackFilterLabels = cms.bool(True),
+    paths = cms.vstring(paths),
+    seeds = cms.vstring(seeds),
+    # trigger::TriggerObjectType: TriggerPhoton, TriggerElectron, TriggerCluster,
+    # TriggerL1NoIsoEG, TriggerL1IsoEG, TriggerL1EG
+    triggerTypes = cms.vint32(81, 82, 92, -82, -83, -98),
+)
+
+# PF and lowPt electrons matched in one module, same criteria as PATTriggerMatcherDRDPtLessByR
+# (https://github.com/cms-sw/cmssw/blob/master/PhysicsTools/PatAlgos/plugins/PATTriggerMatcher.cc);
+# the index of the matched object in myUnpackedPatTrigger is stored for each electron ("pf" and "lowpt")
+myElectronTriggerMatches = cms.EDProducer(
+    "ElectronTriggerMatcher",
+    pfSrc = cms.InputTag("customSlimmedElectrons"),
+    lowptSrc = cms.InputTag("slimmedLowPtElectrons"),
+    # NB: PF and LP collections are matched separately;
+    #     they can be matched to the same trigger object
     matched = cms.InputTag("myUnpackedPatTrigger"),
     matchedCuts = cms.string(paths_OR), # e.g. 'path("HLT_DoubleEle6_eta1p22_mMax6_v*")'
     maxDeltaR = cms.double(0.3),
-    maxDPtRel = cms.double(0.5),
+    maxDPtRel = cms.double(0.5), # |pt(ele) - pt(obj)| / pt(obj)
     resolveAmbiguities    = cms.bool( True ), # only one match per trigger object
     resolveByMatchQuality = cms.bool( True ), # take best match found per reco object (e.g. by DeltaR)
 )
 
-myLPTriggerMatches = myPFTriggerMatches.clone(
-    src = cms.InputTag("slimmedLowPtElectrons"),
-    # NB: matching PF and LP collections separately;
-    #     they can be matched to the same trigger object
-)
-
-# https://github.com/cms-sw/cmssw/blob/master/PhysicsTools/PatAlgos/plugins/PATTriggerMatchEmbedder.cc
-mySlimmedPFElectronsWithEmbeddedTrigger = cms.EDProducer(
-    "PATTriggerMatchElectronEmbedder",
-    src = cms.InputTag("customSlimmedElectrons"),
-    matches = cms.VInputTag('myPFTriggerMatches'),
-)
-
-mySlimmedLPElectronsWithEmbeddedTrigger = cms.EDProducer(
-    "PATTriggerMatchElectronEmbedder",
-    src = cms.InputTag("slimmedLowPtElectrons"),
-    matches = cms.VInputTag('myLPTriggerMatches'),
-)
-
 electronTrgSelector = cms.EDProducer(
     "ElectronTriggerSelector",
-    electronCollection = cms.InputTag("mySlimmedPFElectronsWithEmbeddedTrigger"),
+    electronCollection = cms.InputTag("customSlimmedElectrons"),
+    matchedObjects = cms.InputTag("myUnpackedPatTrigger"),
+    matches = cms.InputTag("myElectronTriggerMatches", "pf"),
     bits = cms.InputTag("TriggerResults","","HLT"),
     prescales = cms.InputTag("patTrigger"),
     objects = cms.InputTag("slimmedPatTrigger"),
@@ -100,6 +99,7 @@ electronTrgSelector = cms.EDProducer(
     absEtaMax = cms.double(1.25),
     HLTPaths = cms.vstring(paths),
     L1seeds = cms.vstring(seeds),
+    packBits = cms.bool(False), # one firedPaths userInt (bit i = HLTPaths[i]) instead of one per path
 )
 
 # first skim based on trigger -- discard events that don't fire any of the paths
@@ -113,6 +113,17 @@ hltHighLevel = cms.EDFilter("HLTHighLevel",
                             throw = cms.bool(True),             # throw exception on unknown path names
 )
 
+# cheap electron count run right after hltHighLevel, before any electron producer:
+# countTrgElectrons needs at least two (PF or lowPt) electrons anyway
+preSkimElectrons = cms.EDProducer("CandViewMerger",
+    src = cms.VInputTag("slimmedElectrons", "slimmedLowPtElectrons"),
+)
+
+countPreSkimElectrons = cms.EDFilter("CandViewCountFilter",
+    src = cms.InputTag("preSkimElectrons"),
+    minNumber = cms.uint32(2),
+)
+
 #electronsTriggerSequence = cms.Sequence(
 #unpackedPatTrigger
 #    #myTriggerMatches
@@ -133,19 +144,10 @@ hltHighLevel = cms.EDFilter("HLTHighLevel",
 
 from DoubleElectronNANO.BParkingNano.modifiers_cff import *
 
-triggerMatchingStudy.toModify(myPFTriggerMatches,
-    maxDeltaR = cms.double(2.0),
-    maxDPtRel = cms.double(1.0),
-    resolveAmbiguities    = cms.bool( False ),
-    resolveByMatchQuality = cms.bool( False ),
-)
+# the open-cone matches of the study are stored by electronTrgMatchStudyTable
+# (electronsBPark_cff), the nominal matching is kept for isTriggering
 
-triggerMatchingStudy.toModify(myLPTriggerMatches,
-    maxDeltaR = cms.double(2.0),
-    maxDPtRel = cms.double(1.0),
-    resolveAmbiguities    = cms.bool( False ),
-    resolveByMatchQuality = cms.bool( False ),
-)
+packedTriggerBits.toModify(electronTrgSelector, packBits = True)
 
 triggerMatchingStudy.toModify(hltHighLevel,
     HLTPaths = cms.vstring([]) # disable HLT selection
@@ -192,4 +194,11 @@ vbfSkimming2024.toModify(hltHighLevel,
 
 efficiencyStudy.toModify(hltHighLevel,
     HLTPaths = cms.vstring([]) # disable HLT selection
-)
\ No newline at end of file
+)
+
+# keep the electron pre-count in sync with countTrgElectrons
+vbfSkimming2023_C.toModify(countPreSkimElectrons, minNumber = cms.uint32(0))
+vbfSkimming2023_D.toModify(countPreSkimElectrons, minNumber = cms.uint32(0))
+vbfSkimming2024.toModify(countPreSkimElectrons, minNumber = cms.uint32(0))
+triggerMatchingStudy.toModify(countPreSkimElectrons, minNumber = cms.uint32(0))
+efficiencyStudy.toModify(countPreSkimElectrons, minNumber = cms.uint32(0))
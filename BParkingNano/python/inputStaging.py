@@ -0,0 +1,101 @@
+'''
+Local staging cache for remote (xrootd) input files.
+
+Files are copied once into a cache directory, under their LFN
+(<cacheDir>/store/...), and the PoolSource reads them back as file: paths.
+The cache has a size cap: after staging, the least recently used files that
+are not needed by the current job are removed until the cache fits.
+
+For tests, sourceDir can point to a local directory laid out as the remote
+storage (<sourceDir>/store/...): files are then copied from there instead of
+going through xrdcp.
+'''
+from __future__ import print_function
+import fcntl
+import os
+import re
+import shutil
+import subprocess
+
+class InputStager(object):
+    def __init__(self, cacheDir, maxSizeGB=20., sourceDir=''):
+        self.cacheDir = os.path.abspath(cacheDir)
+        self.maxSize = int(maxSizeGB * 1024**3)
+        self.sourceDir = sourceDir
+
+    @staticmethod
+    def lfn(fileName):
+        '''LFN of a remote input file, None for files that are already local'''
+        if fileName.startswith('root://'):
+            idx = fileName.find('/store/')
+            return re.sub('/+', '/', fileName[idx:]) if idx >= 0 else None
+        if fileName.startswith('/store/'):
+            return re.sub('/+', '/', fileName)
+        return None
+
+    def localPath(self, lfn):
+        return os.path.join(self.cacheDir, lfn.lstrip('/'))
+
+    def fetch(self, fileName, lfn, dest):
+        if self.sourceDir:
+            shutil.copyfile(os.path.join(self.sourceDir, lfn.lstrip('/')), dest)
+        else:
+            url = fileName if fileName.startswith('root://') else 'root://cms-xrd-global.cern.ch/' + lfn
+            subprocess.check_call(['xrdcp', '--nopbar', '--force', url, dest])
+
+    def stage(self, fileNames):
+        '''Returns fileNames with the remote files replaced by their cached copy.
+        Files that cannot be fetched are left remote'''
+        if not os.path.isdir(self.cacheDir):
+            os.makedirs(self.cacheDir)
+        staged = []
+        # several jobs can share the same cache
+        with open(os.path.join(self.cacheDir, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            for fileName in fileNames:
+                lfn = self.lfn(fileName)
+                if lfn is None:
+                    staged.append(fileName)
+                    continue
+                path = self.localPath(lfn)
+                if os.path.isfile(path):
+                    os.utime(path, None) # mark as recently used
+                else:
+                    if not os.path.isdir(os.path.dirname(path)):
+                        os.makedirs(os.path.dirname(path))
+                    tmp = path + '.part'
+                    try:
+                        self.fetch(fileName, lfn, tmp)
+                    except (OSError, IOError, subprocess.CalledProcessError) as e:
+                        print('WARNING: could not stage %s (%s), reading it remotely' % (fileName, e))
+                        if os.path.exists(tmp):
+                            os.remove(tmp)
+                        staged.append(fileName)
+                        continue
+                    os.rename(tmp, path)
+                staged.append('file:' + path)
+            self.evict(keep = set(f[len('file:'):] for f in staged if f.startswith('file:')))
+        return staged
+
+    def cachedFiles(self):
+        files = []
+        for root, _, names in os.walk(self.cacheDir):
+            for name in names:
+                if name.endswith('.root'):
+                    files.append(os.path.join(root, name))
+        return files
+
+    def evict(self, keep=()):
+        '''Removes the least recently used files until the cache fits maxSize.
+        Files in keep (needed by the current job) are never removed'''
+        files = [(os.path.getmtime(f), os.path.getsize(f), f) for f in self.cachedFiles()]
+        total = sum(size for _, size, _ in files)
+        for _, size, fname in sorted(files):
+            if total <= self.maxSize:
+                break
+            if fname in keep:
+                continue
+            os.remove(fname)
+            total -= size
+        if total > self.maxSize:
+            print('WARNING: the inputs of this job alone exceed the staging cache size (%.1f GB)' % (total / 1024.**3))
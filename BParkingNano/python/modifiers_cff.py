@@ -10,4 +10,5 @@ vbfSkimming2023_D = cms.Modifier()
 vbfSkimming2024 = cms.Modifier()
 regressionVars = cms.Modifier()
 allowedNumScaleWeights = cms.Modifier()
-customBoostedTausTable = cms.Modifier()
\ No newline at end of file
+customBoostedTausTable = cms.Modifier()
+packedTriggerBits = cms.Modifier()
\ No newline at end of file
@@ -108,12 +108,14 @@ from DoubleElectronNANO.BParkingNano.electronsTrigger_cff import *
 def nanoAOD_customizeEle(process):
     process.nanoEleSequence = cms.Sequence(
         myUnpackedPatTrigger
-        +myPFTriggerMatches
-        +myLPTriggerMatches
-        +mySlimmedPFElectronsWithEmbeddedTrigger
-        +mySlimmedLPElectronsWithEmbeddedTrigger
-        +electronTrgSelector
-        +hltHighLevel)
+        +myElectronTriggerMatches
+        +electronTrgSelector)
+    # trigger skim, meant to be scheduled first in the path so that
+    # rejected events do not run the egamma and electron producers
+    process.nanoSkimSequence = cms.Sequence(
+        hltHighLevel
+        +preSkimElectrons
+        +countPreSkimElectrons)
     return process
 
 # def nanoAOD_customizeMuonTriggerBPark(process):
@@ -134,6 +136,11 @@ def nanoAOD_customizeElectronTriggerSelectionBPark(process):
 
 def nanoAOD_customizeTriggerBitsBPark(process):
     process.nanoSequence = cms.Sequence( process.nanoSequence + trgTables)
+    if process.trgTable.packBits.value():
+        # names of the packed bits, saved with the run metadata: bit i%32 of hltBits_<i/32>
+        # (l1Bits_<i/32>) is the i-th name of the comma-separated list
+        process.nanoMetadata.strings.trgBitsHLT = cms.string(','.join(process.trgTable.paths))
+        process.nanoMetadata.strings.trgBitsL1 = cms.string(','.join(process.trgTable.seeds))
     return process
 
 def nanoAOD_customizeDiElectron(process):
@@ -163,7 +170,8 @@ def nanoAOD_customizeNanoContent(process):
     custom_nanoSequenceOnlyData = cms.Sequence(cms.Sequence(protonTablesTask) + lhcInfoTable)
 
     custom_nanoSequence = cms.Sequence(custom_nanoSequenceCommon + custom_nanoSequenceOnlyData + custom_nanoSequenceOnlyFullSim)
-    process.nanoSequence = cms.Sequence( custom_nanoSequence + electronTriggerObjectBParkTables + l1bits )
+    # scheduled on its own path, gated by the dielectron selection (see run_nano_cfg.py)
+    process.nanoContentSequence = custom_nanoSequence
     return process
 
 from FWCore.ParameterSet.MassReplace import massSearchReplaceAnyInputTag
@@ -175,9 +183,16 @@ def nanoAOD_customizeMC(process, saveAllNanoContent=False):
         massSearchReplaceAnyInputTag(path, 'electronsForAnalysis:SelectedElectrons', 'selectedElectronsMCMatchEmbedded')
         massSearchReplaceAnyInputTag(path, 'tracksBPark:SelectedTracks', 'tracksBParkMCMatchEmbedded')
 
-        # modify the path to include mc-specific info
-        path.insert(0, nanoSequenceMC)
-        if saveAllNanoContent: path.insert(0, nanoSequenceMC_extra)
+        # modify the path to include mc-specific info, behind the trigger skim / path
+        # status filter if the path starts with it, so that rejected events skip the gen producers
+        first = 0
+        for gate in ('nanoSkimSequence', 'nanoDiEleStepFilter'):
+            try:
+                if hasattr(process, gate) and path.index(getattr(process, gate)) == 0: first = 1
+            except ValueError:
+                pass
+        path.insert(first, nanoSequenceMC)
+        if saveAllNanoContent: path.insert(first, nanoSequenceMC_extra)
         # path.replace(process.muonBParkSequence, process.muonBParkMC)
         path.replace(process.electronsBParkSequence, process.electronBParkMC)
         path.replace(process.tracksBParkSequence, process.tracksBParkMC)
@@ -82,15 +82,43 @@ trgTable = cms.EDProducer( "TrgBitTableProducer",
                                   'L1_DoubleJet40_Mass_Min450_LooseIsoEG15er2p1_RmOvlp_dR0p2',
                                   'L1_DoubleJet45_Mass_Min450_LooseIsoEG20er2p1_RmOvlp_dR0p2',
                                   ),
+                          # one uint32 bitmask per 32 paths / seeds (hltBits_N, l1Bits_N) instead of one column each
+                          packBits = cms.bool(False),
 )
 
 trgTables = cms.Sequence(trgTable)
 
+# trigger efficiency histograms filled in the job (triggerHistograms option):
+# leading / subleading electron of electronsForAnalysis, all events and per fired path / seed
+trgEfficiencyHistograms = cms.EDAnalyzer("TriggerEfficiencyHistogrammer",
+    src = cms.InputTag("electronsForAnalysis", "SelectedElectrons"),
+    trgTable = cms.InputTag("trgTable"),
+    cut = cms.string("userInt('isPFoverlap') == 0"),
+    paths = trgTable.paths,
+    seeds = trgTable.seeds,
+    packBits = trgTable.packBits,
+    histograms = cms.VPSet(
+        cms.PSet(name = cms.string("leadPt"), quantity = cms.string("leadPt"),
+                 bins = cms.vdouble(0, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 16, 20, 25, 30, 50)),
+        cms.PSet(name = cms.string("subleadPt"), quantity = cms.string("subleadPt"),
+                 bins = cms.vdouble(0, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 20, 30)),
+        cms.PSet(name = cms.string("leadEta"), quantity = cms.string("leadEta"),
+                 bins = cms.vdouble([-2.5 + 0.1 * i for i in range(51)])),
+        cms.PSet(name = cms.string("subleadEta"), quantity = cms.string("subleadEta"),
+                 bins = cms.vdouble([-2.5 + 0.1 * i for i in range(51)])),
+        cms.PSet(name = cms.string("dR"), quantity = cms.string("dR"),
+                 bins = cms.vdouble([0.05 * i for i in range(41)])),
+    ),
+)
+
 ###########
 # Modifiers
 ###########
 
-# from DoubleElectronNANO.BParkingNano.modifiers_cff import *
+from DoubleElectronNANO.BParkingNano.modifiers_cff import *
+
+packedTriggerBits.toModify(trgTable, packBits = True)
+packedTriggerBits.toModify(trgEfficiencyHistograms, packBits = True)
 
 # old modifier:
 # DiEle.toModify(trgTable, paths = [], seeds = [])
@@ -0,0 +1,71 @@
+'''
+Small helpers shared by the benchmark scripts in this directory:
+run cmsRun on run_nano_cfg.py and collect timing / memory figures
+'''
+import os
+import re
+import subprocess
+import time
+
+def cmsrun(cfg, options, log_path, cwd=None):
+  '''Runs "cmsRun cfg options", with stdout and stderr in log_path.
+  Returns a dict with exit code, wall / cpu time [s] and peak RSS [MB]
+  together with what could be parsed from the framework summary'''
+  start = time.time()
+  with open(log_path, 'w') as log:
+    proc = subprocess.Popen(['cmsRun', cfg] + list(options), stdout=log, stderr=subprocess.STDOUT, cwd=cwd)
+    _, status, usage = os.wait4(proc.pid, 0)
+  wall = time.time() - start
+
+  ret = parse_summary(open(log_path).read())
+  ret.update({
+    'exit' : os.waitstatus_to_exitcode(status),
+    'wall' : wall,
+    'cpu' : usage.ru_utime + usage.ru_stime,
+    'rss' : usage.ru_maxrss / 1024., # ru_maxrss is in kB on linux
+  })
+  return ret
+
+def parse_summary(log):
+  '''Extracts the number of processed events, the event loop time and the
+  throughput from the summary printed by cmsRun with wantSummary=True'''
+  ret = {'events' : None, 'loop' : None, 'cpu_loop' : None, 'throughput' : None}
+  match = re.search(r'TrigReport Events total = (\d+)', log)
+  if match:
+    ret['events'] = int(match.group(1))
+  match = re.search(r'Time Summary:.*?- Total loop:\s*([\d.eE+-]+)', log, re.S)
+  if match:
+    ret['loop'] = float(match.group(1))
+  match = re.search(r'CPU Summary:.*?- Total loop:\s*([\d.eE+-]+)', log, re.S)
+  if match:
+    ret['cpu_loop'] = float(match.group(1))
+  match = re.search(r'Event Throughput:\s*([\d.eE+-]+)\s*ev/s', log)
+  if match:
+    ret['throughput'] = float(match.group(1))
+  return ret
+
+def parse_module_summary(log):
+  '''Per-module real time per event [s] from the TimeReport module summary
+  printed by cmsRun with wantSummary=True'''
+  if 'TimeReport ---------- Module Summary ---[Real sec]----' not in log:
+    return {}
+  modules = log.split('TimeReport ---------- Module Summary ---[Real sec]----')[1].split('T---Report end!')[0]
+  module_times = {}
+  for l in modules.split('\n'):
+    line = l.strip()
+    if not line: continue
+    if line.endswith('Name'): continue
+    info = line.split()
+    module_times[info[-1]] = float(info[1])
+  return module_times
+
+def print_table(header, rows):
+  widths = [max(len(str(i)) for i in column) for column in zip(header, *rows)]
+  line = '-' * (sum(widths) + 3 * len(widths) + 1)
+  fmt = '| ' + ' | '.join('%%%ds' % i for i in widths) + ' |'
+  print(line)
+  print(fmt % tuple(header))
+  print(line)
+  for row in rows:
+    print(fmt % tuple(row))
+  print(line)
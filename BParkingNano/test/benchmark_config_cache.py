@@ -0,0 +1,41 @@
+'''
+Startup benchmark for the configuration cache: times the construction of the
+process of run_nano_cfg.py without cache, with an empty cache (cold, builds
+and stores it) and with a filled cache (warm, loads it back).
+
+Example:
+  python3 benchmark_config_cache.py --repeat 3 -- year=2023 mode=reco
+'''
+import os
+import shutil
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from bench_utils import print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='configuration to benchmark')
+parser.add_argument('--cacheDir', default='benchmark_config_cache', help='cache directory, wiped before the cold run')
+parser.add_argument('--repeat', type=int, default=3, help='number of measurements per configuration')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+def construct(extra):
+  '''Runs the configuration in python (no event processing), returns the wall time'''
+  start = time.time()
+  subprocess.check_call([sys.executable, args.cfg] + args.options + extra, stdout=subprocess.DEVNULL)
+  return time.time() - start
+
+timings = {'no cache' : [], 'cold' : [], 'warm' : []}
+for _ in range(args.repeat):
+  timings['no cache'].append(construct([]))
+  shutil.rmtree(args.cacheDir, ignore_errors=True)
+  timings['cold'].append(construct(['configCache=%s' % args.cacheDir]))
+  timings['warm'].append(construct(['configCache=%s' % args.cacheDir]))
+
+rows = []
+for name in ['no cache', 'cold', 'warm']:
+  vals = timings[name]
+  rows.append((name, '%.2f' % min(vals), '%.2f' % (sum(vals) / len(vals))))
+print_table(['configuration', 'min [s]', 'mean [s]'], rows)
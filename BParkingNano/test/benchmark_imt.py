@@ -0,0 +1,56 @@
+'''
+Measures the effect of enableIMT on the output: runs run_nano_cfg.py with and
+without ROOT implicit MT at the same number of threads and compares the "I/O"
+group of time_analysis.py (modules whose label ends with "output") with the
+total wall time.
+
+Example:
+  python3 benchmark_imt.py --nThreads 4 --maxEvents 5000 -- year=2023
+'''
+import os
+from argparse import ArgumentParser
+from bench_utils import cmsrun, parse_module_summary, print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration to benchmark')
+parser.add_argument('--nThreads', type=int, default=4, help='framework threads, IMT needs more than one')
+parser.add_argument('--maxEvents', type=int, default=5000, help='events to process in each configuration')
+parser.add_argument('--outdir', default='benchmark_imt', help='where logs and outputs are written')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+cfg = os.path.abspath(args.cfg)
+
+results = {}
+for imt in [0, 1]:
+  tag = 'T%dIMT%d' % (args.nThreads, imt)
+  print('running with enableIMT=%d...' % imt)
+  res = cmsrun(
+    cfg,
+    ['enableIMT=%d' % imt, 'nThreads=%d' % args.nThreads, 'wantSummary=1',
+     'maxEvents=%d' % args.maxEvents, 'tag=%s' % tag] + args.options,
+    os.path.join(args.outdir, 'nano_%s.log' % tag),
+    cwd = args.outdir
+  )
+  if res['exit'] != 0:
+    raise RuntimeError('cmsRun failed with exit code %d, see the log' % res['exit'])
+  modules = parse_module_summary(open(os.path.join(args.outdir, 'nano_%s.log' % tag)).read())
+  res['io'] = sum(t for name, t in modules.items() if name.endswith('output'))
+  results[imt] = res
+
+rows = []
+for imt, res in sorted(results.items()):
+  events = res['events'] if res['events'] is not None else args.maxEvents
+  rows.append((
+    'on' if imt else 'off', events,
+    '%.4f' % res['io'], '%.1f' % res['wall'],
+    '%.1f%%' % (100. * res['io'] * events / res['wall']),
+  ))
+print_table(['IMT', 'events', 'I/O [s/evt]', 'wall [s]', 'I/O / wall'], rows)
+
+off, on = results[0], results[1]
+print('wall time recovered: %.1f s (%.1f%%), I/O group: %.4f -> %.4f s/evt' % (
+  off['wall'] - on['wall'], 100. * (off['wall'] - on['wall']) / off['wall'], off['io'], on['io']
+))
@@ -0,0 +1,100 @@
+'''
+Time per event of the electron merger (electronsForAnalysis, FastTimerService)
+in the current build, together with the mean number of low-pT electrons per
+event of the output, so that builds can be compared on a sample with many
+low-pT electrons. With --allocs the job also counts its memory allocations
+(SimpleAllocMonitor, the allocator hooks are preloaded): the rest of the job
+being the same, the difference between builds is the merger's.
+Each build is run from its own area with its own --tag, its results go to
+<outdir>/merger_<tag>.json, and --compare tabulates them.
+
+Example:
+  python3 benchmark_merger.py --tag before --maxEvents 2000 -- inputFiles=file:busy.root
+  python3 benchmark_merger.py --tag after --maxEvents 2000 --allocs -- inputFiles=file:busy.root
+  python3 benchmark_merger.py --compare benchmark_merger/merger_before.json benchmark_merger/merger_after.json
+'''
+import glob
+import json
+import os
+import re
+from argparse import ArgumentParser
+from bench_utils import cmsrun, print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration to benchmark')
+parser.add_argument('--maxEvents', type=int, default=2000, help='events to process')
+parser.add_argument('--outdir', default='benchmark_merger', help='where logs, outputs and results are written')
+parser.add_argument('--tag', default='HEAD', help='name of this build in the results')
+parser.add_argument('--allocs', action='store_true', help='count the memory allocations of the job')
+parser.add_argument('--compare', nargs='+', default=None, help='merger_<tag>.json files to tabulate, nothing is run')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+columns = ['build', 'merger [ms/evt]', 'low-pT ele/evt', 'allocs/evt', 'RSS [MB]', 'events/s']
+
+def row(res):
+  allocs = '%.0f' % res['allocs'] if res.get('allocs') is not None else '-'
+  return (res['tag'], '%.3f' % res['merger'], '%.2f' % res['lowpt'], allocs, '%.0f' % res['rss'], '%.2f' % res['throughput'])
+
+if args.compare:
+  results = [json.load(open(fname)) for fname in args.compare]
+  print_table(columns, [row(res) for res in results])
+  reference = results[0]['merger']
+  for res in results[1:]:
+    if res['merger'] > 0:
+      print('%s: merger %.2fx faster than %s' % (res['tag'], reference / res['merger'], results[0]['tag']))
+  raise SystemExit(0)
+
+def merger_time(fname):
+  '''real time per processed event [ms] of electronsForAnalysis, from the FastTimerService JSON'''
+  with open(fname) as infile:
+    modules = json.load(infile)['modules']
+  nevents = max(modules[0]['events'], 1)
+  return sum(i['time_real'] for i in modules if i['label'] == 'electronsForAnalysis') / nevents
+
+def lowpt_multiplicity(outdir, tag):
+  '''mean number of low-pT electrons per event in the NANO output of the job'''
+  import ROOT
+  ROOT.gROOT.SetBatch(True)
+  chain = ROOT.TChain('Events')
+  for fname in glob.glob(os.path.join(outdir, '*%s*.root' % tag)):
+    chain.Add(fname)
+  nevents = chain.GetEntries()
+  if not nevents:
+    return 0.
+  chain.Draw('Sum$(Electron_isLowPt)>>lowpt', '', 'goff')
+  return ROOT.gDirectory.Get('lowpt').GetMean()
+
+def allocations(log):
+  '''number of allocation calls of the job from the SimpleAllocMonitor report, None if absent'''
+  match = re.search(r'(?<!de)allocations calls:\s*(\d+)', open(log).read())
+  return int(match.group(1)) if match else None
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+cfg = os.path.abspath(args.cfg)
+
+options = ['maxEvents=%d' % args.maxEvents, 'tag=%s' % args.tag, 'timingReport=timing_%s' % args.tag]
+if args.allocs:
+  os.environ['LD_PRELOAD'] = 'libPerfToolsAllocMonitorPreload.so'
+  options.append('allocMonitor=True')
+
+print('running %s...' % args.tag)
+log = os.path.join(args.outdir, 'nano_%s.log' % args.tag)
+res = cmsrun(cfg, options + args.options, log, cwd = args.outdir)
+if res['exit'] != 0:
+  raise SystemExit('cmsRun failed with exit code %d, see the log' % res['exit'])
+
+nevents = res['events'] or args.maxEvents
+allocs = allocations(log) if args.allocs else None
+result = {
+  'tag' : args.tag,
+  'merger' : merger_time(os.path.join(args.outdir, 'timing_%s.json' % args.tag)),
+  'lowpt' : lowpt_multiplicity(args.outdir, args.tag),
+  'allocs' : float(allocs) / nevents if allocs is not None else None,
+  'rss' : res['rss'],
+  'throughput' : res['throughput'] if res['throughput'] is not None else nevents / res['wall'],
+}
+with open(os.path.join(args.outdir, 'merger_%s.json' % args.tag), 'w') as outfile:
+  json.dump(result, outfile, indent=2)
+print_table(columns, [row(result)])
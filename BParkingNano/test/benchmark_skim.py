@@ -0,0 +1,44 @@
+'''
+Compares the CPU time per event with the trigger skim at the end of the
+electron sequence (skimFirst=0, old layout) and at the front of
+nanoAOD_DiEle_step (skimFirst=1). The default input of run_nano_cfg.py for
+2023 data is a ParkingDoubleElectronLowMass file.
+
+Example:
+  python3 benchmark_skim.py --maxEvents 5000 -- year=2023
+'''
+import os
+from argparse import ArgumentParser
+from bench_utils import cmsrun, print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration to benchmark')
+parser.add_argument('--maxEvents', type=int, default=5000, help='events to process in each configuration')
+parser.add_argument('--outdir', default='benchmark_skim', help='where logs and outputs are written')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+cfg = os.path.abspath(args.cfg)
+
+rows = []
+for skim_first in [0, 1]:
+  tag = 'skimFirst%d' % skim_first
+  print('running with skimFirst=%d...' % skim_first)
+  res = cmsrun(
+    cfg,
+    ['skimFirst=%d' % skim_first, 'maxEvents=%d' % args.maxEvents, 'tag=%s' % tag] + args.options,
+    os.path.join(args.outdir, 'nano_%s.log' % tag),
+    cwd = args.outdir
+  )
+  if res['exit'] != 0:
+    print('  cmsRun failed with exit code %d, see the log' % res['exit'])
+    continue
+
+  events = res['events'] if res['events'] is not None else args.maxEvents
+  # CPU time of the event loop only, fall back to the whole job
+  cpu = res['cpu_loop'] if res['cpu_loop'] is not None else res['cpu']
+  rows.append((tag, events, '%.1f' % cpu, '%.4f' % (cpu / events), '%.0f' % res['rss']))
+
+print_table(['layout', 'events', 'CPU [s]', 'CPU/evt [s]', 'RSS [MB]'], rows)
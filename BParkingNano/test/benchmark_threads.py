@@ -0,0 +1,56 @@
+'''
+Thread-scaling benchmark: runs run_nano_cfg.py on the same input with
+different numbers of threads and reports events/s, CPU efficiency and
+peak RSS for each configuration.
+
+Example:
+  python3 benchmark_threads.py --threads 1,2,4,8 --maxEvents 2000 -- year=2023 mode=reco
+'''
+import os
+from argparse import ArgumentParser
+from bench_utils import cmsrun, print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration to benchmark')
+parser.add_argument('--threads', default='1,2,4,8', help='comma-separated list of thread counts')
+parser.add_argument('--streams', default='', help='comma-separated list of stream counts, same as threads if not given')
+parser.add_argument('--maxEvents', type=int, default=2000, help='events to process in each configuration')
+parser.add_argument('--outdir', default='benchmark_threads', help='where logs and outputs are written')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+threads = [int(i) for i in args.threads.split(',')]
+streams = [int(i) for i in args.streams.split(',')] if args.streams else threads
+if len(streams) != len(threads):
+  raise ValueError('--threads and --streams must have the same length')
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+cfg = os.path.abspath(args.cfg)
+
+rows = []
+for nthreads, nstreams in zip(threads, streams):
+  tag = 'T%dS%d' % (nthreads, nstreams)
+  print('running with %d threads and %d streams...' % (nthreads, nstreams))
+  res = cmsrun(
+    cfg,
+    ['nThreads=%d' % nthreads, 'nStreams=%d' % nstreams,
+     'maxEvents=%d' % args.maxEvents, 'tag=%s' % tag] + args.options,
+    os.path.join(args.outdir, 'nano_%s.log' % tag),
+    cwd = args.outdir
+  )
+  if res['exit'] != 0:
+    print('  cmsRun failed with exit code %d, see the log' % res['exit'])
+    continue
+
+  events = res['events'] if res['events'] is not None else args.maxEvents
+  # the framework throughput excludes the job initialisation, fall back to the wall time
+  throughput = res['throughput'] if res['throughput'] else events / res['wall']
+  rows.append((
+    nthreads, nstreams, events,
+    '%.1f' % res['wall'], '%.2f' % throughput,
+    '%.1f%%' % (100. * res['cpu'] / (res['wall'] * nthreads)),
+    '%.0f' % res['rss'],
+  ))
+
+print_table(['threads', 'streams', 'events', 'wall [s]', 'events/s', 'CPU eff.', 'RSS [MB]'], rows)
@@ -0,0 +1,55 @@
+'''
+Compares the BPark trigger object unpacker (triggerUnpacker=bpark, e/gamma
+objects of the configured paths / seeds only) with the generic
+PATTriggerObjectStandAloneUnpacker (triggerUnpacker=generic): time per event of
+the unpacker and of the trigger matcher reading its output (FastTimerService),
+peak RSS and throughput of the job.
+
+Example:
+  python3 benchmark_trigger_unpacker.py --maxEvents 5000 -- year=2023
+'''
+import json
+import os
+from argparse import ArgumentParser
+from bench_utils import cmsrun, print_table
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration to benchmark')
+parser.add_argument('--maxEvents', type=int, default=5000, help='events to process in each configuration')
+parser.add_argument('--outdir', default='benchmark_trigger_unpacker', help='where logs and outputs are written')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+cfg = os.path.abspath(args.cfg)
+
+def module_times(fname, labels):
+  '''real time per processed event [ms] of the given modules, from the FastTimerService JSON'''
+  with open(fname) as infile:
+    modules = json.load(infile)['modules']
+  nevents = max(modules[0]['events'], 1)
+  return {i['label'] : i['time_real'] / nevents for i in modules if i['label'] in labels}
+
+rows = []
+for unpacker in ['generic', 'bpark']:
+  print('running with triggerUnpacker=%s...' % unpacker)
+  res = cmsrun(
+    cfg,
+    ['triggerUnpacker=%s' % unpacker, 'maxEvents=%d' % args.maxEvents, 'tag=%s' % unpacker,
+     'timingReport=timing_%s' % unpacker] + args.options,
+    os.path.join(args.outdir, 'nano_%s.log' % unpacker),
+    cwd = args.outdir
+  )
+  if res['exit'] != 0:
+    print('  cmsRun failed with exit code %d, see the log' % res['exit'])
+    continue
+
+  times = module_times(os.path.join(args.outdir, 'timing_%s.json' % unpacker),
+                       ['myUnpackedPatTrigger', 'myElectronTriggerMatches'])
+  matcher = times.get('myElectronTriggerMatches', 0.)
+  throughput = res['throughput'] if res['throughput'] is not None else (res['events'] or args.maxEvents) / res['wall']
+  rows.append((unpacker, '%.3f' % times.get('myUnpackedPatTrigger', 0.), '%.3f' % matcher,
+               '%.0f' % res['rss'], '%.2f' % throughput))
+
+print_table(['unpacker', 'unpacker [ms/evt]', 'matcher [ms/evt]', 'RSS [MB]', 'events/s'], rows)
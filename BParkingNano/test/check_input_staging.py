@@ -0,0 +1,86 @@
+'''
+Check of the input staging (stageDir / stageSource options of run_nano_cfg.py):
+stages a list of fake remote files from a local directory laid out as the
+remote storage, and checks the rewritten fileNames, the copy fallback for
+files that cannot be fetched and the reuse of the cache. Also checks that
+run_nano_cfg.py registers the staging options the way validate_pr.sh looks
+for them before passing them.
+
+With --cfg (needs cmsenv) the same is checked on process.source.fileNames of
+the configuration, run with stageDir and stageSource.
+
+Example:
+  python3 check_input_staging.py [--cfg run_nano_cfg.py]
+'''
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from DoubleElectronNANO.BParkingNano.inputStaging import InputStager
+
+parser = ArgumentParser()
+parser.add_argument('--cfg', default='', help='also check process.source.fileNames of this configuration')
+args = parser.parse_args()
+
+FILES = [
+  'root://cms-xrd-global.cern.ch//store/data/Run2023D/A/MINIAOD/0/a.root',
+  '/store/mc/Run3Summer23/B/MINIAODSIM/0/b.root',
+  'file:/local/c.root',                            # local, left as is
+  '/store/data/Run2023D/A/MINIAOD/0/missing.root', # not in the source, read remotely
+]
+
+def expected(cacheDir):
+  return [
+    'file:' + os.path.join(cacheDir, 'store/data/Run2023D/A/MINIAOD/0/a.root'),
+    'file:' + os.path.join(cacheDir, 'store/mc/Run3Summer23/B/MINIAODSIM/0/b.root'),
+    'file:/local/c.root',
+    '/store/data/Run2023D/A/MINIAOD/0/missing.root',
+  ]
+
+def check(name, found, wanted):
+  if found != wanted:
+    print('FAILED %s:\n  found    %s\n  expected %s' % (name, found, wanted))
+    sys.exit(1)
+  print('OK', name)
+
+def fill_source(sourceDir):
+  for fname in FILES[:2]:
+    path = os.path.join(sourceDir, InputStager.lfn(fname).lstrip('/'))
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as out:
+      out.write(fname)
+
+# same pattern as supported() in validate_pr.sh
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_nano_cfg.py')) as cfg:
+  source = cfg.read()
+check('staging options registered', [o for o in ('stageDir', 'stageCacheGB', 'stageSource') if "options.register('%s'" % o not in source], [])
+
+workdir = tempfile.mkdtemp(prefix='check_input_staging_')
+try:
+  sourceDir = os.path.join(workdir, 'source')
+  cacheDir = os.path.join(workdir, 'cache')
+  fill_source(sourceDir)
+
+  stager = InputStager(cacheDir, 1., sourceDir)
+  check('staged fileNames', stager.stage(FILES), expected(cacheDir))
+  with open(os.path.join(cacheDir, 'store/data/Run2023D/A/MINIAOD/0/a.root')) as staged:
+    check('staged content', staged.read(), FILES[0])
+  check('no partial file left', [f for f in os.listdir(os.path.join(cacheDir, 'store/data/Run2023D/A/MINIAOD/0')) if f.endswith('.part')], [])
+
+  # second job on the same cache, the copies are reused
+  shutil.rmtree(sourceDir)
+  check('cached fileNames', InputStager(cacheDir, 1., sourceDir).stage(FILES), expected(cacheDir))
+
+  if args.cfg:
+    cfgCache = os.path.join(workdir, 'cfg_cache')
+    fill_source(sourceDir)
+    dump = subprocess.check_output([sys.executable, '-c',
+      'import sys; sys.argv = sys.argv[1:]; exec(open(sys.argv[0]).read()); print("fileNames=" + ",".join(process.source.fileNames))',
+      args.cfg, 'maxEvents=1', 'stageDir=%s' % cfgCache, 'stageSource=%s' % sourceDir] + ['inputFiles=%s' % f for f in FILES],
+      universal_newlines=True)
+    fileNames = [l for l in dump.split('\n') if l.startswith('fileNames=')][-1][len('fileNames='):].split(',')
+    check('%s process.source.fileNames' % args.cfg, fileNames, expected(cfgCache))
+finally:
+  shutil.rmtree(workdir)
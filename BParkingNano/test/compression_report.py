@@ -0,0 +1,114 @@
+'''
+Re-encodes an existing DoubleElectronNANO file with each of the NANOAODoutput
+compression profiles and reports write time, read-back time of the
+DiElectron_* / Electron_* branches and bytes per event.
+
+Example:
+  python3 compression_report.py DoubleElectronNANO_Run3_2023_data_allNano_150X.root
+'''
+import os
+import time
+from argparse import ArgumentParser
+import ROOT
+from DoubleElectronNANO.BParkingNano.compression_cff import compressionProfiles
+from bench_utils import print_table
+
+parser = ArgumentParser()
+parser.add_argument('infile', help='DoubleElectronNANO file to re-encode')
+parser.add_argument('--profiles', default=','.join(compressionProfiles), help='comma-separated list of profiles to test')
+parser.add_argument('--branches', default='nDiElectron,DiElectron_*,nElectron,Electron_*', help='comma-separated list of branches to read back')
+parser.add_argument('--outdir', default='compression_report', help='where the re-encoded files are written')
+parser.add_argument('--keep', action='store_true', help='keep the re-encoded files')
+args = parser.parse_args()
+
+ROOT.gROOT.SetBatch(True)
+# entry loop in C++, a python loop would dominate the read-back time
+ROOT.gInterpreter.Declare('''
+Long64_t compressionReportReadAll(TTree *tree) {
+  Long64_t nbytes = 0;
+  for (Long64_t i = 0, n = tree->GetEntries(); i < n; ++i) nbytes += tree->GetEntry(i);
+  return nbytes;
+}
+''')
+
+algorithms = {
+  'ZLIB' : ROOT.RCompressionSetting.EAlgorithm.kZLIB,
+  'LZMA' : ROOT.RCompressionSetting.EAlgorithm.kLZMA,
+  'LZ4'  : ROOT.RCompressionSetting.EAlgorithm.kLZ4,
+  'ZSTD' : ROOT.RCompressionSetting.EAlgorithm.kZSTD,
+}
+
+def reencode(infile, outfile, settings):
+  '''Copies all the trees and objects of infile into outfile, recompressing
+  every branch with the given settings. Returns the elapsed time'''
+  start = time.time()
+  tin = ROOT.TFile.Open(infile)
+  tout = ROOT.TFile(outfile, 'RECREATE', '', settings)
+  # older cycles of an object (Events;1 next to Events;2) are skipped,
+  # Get returns the latest one
+  names = []
+  for key in tin.GetListOfKeys():
+    if key.GetName() not in names:
+      names.append(key.GetName())
+  for name in names:
+    obj = tin.Get(name)
+    tout.cd()
+    if obj.InheritsFrom('TTree'):
+      # CloneTree keeps the compression of the input branches, reset it
+      # before copying the entries so that every basket is recompressed
+      clone = obj.CloneTree(0)
+      for branch in clone.GetListOfBranches():
+        branch.SetCompressionSettings(settings)
+      clone.CopyEntries(obj)
+      clone.Write()
+    else:
+      obj.Write(name)
+  tout.Close()
+  tin.Close()
+  return time.time() - start
+
+def read_back(fname, branches):
+  '''Reads the requested branches of all the events, returns elapsed time
+  and the compressed size of those branches'''
+  tfile = ROOT.TFile.Open(fname)
+  tree = tfile.Get('Events')
+  tree.SetBranchStatus('*', 0)
+  zipbytes = 0
+  for pattern in branches:
+    tree.SetBranchStatus(pattern, 1)
+  for branch in tree.GetListOfBranches():
+    if tree.GetBranchStatus(branch.GetName()):
+      zipbytes += branch.GetZipBytes('*')
+  start = time.time()
+  ROOT.compressionReportReadAll(tree)
+  elapsed = time.time() - start
+  tfile.Close()
+  return elapsed, zipbytes
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+
+tfile = ROOT.TFile.Open(args.infile)
+nevents = tfile.Get('Events').GetEntries()
+tfile.Close()
+branches = args.branches.split(',')
+
+rows = []
+for profile in args.profiles.split(','):
+  algorithm, level = compressionProfiles[profile]
+  settings = ROOT.CompressionSettings(algorithms[algorithm], level)
+  outfile = os.path.join(args.outdir, '%s.root' % profile)
+  print('re-encoding with %s (%s %d)...' % (profile, algorithm, level))
+  write = reencode(args.infile, outfile, settings)
+  read, zipbytes = read_back(outfile, branches)
+  rows.append((
+    profile, '%s %d' % (algorithm, level),
+    '%.2f' % write, '%.2f' % read,
+    '%.0f' % (os.path.getsize(outfile) / float(nevents)),
+    '%.0f' % (zipbytes / float(nevents)),
+  ))
+  if not args.keep:
+    os.remove(outfile)
+
+print('%d events in %s' % (nevents, args.infile))
+print_table(['profile', 'setting', 'write [s]', 'read [s]', 'file B/evt', 'read branches B/evt'], rows)
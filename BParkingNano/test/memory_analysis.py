@@ -0,0 +1,106 @@
+'''
+Memory report from the log of a job run with memoryCheck=True.
+
+SimpleMemoryCheck prints a line every time a module (or the end of an event)
+raises the VSIZE or RSS peak of the job. From those lines the modules are
+ranked by the memory they added to the peak, the growth of the peak with the
+events is fitted and, if it still grows in the late part of the run, the
+modules responsible for the late increases are flagged as leak candidates.
+Events are numbered with the "Begin processing" lines: run with reportEvery=1
+for an exact attribution.
+
+Example:
+  cmsRun run_nano_cfg.py memoryCheck=True reportEvery=1 maxEvents=5000 &> memory.log
+  python3 memory_analysis.py memory.log
+'''
+import re
+from argparse import ArgumentParser
+from collections import defaultdict
+from bench_utils import print_table
+
+parser = ArgumentParser()
+parser.add_argument('log', help='cmsRun log with the SimpleMemoryCheck output')
+parser.add_argument('--top', type=int, default=20, help='number of modules listed')
+parser.add_argument('--late', type=float, default=0.5, help='fraction of the run, at the end, used to look for leaks')
+parser.add_argument('--leakThreshold', type=float, default=1., help='RSS growth flagged as a leak [MB / 1000 events]')
+args = parser.parse_args()
+
+record_re = re.compile(r'Begin processing the (\d+)\w\w record')
+memory_re = re.compile(r'MemoryCheck: (\w+) (\S*):(\S*) VSIZE ([\d.]+) ([-\d.]+) RSS ([\d.]+) ([-\d.]+)')
+
+def parse(fname):
+  records = []
+  event = 0
+  with open(fname) as log:
+    for line in log:
+      match = record_re.search(line)
+      if match:
+        event = int(match.group(1))
+        continue
+      match = memory_re.search(line)
+      if match:
+        kind, name, label, vsize, dvsize, rss, drss = match.groups()
+        records.append({
+          'event' : event, 'kind' : kind,
+          'module' : '%s:%s' % (name, label) if kind == 'module' else kind,
+          'vsize' : float(vsize), 'dvsize' : float(dvsize),
+          'rss' : float(rss), 'drss' : float(drss),
+        })
+  return records, event
+
+def slope(points):
+  '''least squares slope of (x, y) points'''
+  if len(points) < 2:
+    return 0.
+  n = float(len(points))
+  mx = sum(x for x, _ in points) / n
+  my = sum(y for _, y in points) / n
+  den = sum((x - mx)**2 for x, _ in points)
+  return sum((x - mx) * (y - my) for x, y in points) / den if den else 0.
+
+records, nevents = parse(args.log)
+if not records:
+  raise RuntimeError('no MemoryCheck lines in %s, was the job run with memoryCheck=True?' % args.log)
+
+peak = max(records, key=lambda x: x['rss'])
+print('%s: %d events, RSS %.1f -> %.1f MB, VSIZE %.1f -> %.1f MB' % (
+  args.log, nevents, records[0]['rss'], records[-1]['rss'], records[0]['vsize'], records[-1]['vsize']))
+print('peak RSS %.1f MB at event %d, in %s\n' % (peak['rss'], peak['event'], peak['module']))
+
+# modules ranked by the memory they added to the peak
+modules = defaultdict(lambda: {'increases' : 0, 'drss' : 0., 'max_drss' : 0., 'dvsize' : 0., 'peak' : 0., 'last' : 0})
+for rec in records:
+  mod = modules[rec['module']]
+  mod['increases'] += 1
+  mod['drss'] += max(rec['drss'], 0.)
+  mod['max_drss'] = max(mod['max_drss'], rec['drss'])
+  mod['dvsize'] += max(rec['dvsize'], 0.)
+  mod['peak'] = max(mod['peak'], rec['rss'])
+  mod['last'] = rec['event']
+
+rows = []
+for name, mod in sorted(modules.items(), key=lambda x: -x[1]['drss'])[:args.top]:
+  rows.append((name, mod['increases'], '%.1f' % mod['drss'], '%.1f' % mod['max_drss'],
+               '%.1f' % mod['dvsize'], '%.1f' % mod['peak'], mod['last']))
+print('Modules raising the memory peak (retained = sum of their RSS increases)')
+print_table(['module', 'increases', 'retained RSS [MB]', 'max step [MB]', 'VSIZE [MB]', 'RSS after [MB]', 'last event'], rows)
+
+# growth of the peak with the events, over the whole run and its late part
+points = [(rec['event'], rec['rss']) for rec in records if rec['event'] > 0]
+late_start = nevents * (1. - args.late)
+late_points = [p for p in points if p[0] >= late_start]
+growth = 1000. * slope(points)
+late_growth = 1000. * slope(late_points + [(nevents, records[-1]['rss'])]) if late_points else 0.
+print('\nRSS peak growth: %.2f MB / 1000 events over the run, %.2f MB / 1000 events after event %d' % (
+  growth, late_growth, late_start))
+
+if late_growth > args.leakThreshold:
+  late = defaultdict(float)
+  for rec in records:
+    if rec['event'] >= late_start and rec['kind'] == 'module':
+      late[rec['module']] += max(rec['drss'], 0.)
+  print('POSSIBLE LEAK: the RSS peak still grows late in the run, modules responsible for the late increases:')
+  print_table(['module', 'RSS added after event %d [MB]' % late_start],
+              [(name, '%.1f' % val) for name, val in sorted(late.items(), key=lambda x: -x[1])[:args.top]])
+else:
+  print('no leak: the RSS peak is stable in the late part of the run')
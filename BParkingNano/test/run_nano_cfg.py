@@ -93,6 +93,86 @@ options.register('version', 'A',
     VarParsing.varType.string,
     "RUN version - A, B, C, D, etc")
 
+options.register('compression', 'archive',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Compression profile of the NANO output: archive (LZMA 9, default), balanced (ZSTD) or fast (LZ4)")
+
+options.register('packTriggerBits', False,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "Store the HLT / L1 decisions as uint32 bitmasks (names in the run metadata) instead of one column per path / seed")
+
+options.register('triggerHistograms', '',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Fill the trigger efficiency histograms (trgEfficiencyHistograms) in this ROOT file (disabled if empty)")
+
+options.register('histogramsOnly', False,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "With triggerHistograms, do not write the NANO output: only the tables consumed by the histograms are produced")
+
+options.register('nThreads', 1,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.int,
+    "Number of framework threads")
+
+options.register('nStreams', 0,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.int,
+    "Number of concurrent streams (0 = same as nThreads)")
+
+options.register('enableIMT', False,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "Enable ROOT implicit multithreading for the output compression (needs nThreads > 1)")
+
+options.register('configCache', '',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Directory of the configuration cache, reuse the expanded process for identical options (disabled if empty)")
+
+options.register('stageDir', '',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Local cache directory where remote input files are staged before processing (disabled if empty)")
+
+options.register('stageCacheGB', 20.,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.float,
+    "Size cap of the staging cache in GB, least recently used files are evicted first")
+
+options.register('stageSource', '',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Local directory standing in for the remote storage when staging, for tests (xrootd if empty)")
+
+options.register('skimFirst', True,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "Run the trigger skim before the egamma and electron producers")
+
+options.register('timingReport', '',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Per-module timing: writes <prefix>.json (FastTimerService) and <prefix>.stall.log (StallMonitor), disabled if empty")
+
+options.register('memoryCheck', False,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "Log the modules raising the VSIZE / RSS peak (SimpleMemoryCheck), read by test/memory_analysis.py")
+
+options.register('allocMonitor', False,
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.bool,
+    "Count the memory allocations of the job (SimpleAllocMonitor), needs LD_PRELOAD=libPerfToolsAllocMonitorPreload.so")
+
+options.register('triggerUnpacker', 'bpark',
+    VarParsing.multiplicity.singleton,
+    VarParsing.varType.string,
+    "Trigger objects for the electron matching: bpark (e/gamma objects of the configured paths / seeds) or generic (all)")
+
 options.setDefault('maxEvents', -1)
 options.setDefault('tag', '150X')
 
@@ -253,184 +333,294 @@ if not options.inputFiles:
 annotation = '%s nevts:%d' % (outputFileNANO, options.maxEvents)
 
 # Process
-from Configuration.StandardSequences.Eras import eras
-from Configuration.Eras.Modifier_run3_nanoAOD_pre142X_cff import run3_nanoAOD_pre142X
-from DoubleElectronNANO.BParkingNano.modifiers_cff import *
-
-# Attaching modifiers
-modifiers = []
-
-# Do nano-v15 light for MiniAODv<6 (year<2024)
-if options.year!=2024: modifiers.append(run3_nanoAOD_pre142X)
+# built in a function so that it can be skipped when loaded from the config cache
+def buildProcess():
+    from Configuration.StandardSequences.Eras import eras
+    from Configuration.Eras.Modifier_run3_nanoAOD_pre142X_cff import run3_nanoAOD_pre142X
+    from DoubleElectronNANO.BParkingNano.modifiers_cff import (efficiencyStudy, triggerMatchingStudy,
+        vbfSkimming2023_C, vbfSkimming2023_D, vbfSkimming2024, customBoostedTausTable,
+        regressionVars, allowedNumScaleWeights, packedTriggerBits)
+
+    # Attaching modifiers
+    modifiers = []
+
+    # Do nano-v15 light for MiniAODv<6 (year<2024)
+    if options.year!=2024: modifiers.append(run3_nanoAOD_pre142X)
+
+    if options.mode not in ["reco", "eff", "trg", "vbf"]:
+        raise ValueError("Mode must be reco (standard reconstruction), eff (efficiency study mode) or trg (trigger matching study mode)")
+
+    if options.mode == "eff":
+        # Efficiency study:
+        #     removes all selections among:
+        #      - trigger selection (hltHighLevel filter)
+        #      - electron selection (all selections inside electronsForAnalysis filter)
+        #      - dielectron fit (both pre- and post-fit selections)
+        #     Electron and dielectron-level selections are replaced by flags in the output,
+        #     so that efficiency can be studied differentially separately.
+        #     Trigger selection efficiency is evaluated using trgTable values.
+        modifiers.append(efficiencyStudy)
+    elif options.mode == "trg":
+        # Trigger matching study:
+        #   removes all trigger selections and saves, for each electron and HLT path,
+        #   the closest trigger objects within an open deltaR cone (ElectronTrgMatch table).
+        modifiers.append(triggerMatchingStudy)
+    elif options.mode == "vbf":
+        if options.year == 2022:
+            raise ValueError("VBF parking was not active during 2022")
+        elif options.year == 2023:
+            if options.version == 'C':
+                modifiers.append(vbfSkimming2023_C)
+            else:
+                modifiers.append(vbfSkimming2023_D)
+        elif options.year == 2024:
+            if options.version == 'B':
+                modifiers.append(customBoostedTausTable)
+                modifiers.append(vbfSkimming2024)
+            else:
+                modifiers.append(vbfSkimming2024)
+
+    if options.saveRegressionVars:
+        # Save regression variables
+        # see python/electronsBPark_cff.py and python/dielectron_cff.py (electronRegressionVarsTable) for list
+        modifiers.append(regressionVars)
+
+    if options.isSignal:
+        modifiers.append(allowedNumScaleWeights)
+
+    if options.packTriggerBits:
+        # see test/trigger_bits.py to unpack them
+        modifiers.append(packedTriggerBits)
+
+    era=eras.Run3 if options.year==2022 else eras.Run3_2023 if options.year==2023 else eras.Run3_2024
+    process = cms.Process('BParkNANO', era, *modifiers)
+
+    # import of standard configurations
+    process.load('SimGeneral.HepPDTESSource.pythiapdt_cfi')
+    process.load('Configuration.StandardSequences.Services_cff')
+    process.load('FWCore.MessageService.MessageLogger_cfi')
+    process.load('Configuration.EventContent.EventContent_cff')
+    process.load('Configuration.StandardSequences.GeometryRecoDB_cff')
+    process.load("Configuration.StandardSequences.MagneticField_cff")
+    process.load('PhysicsTools.NanoAOD.nano_cff')
+    process.load('DoubleElectronNANO.BParkingNano.nanoBPark_cff')
+    process.load('Configuration.StandardSequences.EndOfProcess_cff')
+    process.load('Configuration.StandardSequences.FrontierConditions_GlobalTag_cff')
+
+    process.MessageLogger.cerr.FwkReport.reportEvery = options.reportEvery
+    # process.MessageLogger.cerr.threshold = "DEBUG"
+    # process.MessageLogger.debugModules = ["*"]
+
+    process.maxEvents = cms.untracked.PSet(
+        input = cms.untracked.int32(options.maxEvents)
+    )
 
-if options.mode not in ["reco", "eff", "trg", "vbf"]:
-    raise ValueError("Mode must be reco (standard reconstruction), eff (efficiency study mode) or trg (trigger matching study mode)")
+    # Input source
+    process.source = cms.Source(
+        "PoolSource",
+        fileNames = cms.untracked.vstring(options.inputFiles),
+        secondaryFileNames = cms.untracked.vstring(),
+        skipEvents=cms.untracked.uint32(options.skip),
+    )
 
-if options.mode == "eff":
-    # Efficiency study:
-    #     removes all selections among:
-    #      - trigger selection (hltHighLevel filter)
-    #      - electron selection (all selections inside electronsForAnalysis filter)
-    #      - dielectron fit (both pre- and post-fit selections)
-    #     Electron and dielectron-level selections are replaced by flags in the output,
-    #     so that efficiency can be studied differentially separately.
-    #     Trigger selection efficiency is evaluated using trgTable values.
-    modifiers.append(efficiencyStudy)
-elif options.mode == "trg":
-    # Trigger matching study:
-    #   removes all trigger selections and opens up deltaR max value for trigger-matching
-    #   ambiguities not resolved -- looking at best match for each electron.
-    modifiers.append(triggerMatchingStudy)
-elif options.mode == "vbf":
-    if options.year == 2022:
-        raise ValueError("VBF parking was not active during 2022")
-    elif options.year == 2023:
-        if options.version == 'C':
-            modifiers.append(vbfSkimming2023_C)
-        else:
-            modifiers.append(vbfSkimming2023_D)
-    elif options.year == 2024:
-        if options.version == 'B':
-            modifiers.append(customBoostedTausTable)
-            modifiers.append(vbfSkimming2024)
-        else:
-            modifiers.append(vbfSkimming2024)
+    process.options = cms.untracked.PSet(
+        wantSummary = cms.untracked.bool(options.wantSummary),
+        numberOfThreads = cms.untracked.uint32(options.nThreads),
+        numberOfStreams = cms.untracked.uint32(options.nStreams),
+    )
 
-if options.saveRegressionVars:
-    # Save regression variables
-    # see python/electronsBPark_cff.py for list
-    modifiers.append(regressionVars)
-
-if options.isSignal:
-    modifiers.append(allowedNumScaleWeights)
-
-era=eras.Run3 if options.year==2022 else eras.Run3_2023 if options.year==2023 else eras.Run3_2024
-process = cms.Process('BParkNANO', era, *modifiers)
-
-# import of standard configurations
-process.load('SimGeneral.HepPDTESSource.pythiapdt_cfi')
-process.load('Configuration.StandardSequences.Services_cff')
-process.load('FWCore.MessageService.MessageLogger_cfi')
-process.load('Configuration.EventContent.EventContent_cff')
-process.load('Configuration.StandardSequences.GeometryRecoDB_cff')
-process.load("Configuration.StandardSequences.MagneticField_cff")
-process.load('PhysicsTools.NanoAOD.nano_cff')
-process.load('DoubleElectronNANO.BParkingNano.nanoBPark_cff')
-process.load('Configuration.StandardSequences.EndOfProcess_cff')
-process.load('Configuration.StandardSequences.FrontierConditions_GlobalTag_cff')
-
-process.MessageLogger.cerr.FwkReport.reportEvery = options.reportEvery
-# process.MessageLogger.cerr.threshold = "DEBUG"
-# process.MessageLogger.debugModules = ["*"]
-
-process.maxEvents = cms.untracked.PSet(
-    input = cms.untracked.int32(options.maxEvents)
-)
-
-# Input source
-process.source = cms.Source(
-    "PoolSource",
-    fileNames = cms.untracked.vstring(options.inputFiles),
-    secondaryFileNames = cms.untracked.vstring(),
-    skipEvents=cms.untracked.uint32(options.skip),
-)
-
-process.options = cms.untracked.PSet(
-    wantSummary = cms.untracked.bool(options.wantSummary),
-)
-
-process.nanoMetadata.strings.tag = annotation
-# Production Info
-process.configurationMetadata = cms.untracked.PSet(
-    annotation = cms.untracked.string(annotation),
-    name = cms.untracked.string('Applications'),
-    version = cms.untracked.string('$Revision: 1.19 $')
-)
-
-# Output definition
-process.FEVTDEBUGHLToutput = cms.OutputModule("PoolOutputModule",
-    dataset = cms.untracked.PSet(
-        dataTier = cms.untracked.string('GEN-SIM-RECO'),
-        filterName = cms.untracked.string('')
-    ),
-    fileName = outputFileFEVT,
-    outputCommands = (cms.untracked.vstring('keep *',
-                                            'drop *_*_SelectedTransient*_*',
-                     )),
-    splitLevel = cms.untracked.int32(0)
-)
-
-process.NANOAODoutput = cms.OutputModule("NanoAODOutputModule",
-    compressionAlgorithm = cms.untracked.string('LZMA'),
-    compressionLevel = cms.untracked.int32(9),
-    dataset = cms.untracked.PSet(
-        dataTier = cms.untracked.string('NANOAOD'),
-        filterName = cms.untracked.string('')
-    ),
-    fileName = outputFileNANO,
-    outputCommands = cms.untracked.vstring(
-      # 'drop *',
-      "keep nanoaodFlatTable_*Table_*_*",     # event data
-      "keep nanoaodUniqueString_nanoMetadata_*_*",   # basic metadata
-      "keep nanoaodMergeableCounterTable_*Table_*_*", # run data
+    process.nanoMetadata.strings.tag = annotation
+    # Production Info
+    process.configurationMetadata = cms.untracked.PSet(
+        annotation = cms.untracked.string(annotation),
+        name = cms.untracked.string('Applications'),
+        version = cms.untracked.string('$Revision: 1.19 $')
     )
 
-)
+    # Output definition
+    process.FEVTDEBUGHLToutput = cms.OutputModule("PoolOutputModule",
+        dataset = cms.untracked.PSet(
+            dataTier = cms.untracked.string('GEN-SIM-RECO'),
+            filterName = cms.untracked.string('')
+        ),
+        fileName = outputFileFEVT,
+        outputCommands = (cms.untracked.vstring('keep *',
+                                                'drop *_*_SelectedTransient*_*',
+                         )),
+        splitLevel = cms.untracked.int32(0)
+    )
 
-# Additional output definition
+    process.NANOAODoutput = cms.OutputModule("NanoAODOutputModule",
+        compressionAlgorithm = cms.untracked.string('LZMA'),
+        compressionLevel = cms.untracked.int32(9),
+        dataset = cms.untracked.PSet(
+            dataTier = cms.untracked.string('NANOAOD'),
+            filterName = cms.untracked.string('')
+        ),
+        fileName = outputFileNANO,
+        outputCommands = cms.untracked.vstring(
+          # 'drop *',
+          "keep nanoaodFlatTable_*Table_*_*",     # event data
+          "keep nanoaodUniqueString_nanoMetadata_*_*",   # basic metadata
+          "keep nanoaodMergeableCounterTable_*Table_*_*", # run data
+        )
 
-# Other statements
-from Configuration.AlCa.GlobalTag import GlobalTag
-process.GlobalTag = GlobalTag(process.GlobalTag, globaltag, '')
+    )
 
-from DoubleElectronNANO.BParkingNano.nanoBPark_cff import *
-from DoubleElectronNANO.BParkingNano.electronsTrigger_cff import *
+    from DoubleElectronNANO.BParkingNano.compression_cff import setCompressionProfile
+    setCompressionProfile(process.NANOAODoutput, options.compression)
+
+    # Additional output definition
+
+    # Other statements
+    from Configuration.AlCa.GlobalTag import GlobalTag
+    process.GlobalTag = GlobalTag(process.GlobalTag, globaltag, '')
+
+    from DoubleElectronNANO.BParkingNano.nanoBPark_cff import (nanoAOD_customizeEgammaPostRecoTools,
+        nanoAOD_customizeEle, nanoAOD_customizeElectronFilteredBPark, nanoAOD_customizeNanoContent,
+        nanoAOD_customizeCommon, nanoAOD_customizeTriggerBitsBPark,
+        nanoAOD_customizeElectronTriggerSelectionBPark, nanoAOD_customizeDiElectron)
+
+    process = nanoAOD_customizeEgammaPostRecoTools(process)
+    process = nanoAOD_customizeEle(process)
+    if options.triggerUnpacker == 'generic':
+        process.myUnpackedPatTrigger = process.myUnpackedPatTriggerGeneric.clone()
+    elif options.triggerUnpacker != 'bpark':
+        raise ValueError('Unknown triggerUnpacker %s, use bpark or generic' % options.triggerUnpacker)
+    process = nanoAOD_customizeElectronFilteredBPark(process)
+    if options.saveAllNanoContent:
+        process = nanoAOD_customizeNanoContent(process)
+        process = nanoAOD_customizeCommon(process)
+    process = nanoAOD_customizeTriggerBitsBPark(process)
+    process = nanoAOD_customizeElectronTriggerSelectionBPark(process)
+    process = nanoAOD_customizeDiElectron(process)
+
+    if options.skimFirst:
+        process.nanoAOD_DiEle_step = cms.Path(process.nanoSkimSequence
+                                            + process.egammaPostRecoSeq
+                                            + process.nanoSequence
+                                            + process.nanoEleSequence
+                                            + process.nanoDiEleSequence)
+    else:
+        process.nanoAOD_DiEle_step = cms.Path(process.egammaPostRecoSeq
+                                            + process.nanoSequence
+                                            + process.nanoEleSequence
+                                            + process.nanoSkimSequence
+                                            + process.nanoDiEleSequence)
+
+    if options.saveAllNanoContent:
+        # the standard NanoAOD content only runs on events accepted by nanoAOD_DiEle_step
+        process.nanoDiEleStepFilter = cms.EDFilter("PathStatusFilter",
+            logicalExpression = cms.string('nanoAOD_DiEle_step')
+        )
+        process.nanoAOD_allNano_step = cms.Path(process.nanoDiEleStepFilter
+                                              + process.nanoContentSequence)
+
+    # customisation of the process.
+    if options.isMC:
+        from DoubleElectronNANO.BParkingNano.nanoBPark_cff import nanoAOD_customizeMC
+        nanoAOD_customizeMC(process, options.saveAllNanoContent)
+
+    process.endjob_step = cms.EndPath(process.endOfProcess)
+    process.FEVTDEBUGHLToutput_step = cms.EndPath(process.FEVTDEBUGHLToutput)
+    process.NANOAODoutput_step = cms.EndPath(process.NANOAODoutput)
+    if options.triggerHistograms:
+        process.TFileService = cms.Service("TFileService", fileName = cms.string(options.triggerHistograms))
+        process.triggerHistograms_step = cms.EndPath(process.trgEfficiencyHistograms)
+    elif options.histogramsOnly:
+        raise ValueError('histogramsOnly needs a triggerHistograms output file')
+
+    # Schedule definition
+    process.schedule = cms.Schedule(process.nanoAOD_DiEle_step)
+    if options.histogramsOnly:
+        # the tables (*Table, as kept by NANOAODoutput) only feed the output: taken out of the
+        # path, they run on demand for the modules that consume them (trgTable for the histograms)
+        histogramsOnlyTables = cms.Task()
+        for label, module in process.producers_().items():
+            if not label.endswith('Table'): continue
+            while process.nanoAOD_DiEle_step.remove(module): pass
+            histogramsOnlyTables.add(module)
+        process.schedule.associate(histogramsOnlyTables)
+    elif options.saveAllNanoContent:
+        process.schedule.append(process.nanoAOD_allNano_step)
+    process.schedule.append(process.endjob_step)
+    if options.wantFullRECO:
+        process.schedule.append(process.FEVTDEBUGHLToutput_step)
+    if options.triggerHistograms:
+        process.schedule.append(process.triggerHistograms_step)
+    if not options.histogramsOnly:
+        process.schedule.append(process.NANOAODoutput_step)
+
+    from PhysicsTools.PatAlgos.tools.helpers import associatePatAlgosToolsTask
+    associatePatAlgosToolsTask(process)
+    process.NANOAODoutput.SelectEvents = cms.untracked.PSet(
+        SelectEvents = cms.vstring('nanoAOD_allNano_step' if options.saveAllNanoContent and not options.histogramsOnly else 'nanoAOD_DiEle_step')
+    )
 
-process = nanoAOD_customizeEgammaPostRecoTools(process)
-process = nanoAOD_customizeEle(process)
-process = nanoAOD_customizeElectronFilteredBPark(process)
-if options.saveAllNanoContent:
-    process = nanoAOD_customizeNanoContent(process)
-    process = nanoAOD_customizeCommon(process)
-process = nanoAOD_customizeTriggerBitsBPark(process)
-process = nanoAOD_customizeElectronTriggerSelectionBPark(process)
-process = nanoAOD_customizeDiElectron(process)
-
-process.nanoAOD_DiEle_step = cms.Path(process.egammaPostRecoSeq
-                                    + process.nanoSequence
-                                    + process.nanoEleSequence
-                                    + process.nanoDiEleSequence)
-
-# customisation of the process.
-if options.isMC:
-    from DoubleElectronNANO.BParkingNano.nanoBPark_cff import nanoAOD_customizeMC
-    nanoAOD_customizeMC(process, options.saveAllNanoContent)
-
-process.endjob_step = cms.EndPath(process.endOfProcess)
-process.FEVTDEBUGHLToutput_step = cms.EndPath(process.FEVTDEBUGHLToutput)
-process.NANOAODoutput_step = cms.EndPath(process.NANOAODoutput)
-
-# Schedule definition
-process.schedule = cms.Schedule(process.nanoAOD_DiEle_step,
-                                process.endjob_step,
-                                process.NANOAODoutput_step)
-
-if options.wantFullRECO:
-    process.schedule = cms.Schedule(process.nanoAOD_DiEle_step,
-                                    process.endjob_step,
-                                    process.FEVTDEBUGHLToutput_step,
-                                    process.NANOAODoutput_step)
-
-from PhysicsTools.PatAlgos.tools.helpers import associatePatAlgosToolsTask
-associatePatAlgosToolsTask(process)
-process.NANOAODoutput.SelectEvents = cms.untracked.PSet(
-    SelectEvents = cms.vstring('nanoAOD_DiEle_step')
-)
-
-### from https://hypernews.cern.ch/HyperNews/CMS/get/physics-validation/3287/1/1/1/1/1.html
-process.add_(cms.Service('InitRootHandlers', EnableIMT = cms.untracked.bool(False)))
-process.NANOAODoutput.fakeNameForCrab=cms.untracked.bool(True)
-
-process.load("TrackingTools/TransientTrack/TransientTrackBuilder_cfi")
-from Configuration.StandardSequences.earlyDeleteSettings_cff import customiseEarlyDelete
-process = customiseEarlyDelete(process)
+    ### from https://hypernews.cern.ch/HyperNews/CMS/get/physics-validation/3287/1/1/1/1/1.html
+    # ROOT implicit MT runs in the framework thread pool, so it does not add threads on
+    # top of nThreads, and it is only worth it (parallel basket compression when the
+    # NANO output flushes) when several threads are available
+    enableIMT = options.enableIMT and options.nThreads > 1
+    if options.enableIMT and not enableIMT:
+        print('WARNING: enableIMT requires nThreads > 1, ROOT implicit MT stays disabled')
+    process.add_(cms.Service('InitRootHandlers', EnableIMT = cms.untracked.bool(enableIMT)))
+
+    # per-module CPU and real time as JSON, and per-event module timestamps for
+    # the distributions, both read by test/time_analysis.py
+    if options.timingReport:
+        process.load('HLTrigger.Timer.FastTimerService_cfi')
+        process.FastTimerService.enableDQM = cms.untracked.bool(False)
+        process.FastTimerService.printEventSummary = cms.untracked.bool(False)
+        process.FastTimerService.printRunSummary = cms.untracked.bool(False)
+        process.FastTimerService.printJobSummary = cms.untracked.bool(True)
+        process.FastTimerService.writeJSONSummary = cms.untracked.bool(True)
+        process.FastTimerService.jsonFileName = cms.untracked.string(options.timingReport + '.json')
+        process.add_(cms.Service('StallMonitor', fileName = cms.untracked.string(options.timingReport + '.stall.log')))
+
+    # memory increases are attributed to the module that was running, which is
+    # only meaningful when modules do not run concurrently
+    if options.memoryCheck:
+        if options.nThreads > 1:
+            print('WARNING: memoryCheck with nThreads > 1, the per-module attribution is not reliable')
+        process.add_(cms.Service('SimpleMemoryCheck',
+            ignoreTotal = cms.untracked.int32(1),
+            moduleMemorySummary = cms.untracked.bool(True),
+        ))
+    # totals of the job printed at the end, read by test/benchmark_merger.py
+    if options.allocMonitor:
+        process.add_(cms.Service('SimpleAllocMonitor'))
+    process.NANOAODoutput.fakeNameForCrab=cms.untracked.bool(True)
+
+    process.load("TrackingTools/TransientTrack/TransientTrackBuilder_cfi")
+    from Configuration.StandardSequences.earlyDeleteSettings_cff import customiseEarlyDelete
+    process = customiseEarlyDelete(process)
+
+    return process
+
+# options that only change what a job reads and writes, not the process structure:
+# not part of the config cache key, set again on a process loaded from the cache
+JOB_OPTIONS = ('inputFiles', 'secondaryInputFiles', 'skip', 'maxEvents', 'tag', 'outputFile', 'secondaryOutputFile',
+               'reportEvery', 'configCache', 'stageDir', 'stageCacheGB', 'stageSource')
+
+def applyJobOptions(process):
+    process.MessageLogger.cerr.FwkReport.reportEvery = options.reportEvery
+    process.maxEvents.input = options.maxEvents
+    process.source.fileNames = cms.untracked.vstring(options.inputFiles)
+    process.source.skipEvents = cms.untracked.uint32(options.skip)
+    process.nanoMetadata.strings.tag = annotation
+    process.configurationMetadata.annotation = annotation
+    process.FEVTDEBUGHLToutput.fileName = outputFileFEVT
+    process.NANOAODoutput.fileName = outputFileNANO
+
+if options.configCache:
+    from DoubleElectronNANO.BParkingNano.configCache import cachedProcess
+    process = cachedProcess(options, buildProcess, options.configCache, JOB_OPTIONS)
+    applyJobOptions(process)
+else:
+    process = buildProcess()
+
+if options.stageDir:
+    from DoubleElectronNANO.BParkingNano.inputStaging import InputStager
+    stager = InputStager(options.stageDir, options.stageCacheGB, options.stageSource)
+    process.source.fileNames = cms.untracked.vstring(stager.stage(process.source.fileNames))
@@ -0,0 +1,133 @@
+'''
+Local production driver: splits the input files in event ranges (skip /
+maxEvents of run_nano_cfg.py), runs the shards as a pool of cmsRun processes
+within the available cores and memory, retries the failed ones and merges the
+outputs into a single DoubleElectronNANO file with the right nanoMetadata tag.
+
+Example:
+  python3 run_sharded.py -i file1.root file2.root --eventsPerShard 5000 --tag 2025Oct13 -- year=2023 mode=reco
+'''
+import glob
+import os
+import shutil
+import subprocess
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+import ROOT
+from bench_utils import cmsrun
+
+parser = ArgumentParser()
+parser.add_argument('-i', '--inputFiles', nargs='+', required=True, help='input files (LFN, root:// or file: paths)')
+parser.add_argument('--cfg', default='run_nano_cfg.py', help='cmsRun configuration')
+parser.add_argument('--eventsPerShard', type=int, default=5000, help='events processed by each shard')
+parser.add_argument('--maxEvents', type=int, default=-1, help='total events to process, -1 for all')
+parser.add_argument('--nThreads', type=int, default=1, help='threads per shard')
+parser.add_argument('--memoryPerShard', type=int, default=3500, help='memory budget of one shard [MB]')
+parser.add_argument('--jobs', type=int, default=0, help='shards running in parallel, 0 = as many as cores and memory allow')
+parser.add_argument('--retries', type=int, default=2, help='times a failed shard is resubmitted')
+parser.add_argument('--tag', default='sharded', help='tag of the output, as for run_nano_cfg.py')
+parser.add_argument('--outdir', default='shards', help='working directory of the shards')
+parser.add_argument('--keep', action='store_true', help='keep the shard outputs after merging')
+parser.add_argument('options', nargs='*', help='additional VarParsing options passed to the configuration')
+args = parser.parse_args()
+
+ROOT.gROOT.SetBatch(True)
+
+def to_pfn(fname):
+  return 'root://cms-xrd-global.cern.ch/' + fname if fname.startswith('/store/') else fname
+
+def count_events(fname):
+  tfile = ROOT.TFile.Open(to_pfn(fname))
+  if not tfile or tfile.IsZombie():
+    raise IOError('could not open %s' % fname)
+  nevents = tfile.Get('Events').GetEntries()
+  tfile.Close()
+  return nevents
+
+def available_memory():
+  '''MemAvailable from /proc/meminfo [MB]'''
+  with open('/proc/meminfo') as meminfo:
+    for line in meminfo:
+      if line.startswith('MemAvailable:'):
+        return int(line.split()[1]) // 1024
+  return None
+
+def make_shards():
+  shards = []
+  left = args.maxEvents
+  for fname in args.inputFiles:
+    nevents = count_events(fname)
+    for skip in range(0, nevents, args.eventsPerShard):
+      if left == 0:
+        return shards
+      nshard = min(args.eventsPerShard, nevents - skip)
+      if left > 0:
+        nshard = min(nshard, left)
+        left -= nshard
+      shards.append({'index' : len(shards), 'file' : fname, 'skip' : skip, 'events' : nshard})
+  return shards
+
+def run_shard(shard):
+  workdir = os.path.join(args.outdir, 'shard%d' % shard['index'])
+  shutil.rmtree(workdir, ignore_errors=True)
+  os.makedirs(workdir)
+  res = cmsrun(
+    os.path.abspath(args.cfg),
+    ['inputFiles=%s' % shard['file'], 'skip=%d' % shard['skip'], 'maxEvents=%d' % shard['events'],
+     'nThreads=%d' % args.nThreads, 'tag=%s_shard%d' % (args.tag, shard['index'])] + args.options,
+    os.path.join(workdir, 'cmsRun.log'),
+    cwd = workdir
+  )
+  outputs = glob.glob(os.path.join(workdir, 'DoubleElectronNANO_*.root'))
+  shard['output'] = outputs[0] if res['exit'] == 0 and len(outputs) == 1 else None
+  shard['exit'] = res['exit']
+  return shard
+
+def merge(outputs, merged, nevents):
+  subprocess.check_call(['haddnano.py', merged] + outputs)
+  # haddnano keeps the tag of the first input, which describes the first shard only
+  tfile = ROOT.TFile.Open(merged, 'UPDATE')
+  tfile.Delete('tag;*')
+  ROOT.TObjString('%s nevts:%d' % (os.path.basename(merged), nevents)).Write('tag')
+  tfile.Close()
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+
+shards = make_shards()
+jobs = args.jobs
+if jobs <= 0:
+  jobs = max(os.cpu_count() // args.nThreads, 1)
+  memory = available_memory()
+  if memory is not None:
+    jobs = max(min(jobs, memory // args.memoryPerShard), 1)
+total_events = sum(i['events'] for i in shards)
+print('%d events in %d shards, running %d at a time' % (total_events, len(shards), jobs))
+
+start = time.time()
+todo = shards
+for attempt in range(args.retries + 1):
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    done = list(pool.map(run_shard, todo))
+  todo = [i for i in done if i['output'] is None]
+  if not todo:
+    break
+  print('%d shards failed (attempt %d): %s' % (len(todo), attempt + 1, ', '.join(str(i['index']) for i in todo)))
+processing = time.time() - start
+
+if todo:
+  raise RuntimeError('shards %s failed %d times, see their cmsRun.log' % (', '.join(str(i['index']) for i in todo), args.retries + 1))
+
+outputs = [i['output'] for i in sorted(shards, key=lambda x: x['index'])]
+# same name as a single run_nano_cfg.py job with the given tag
+merged = os.path.basename(outputs[0]).replace('_%s_shard0.root' % args.tag, '_%s.root' % args.tag)
+merge(outputs, merged, total_events)
+merging = time.time() - start - processing
+if not args.keep:
+  for i in shards:
+    shutil.rmtree(os.path.dirname(i['output']), ignore_errors=True)
+
+print('processed %d events in %.1f s: %.2f events/s (%.2f events/s including the merge of %.1f s)' % (
+  total_events, processing, total_events / processing, total_events / (processing + merging), merging))
+print('output:', merged)
@@ -0,0 +1,186 @@
+// Regression test of the CTF isolation correction of ElectronMerger
+// (CtfIsoCorrection, used as in ElectronMerger::produce): the sums must be bit
+// identical to the former loop over all the electrons, including tracks exactly
+// at the 0.3 / 0.4 cone edges and across the phi = +-pi seam.
+//
+// Built by "scram b runtests", or standalone:
+//   g++ -std=c++17 -O2 -I$CMSSW_RELEASE_BASE/src -o testCtfIsoGrid testCtfIsoGrid.cpp && ./testCtfIsoGrid
+
+#include "../plugins/CtfIsoCorrection.h"
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <numeric>
+#include <random>
+#include <utility>
+#include <vector>
+
+namespace {
+
+  double wrapPhi(double phi) { return phi - std::round(phi / (2. * M_PI)) * (2. * M_PI); }
+
+  // what the correction reads from an output electron
+  struct TestElectron {
+    double eta, phi;             // gsf
+    bool hasCtf;                 // lowPt, no PF overlap, with a closest CTF track
+    double ctfEta, ctfPhi, ctfPt;
+  };
+
+  typedef CtfIsoCorrection::Sums IsoCorr;
+
+  // the former loop over all the electrons of ElectronMerger, in selection order
+  std::vector<IsoCorr> fullLoop(const std::vector<TestElectron>& eles, const std::vector<unsigned int>& order) {
+    std::vector<unsigned int> bySelection(eles.size());
+    for (unsigned int i = 0; i < eles.size(); ++i) bySelection[order[i]] = i;
+    std::vector<IsoCorr> ret(eles.size());
+    for (unsigned int ie = 0; ie < eles.size(); ++ie) {
+      for (unsigned int ilp : bySelection) {
+        const TestElectron& lp = eles[ilp];
+        if (!lp.hasCtf) continue;
+        float dR_gsf = reco::deltaR(eles[ie].eta, eles[ie].phi, lp.eta, lp.phi);
+        float dR_ctf = reco::deltaR(eles[ie].eta, eles[ie].phi, lp.ctfEta, lp.ctfPhi);
+        if (dR_gsf < 0.001) continue;
+        if (dR_ctf < 0.3) ret[ie].tosub0p3 += lp.ctfPt;
+        if (dR_ctf < 0.4) ret[ie].tosub0p4 += lp.ctfPt;
+      }
+    }
+    return ret;
+  }
+
+  // as in ElectronMerger::produce
+  std::vector<IsoCorr> gridLoop(const std::vector<TestElectron>& eles, const std::vector<unsigned int>& order) {
+    CtfIsoCorrection ctfIso;
+    for (unsigned int ilp = 0; ilp < eles.size(); ++ilp) {
+      const TestElectron& lp = eles[ilp];
+      if (!lp.hasCtf) continue;
+      ctfIso.add(ilp, lp.eta, lp.phi, lp.ctfEta, lp.ctfPhi, lp.ctfPt);
+    }
+    ctfIso.build();
+
+    std::vector<IsoCorr> ret;
+    for (const TestElectron& ele : eles) ret.push_back(ctfIso.sums(ele.eta, ele.phi, order));
+    return ret;
+  }
+
+  uint32_t bits(float val) {
+    uint32_t ret;
+    std::memcpy(&ret, &val, sizeof(ret));
+    return ret;
+  }
+
+  // CTF track of a lowPt electron at distance dr from (eta, phi) along direction angle
+  TestElectron trackAt(double eta, double phi, double dr, double angle, double pt) {
+    TestElectron lp;
+    lp.ctfEta = eta + dr * std::cos(angle);
+    lp.ctfPhi = wrapPhi(phi + dr * std::sin(angle));
+    lp.eta = lp.ctfEta + 0.002;
+    lp.phi = lp.ctfPhi;
+    lp.hasCtf = true;
+    lp.ctfPt = pt;
+    return lp;
+  }
+
+  TestElectron reference(double eta, double phi) { return TestElectron{eta, phi, false, 0., 0., 0.}; }
+
+  std::vector<unsigned int> shuffledOrder(size_t size, std::mt19937& gen) {
+    std::vector<unsigned int> order(size);
+    std::iota(order.begin(), order.end(), 0);
+    std::shuffle(order.begin(), order.end(), gen);
+    return order;
+  }
+
+  int nFailed = 0;
+  int nSums = 0;
+
+  void compare(const char* name, const std::vector<TestElectron>& eles, const std::vector<unsigned int>& order) {
+    std::vector<IsoCorr> expected = fullLoop(eles, order);
+    std::vector<IsoCorr> found = gridLoop(eles, order);
+    for (unsigned int ie = 0; ie < eles.size(); ++ie) {
+      // PFIso*_corr = iso - tosub, the same iso on both sides
+      float iso = 10.f;
+      if (bits(iso - expected[ie].tosub0p3) != bits(iso - found[ie].tosub0p3) ||
+          bits(iso - expected[ie].tosub0p4) != bits(iso - found[ie].tosub0p4) ||
+          bits(expected[ie].tosub0p3) != bits(found[ie].tosub0p3) ||
+          bits(expected[ie].tosub0p4) != bits(found[ie].tosub0p4)) {
+        ++nFailed;
+        std::printf("FAILED %s: electron %u (eta %.17g, phi %.17g): tosub0p3 %.9g vs %.9g, tosub0p4 %.9g vs %.9g\n",
+                    name, ie, eles[ie].eta, eles[ie].phi,
+                    expected[ie].tosub0p3, found[ie].tosub0p3, expected[ie].tosub0p4, found[ie].tosub0p4);
+      }
+      ++nSums;
+    }
+  }
+
+}  // namespace
+
+int main() {
+  std::mt19937 gen(12345);
+  std::uniform_real_distribution<double> flat(0., 1.);
+
+  // tracks exactly at the cone edges, around electrons on both sides of the phi = +-pi seam
+  for (double phi : {M_PI, -M_PI, M_PI - 0.05, -M_PI + 0.05, M_PI - 0.3, -M_PI + 0.4, 0.}) {
+    for (double eta : {0., 1.1, -2.4, 4.9, -5.2}) {
+      std::vector<TestElectron> eles{reference(eta, phi)};
+      for (double dr : {0.3, 0.4}) {
+        for (double shift : {0., -1e-7, 1e-7, -1e-15, 1e-15}) {
+          for (double angle : {0., M_PI / 2., M_PI, -M_PI / 2., 0.7, 2.5, -2.2}) {
+            eles.push_back(trackAt(eta, phi, dr + shift, angle, 1. + flat(gen)));
+          }
+        }
+      }
+      // the reference itself as lowPt electron with CTF track, skipped by the dR_gsf cut
+      eles.push_back(trackAt(eta, phi, 0., 0., 5.));
+      eles.back().eta = eta;
+      eles.back().phi = phi;
+      compare("edges", eles, shuffledOrder(eles.size(), gen));
+    }
+  }
+
+  // tracks with eta or phi exactly dr away, straight across the seam
+  for (double dr : {0.3, 0.4}) {
+    std::vector<TestElectron> eles{reference(0.5, M_PI - 0.1), reference(0.5, -M_PI + 0.1)};
+    for (double dphi : {dr - 0.1, dr - 0.1 + 1e-9, dr - 0.1 - 1e-9}) {
+      eles.push_back(trackAt(0.5, -M_PI, dphi, M_PI / 2., 2.));
+      eles.push_back(trackAt(0.5, M_PI, dphi, -M_PI / 2., 3.));
+    }
+    eles.push_back(trackAt(0.5, M_PI - 0.1, dr, 0., 0.7));
+    eles.push_back(trackAt(0.5, M_PI - 0.1, dr, M_PI, 0.9));
+    compare("seam", eles, shuffledOrder(eles.size(), gen));
+  }
+
+  // random events: jets of lowPt electrons, a fraction without usable CTF track,
+  // some tracks put on the cone edges of the previous electrons
+  for (int iev = 0; iev < 2000; ++iev) {
+    std::vector<TestElectron> eles;
+    int njets = 1 + gen() % 4;
+    for (int ijet = 0; ijet < njets; ++ijet) {
+      double jetEta = -2.5 + 5. * flat(gen);
+      double jetPhi = iev % 2 ? wrapPhi(M_PI + 0.3 * (flat(gen) - 0.5)) : -M_PI + 2. * M_PI * flat(gen);
+      int nele = gen() % 25;
+      for (int iele = 0; iele < nele; ++iele) {
+        TestElectron lp;
+        if (!eles.empty() && flat(gen) < 0.3) {
+          const TestElectron& ref = eles[gen() % eles.size()];
+          lp = trackAt(ref.eta, ref.phi, flat(gen) < 0.5 ? 0.3 : 0.4, 2. * M_PI * flat(gen), 0.5 + 10. * flat(gen));
+        } else {
+          lp = trackAt(jetEta, jetPhi, 0.6 * flat(gen), 2. * M_PI * flat(gen), 0.5 + 10. * flat(gen));
+          lp.eta = lp.ctfEta + 0.05 * (flat(gen) - 0.5);
+          lp.phi = wrapPhi(lp.ctfPhi + 0.05 * (flat(gen) - 0.5));
+        }
+        lp.hasCtf = flat(gen) < 0.8;
+        eles.push_back(lp);
+      }
+    }
+    compare("random", eles, shuffledOrder(eles.size(), gen));
+  }
+
+  if (nFailed) {
+    std::printf("%d / %d isolation corrections differ\n", nFailed, nSums);
+    return 1;
+  }
+  std::printf("%d isolation corrections bit identical\n", nSums);
+  return 0;
+}
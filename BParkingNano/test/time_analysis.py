@@ -1,134 +1,244 @@
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+'''
+Per-module timing report from the FastTimerService JSON summary written by
+run_nano_cfg.py with timingReport=<prefix> (<prefix>.json). If the StallMonitor
+log of the same job (<prefix>.stall.log) is there, the per-event distribution
+of the real time of each module is used for median / p95 / p99.
+Without <prefix>.json, e.g. for a reference release that has no timingReport
+option, the TimeReport summary of the cmsRun log (<prefix> itself or
+<prefix>.log, wantSummary=True) is used: real time only, no per module CPU.
+
+Several runs can be compared side by side:
+  python3 time_analysis.py nano_HEAD.log:HEAD timing_PR12:PR12 [--select Electron]
+'''
+import json
 import os
-from pdb import set_trace
-eps = 10**-7
+import re
 from argparse import ArgumentParser
+from collections import defaultdict
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import matplotlib.colors as colors
+import matplotlib.cm as cmx
+from bench_utils import parse_summary, parse_module_summary
+
+parser = ArgumentParser()
+parser.add_argument('invals', nargs='+', help='timingReport prefix (or cmsRun log) : name to use')
+parser.add_argument('--select', default='', help='regular expression, only list the modules whose label matches')
+parser.add_argument('--outdir', default='validation', help='where plots and tables are written')
+args = parser.parse_args()
+
+GROUPS = ['I/O', 'GEN', 'Tables', 'DiElectron', 'Electrons', 'Tracks', 'Trigger', 'Other']
+
+# electron producers whose label does not contain 'electron'
+ELECTRON_PREFIXES = ('seedgainele', 'egm')
+
+def group(label, mtype):
+  '''Group of a module, the type is empty for runs read from a cmsRun log:
+  labels decide wherever possible, so that HEAD and PR end up in the same groups'''
+  name = label.lower()
+  if mtype.endswith('OutputModule') or mtype.endswith('Source') or name == 'source' or name.endswith('output'):
+    return 'I/O'
+  if 'gen' in name or 'lhe' in name:
+    return 'GEN'
+  if 'Table' in label or 'Table' in mtype:
+    return 'Tables'
+  if 'diele' in name or 'pair' in name:
+    return 'DiElectron'
+  if 'trg' in name or 'trigger' in name or 'hlt' in name or 'l1' in name:
+    return 'Trigger'
+  if 'electron' in name or name.startswith(ELECTRON_PREFIXES):
+    return 'Electrons'
+  if 'track' in name:
+    return 'Tracks'
+  return 'Other'
 
 def writer(pct):
   if pct < 5: return ''
   else: return '%.1f%%' % pct
 
-from collections import defaultdict
-import matplotlib.colors as colors
-import matplotlib.cm as cmx
+def load_json(fname):
+  '''FastTimerService summary: job totals and per-module CPU / real time [ms]'''
+  with open(fname) as infile:
+    summary = json.load(infile)
+  total, modules = None, {}
+  for entry in summary['modules']:
+    if entry['type'] == 'Job':
+      if total is None: # the first job-level entry is the total
+        total = entry
+      continue
+    modules[entry['label']] = entry
+  return total, modules
 
-parser = ArgumentParser()
-parser.add_argument('invals', nargs='+', help='file path : name to use')
-args = parser.parse_args()
+def load_log(fname):
+  '''Same content as load_json from the TimeReport summary of a cmsRun log,
+  the per module CPU time and number of executions are not there'''
+  with open(fname) as infile:
+    log = infile.read()
+  summary = parse_summary(log)
+  if summary['events'] is None or summary['loop'] is None:
+    raise RuntimeError('%s has no TimeReport summary, was it run with wantSummary=True?' % fname)
+  events = summary['events']
+  total = {
+    'events' : events,
+    'time_real' : summary['loop'] * 1000.,
+    'time_thread' : summary['cpu_loop'] * 1000. if summary['cpu_loop'] is not None else None,
+  }
+  modules = {}
+  for label, per_event in parse_module_summary(log).items():
+    modules[label] = {
+      'type' : '', 'events' : None,
+      'time_real' : per_event * 1000. * events, 'time_thread' : None,
+    }
+  return total, modules
+
+def load_timing(prefix):
+  '''FastTimerService JSON if available, cmsRun log otherwise'''
+  if os.path.isfile(prefix + '.json'):
+    return load_json(prefix + '.json')
+  for fname in (prefix, prefix + '.log'):
+    if os.path.isfile(fname):
+      return load_log(fname)
+  raise IOError('neither %s.json nor a cmsRun log %s(.log) found' % (prefix, prefix))
+
+def load_stall_log(fname):
+  '''Per-event real time [ms] of each module from the StallMonitor log'''
+  names = {}
+  started = {}
+  times = defaultdict(list)
+  with open(fname) as infile:
+    for line in infile:
+      if line.startswith('#M '):
+        _, mid, label = line.split()[:3]
+        names[mid] = label
+        continue
+      if not line.strip() or line[0] == '#':
+        continue
+      step, payload = line.split(None, 1)
+      if step not in ('M', 'm'):
+        continue
+      payload = payload.split()
+      # <stream> <module id> <transition> ... <time [us]>, transition 0 is the event
+      stream, mid, transition, tstamp = payload[0], payload[1], payload[2], int(payload[-1])
+      if transition != '0':
+        continue
+      if step == 'M':
+        started[(stream, mid)] = tstamp
+      elif (stream, mid) in started:
+        times[names.get(mid, mid)].append((tstamp - started.pop((stream, mid))) / 1000.)
+  return {label : np.array(vals) for label, vals in times.items()}
 
-tags_timings = []
+runs = []
 for inval in args.invals:
-  #Module Summary
-  fname, tag = tuple(inval.split(':'))
-  infile = open(fname).read()
-  modules = infile.split('TimeReport ---------- Module Summary ---[Real sec]----')[1].split('T---Report end!')[0]
-  time_rep = infile.split('TimeReport ---------- Event  Summary')[1].split('\n\n')[0].split('\n')
-  
-  module_times = []
-  for l in modules.split('\n'):
-    line = l.strip()
-    if not line: continue
-    if line.endswith('Name'): continue
-    info = line.split()
-    module_times.append((info[-1], float(info[1])))
-  
-  tot_time = sum(i for _, i in module_times)
-  tags_timings.append((tag, tot_time, dict(module_times)))
-  groups = defaultdict(float)
-  
-  for name, time in module_times:
-    if 'gen' in name.lower():
-      groups['GEN'] += time
-    elif 'lhe' in name.lower():
-      groups['GEN'] += time
-    elif 'Table' in name:
-      groups['Tables (not GEN)'] += time
-    elif 'kee' in name.lower():
-      groups['BToKee'] += time
-    elif 'kmumu' in name.lower():
-      groups['BToKmumu'] += time
-    elif 'electron' in name.lower():
-      groups['Electrons'] += time
-    elif 'track' in name.lower():
-      groups['Tracks'] += time
-    elif 'muon' in name.lower():
-      groups['Muons'] += time
-    elif name.endswith('output'):
-      groups['I/O'] += time
+  prefix, tag = tuple(inval.rsplit(':', 1))
+  total, modules = load_timing(prefix)
+  per_event = load_stall_log(prefix + '.stall.log') if os.path.isfile(prefix + '.stall.log') else {}
+  nevents = max(total['events'], 1)
+
+  stats = {}
+  for label, entry in modules.items():
+    stat = {
+      'type' : entry['type'],
+      'group' : group(label, entry['type']),
+      'cpu' : entry['time_thread'] / nevents if entry['time_thread'] is not None else None, # per processed event
+      'real' : entry['time_real'] / nevents,
+      'mean' : entry['time_real'] / max(entry['events'], 1) if entry['events'] is not None else None, # per module execution
+      'median' : None, 'p95' : None, 'p99' : None,
+    }
+    if label in per_event and len(per_event[label]):
+      stat['median'], stat['p95'], stat['p99'] = np.percentile(per_event[label], [50, 95, 99])
+    stats[label] = stat
+  runs.append({
+    'tag' : tag, 'stats' : stats, 'events' : total['events'],
+    'cpu' : total['time_thread'] / nevents if total['time_thread'] is not None else None,
+    'real' : total['time_real'] / nevents,
+  })
+
+if not os.path.isdir(args.outdir):
+  os.makedirs(args.outdir)
+
+def fmt(val):
+  return '--' if val is None else '%.3f' % val
+
+def table(header, rows):
+  widths = [max(len(str(i)) for i in column) for column in zip(header, *rows)]
+  line = '-' * (sum(widths) + 3 * len(widths) + 1)
+  form = '| ' + ' | '.join(['%%-%ds' % widths[0]] + ['%%%ds' % w for w in widths[1:]]) + ' |'
+  out = [line, form % tuple(header), line]
+  out += [form % tuple(row) for row in rows]
+  out.append(line)
+  return '\n'.join(out) + '\n'
+
+select = re.compile(args.select) if args.select else None
+report = ''
+for run in runs:
+  stats = run['stats']
+  report += '%s: %d events, %s ms CPU / evt, %.3f ms real / evt\n' % (run['tag'], run['events'], fmt(run['cpu']), run['real'])
+
+  # per group breakdown
+  groups = defaultdict(lambda: [0., 0.])
+  for stat in stats.values():
+    if stat['cpu'] is None or groups[stat['group']][0] is None:
+      groups[stat['group']][0] = None
     else:
-      groups['Other'] += time
-  
+      groups[stat['group']][0] += stat['cpu']
+    groups[stat['group']][1] += stat['real']
+  rows = [(name, fmt(groups[name][0]), '%.3f' % groups[name][1], '%.1f%%' % (100. * groups[name][1] / run['real']))
+          for name in GROUPS if name in groups]
+  report += table(['group', 'CPU [ms/evt]', 'real [ms/evt]', 'real share'], rows)
+
+  # per module details
+  rows = []
+  for label, stat in sorted(stats.items(), key=lambda x: -x[1]['real']):
+    if select and not select.search(label): continue
+    rows.append((label, stat['group'], fmt(stat['cpu']), fmt(stat['real']), fmt(stat['mean']),
+                 fmt(stat['median']), fmt(stat['p95']), fmt(stat['p99'])))
+  report += table(['module', 'group', 'CPU/evt', 'real/evt', 'mean/call', 'median', 'p95', 'p99'], rows)
+  report += '(times in ms; mean/call and percentiles of the real time per module execution)\n\n'
+
+  # pie chart of the groups
+  names = [name for name in GROUPS if name in groups]
   cm = plt.get_cmap('rainbow')
-  cNorm  = colors.Normalize(vmin=0, vmax=len(groups)-1)
+  cNorm  = colors.Normalize(vmin=0, vmax=max(len(names)-1, 1))
   scalarMap = cmx.ScalarMappable(norm=cNorm, cmap=cm)
-  cols = [scalarMap.to_rgba(i) for i in range(len(groups))]
-  
-  
+  cols = [scalarMap.to_rgba(i) for i in range(len(names))]
   plt.clf()
-  fig = plt.figure(
-      figsize=(12, 6), 
-  )
+  fig = plt.figure(figsize=(12, 6))
   plt.subplot(1, 2, 1)
-  vals = np.array(groups.values())/tot_time
+  vals = np.array([groups[name][1] for name in names]) / run['real']
   wedges = plt.pie(vals, autopct = writer, colors = cols)
-  names = ['%s (%.1f%%)' % (n, float(p)*100/tot_time) for n, p in groups.iteritems()]
   leg = plt.legend(
-      wedges[0], names, loc = 5,
-      bbox_to_anchor = (0.95, 0.5),
-      mode="expand", borderaxespad=0., frameon=False
+    wedges[0], ['%s (%.1f%%)' % (n, 100. * v) for n, v in zip(names, vals)], loc = 5,
+    bbox_to_anchor = (0.95, 0.5),
+    mode="expand", borderaxespad=0., frameon=False
   )
-  cpu = float(time_rep[1].split(' = ')[1])
-  wall = float(time_rep[2].split(' = ')[1])
-  
-  title = '%s Execution time: %.3f [s] (CPU / evt), %.3f [s] (Wall / evt)' % (tag, cpu, wall)
-  plt.title(title)
-  fig.savefig('validation/timing_%s.png' % tag)
-
-table = []
-# get the max size of the module name
-max_name = max(
-  max(
-    map(lambda x: len(x), i.keys())
-  ) for _, _, i in tags_timings
-)
-name_format = '%-'+str(max_name)+'s'
-
-# get the max size of the tag name, the float takes minimum 6 chars (0.1234)
-max_tag = max(
-  max(len(i) for i, _, _ in tags_timings),
-  6
-)
-tag_format = '%'+str(max_tag)+'s'
-
-tot_size = max_name + len(tags_timings)*(max_tag+3) + 4
-line = '-'*tot_size+'\n'
-
-def make_line(name, vals):
-  formatted_name = name_format % name
-  formatted_vals = [tag_format % i for i in vals]
-  line = ' | '.join([formatted_name] + formatted_vals)
-  return '| %s |\n' % line
-
-all_modules = set()
-for _, _, i in tags_timings:
-  all_modules.update(i.keys())
-
-with open('validation/timing.txt', 'w') as out:
-  out.write(line)
-  out.write(
-    make_line('Module', [i for i, _, _ in tags_timings])
-    )
-  out.write(line)
-  for mod in all_modules:
-    vals = [
-      '%.4f' % i[mod] if mod in i else '   -- ' 
-      for _, _, i in tags_timings
-    ]
-    out.write(
-      make_line(mod, vals)
-      )
-  out.write(line)
-  
+  plt.title('%s Execution time: %s [ms] (CPU / evt), %.3f [ms] (Real / evt)' % (run['tag'], fmt(run['cpu']), run['real']))
+  fig.savefig(os.path.join(args.outdir, 'timing_%s.png' % run['tag']))
+  plt.close(fig)
+
+# side-by-side comparison, relative to the first run
+if len(runs) > 1:
+  ref = runs[0]
+  all_modules = set()
+  for run in runs:
+    all_modules.update(run['stats'].keys())
+  def real(run, label):
+    return run['stats'][label]['real'] if label in run['stats'] else None
+
+  rows = []
+  for label in sorted(all_modules, key=lambda x: -(real(ref, x) or 0.)):
+    if select and not select.search(label): continue
+    vals = [real(run, label) for run in runs]
+    row = [label] + [fmt(i) for i in vals]
+    for val in vals[1:]:
+      row.append('--' if val is None or not vals[0] else '%+.1f%%' % (100. * (val - vals[0]) / vals[0]))
+    rows.append(row)
+  totals = [run['real'] for run in runs]
+  rows.append(['TOTAL'] + [fmt(i) for i in totals] + ['%+.1f%%' % (100. * (i - totals[0]) / totals[0]) for i in totals[1:]])
+  header = ['module [real ms/evt]'] + [run['tag'] for run in runs] + ['%s vs %s' % (run['tag'], ref['tag']) for run in runs[1:]]
+  report += table(header, rows)
+
+print(report)
+with open(os.path.join(args.outdir, 'timing.txt'), 'w') as out:
+  out.write(report)
@@ -0,0 +1,123 @@
+'''
+Reads the trigger decisions of a DoubleElectronNANO file in either layout:
+one uint8 branch per HLT path / L1 seed (default), or the uint32 bitmasks
+hltBits_N / l1Bits_N of packTriggerBits=True, whose bit names are stored in the
+trgBitsHLT / trgBitsL1 run metadata (bit i%32 of <prefix>_<i/32> is the i-th name).
+
+  dump   : number of events firing each path / seed
+  report : bytes per event of the trigger decisions in a per-column and in a
+           packed file (same input), and whether the decisions agree
+
+Example:
+  python3 trigger_bits.py dump nano_packed.root
+  python3 trigger_bits.py report nano_columns.root nano_packed.root
+'''
+from argparse import ArgumentParser
+import ROOT
+from bench_utils import print_table
+
+layouts = [('trgBitsHLT', 'hltBits'), ('trgBitsL1', 'l1Bits')]
+
+def bit_names(tfile):
+  '''{branch prefix : [names in bit order]} of the packed decisions, empty if the file is not packed'''
+  names = {}
+  for metadata, prefix in layouts:
+    string = tfile.Get(metadata)
+    if string:
+      names[prefix] = str(string.GetString()).split(',')
+  return names
+
+def unpack(tree, prefix, names):
+  '''{name : fired} of the current entry of tree, from the <prefix>_N bitmasks'''
+  words = {}
+  fired = {}
+  for ibit, name in enumerate(names):
+    iword = ibit // 32
+    if iword not in words:
+      words[iword] = int(getattr(tree, '%s_%d' % (prefix, iword)))
+    fired[name] = bool((words[iword] >> (ibit % 32)) & 1)
+  return fired
+
+def columns(tree, names):
+  '''{name : fired} of the current entry of tree, from the per-column layout'''
+  return {name : bool(getattr(tree, name)) for name in names}
+
+def branch_bytes(tree, branches):
+  '''compressed and uncompressed size of the given branches'''
+  zipped = total = 0
+  for name in branches:
+    branch = tree.GetBranch(name)
+    if branch:
+      zipped += branch.GetZipBytes('*')
+      total += branch.GetTotBytes('*')
+  return zipped, total
+
+def packed_branches(names):
+  '''names of the bitmask branches holding the given bits'''
+  return ['%s_%d' % (prefix, iword) for prefix in names for iword in range((len(names[prefix]) + 31) // 32)]
+
+def dump(args):
+  tfile = ROOT.TFile.Open(args.infile)
+  tree = tfile.Get('Events')
+  names = bit_names(tfile)
+  if not names:
+    print('%s is not packed, reading one branch per path / seed' % args.infile)
+    names = {prefix : [b.GetName() for b in tree.GetListOfBranches() if b.GetName().startswith(start)]
+             for prefix, start in [('hltBits', 'HLT_'), ('l1Bits', 'L1_')]}
+  counts = {name : 0 for prefix in names for name in names[prefix]}
+  nevents = tree.GetEntries() if args.maxEvents < 0 else min(args.maxEvents, tree.GetEntries())
+  for ientry in range(nevents):
+    tree.GetEntry(ientry)
+    for prefix in names:
+      fired = unpack(tree, prefix, names[prefix]) if tree.GetBranch('%s_0' % prefix) else columns(tree, names[prefix])
+      for name in fired:
+        counts[name] += fired[name]
+  print('%d events in %s' % (nevents, args.infile))
+  print_table(['name', 'fired'], [(name, '%d' % counts[name]) for prefix in names for name in names[prefix]])
+
+def report(args):
+  fcolumns = ROOT.TFile.Open(args.columns)
+  fpacked = ROOT.TFile.Open(args.packed)
+  tcolumns = fcolumns.Get('Events')
+  tpacked = fpacked.Get('Events')
+  names = bit_names(fpacked)
+  if not names:
+    raise RuntimeError('no trgBitsHLT / trgBitsL1 metadata in %s, was it produced with packTriggerBits=True?' % args.packed)
+
+  rows = []
+  for label, tree, branches in [
+      ('per-column', tcolumns, [name for prefix in names for name in names[prefix]]),
+      ('packed', tpacked, packed_branches(names))]:
+    zipped, total = branch_bytes(tree, branches)
+    nevents = float(max(tree.GetEntries(), 1))
+    rows.append((label, '%d' % len(branches), '%.1f' % (zipped / nevents), '%.1f' % (total / nevents)))
+  print_table(['layout', 'branches', 'compressed B/evt', 'uncompressed B/evt'], rows)
+
+  if tcolumns.GetEntries() != tpacked.GetEntries():
+    print('different number of events (%d, %d), decisions not compared' % (tcolumns.GetEntries(), tpacked.GetEntries()))
+    return
+  mismatches = 0
+  for ientry in range(tpacked.GetEntries()):
+    tcolumns.GetEntry(ientry)
+    tpacked.GetEntry(ientry)
+    for prefix in names:
+      if unpack(tpacked, prefix, names[prefix]) != columns(tcolumns, names[prefix]):
+        mismatches += 1
+        break
+  print('%d events with different decisions' % mismatches)
+
+if __name__ == '__main__':
+  parser = ArgumentParser()
+  subparsers = parser.add_subparsers(dest='command', required=True)
+  pdump = subparsers.add_parser('dump', help='number of events firing each path / seed')
+  pdump.add_argument('infile', help='DoubleElectronNANO file')
+  pdump.add_argument('--maxEvents', type=int, default=-1, help='events to read (-1 = all)')
+  pdump.set_defaults(run=dump)
+  preport = subparsers.add_parser('report', help='size of the two layouts, and check that they agree')
+  preport.add_argument('columns', help='file produced with packTriggerBits=False')
+  preport.add_argument('packed', help='file produced with packTriggerBits=True, same input')
+  preport.set_defaults(run=report)
+  args = parser.parse_args()
+
+  ROOT.gROOT.SetBatch(True)
+  args.run(args)
@@ -11,6 +11,15 @@ set -o errexit
 set -o nounset
 
 : ${CMSSW_BASE:?"CMSSW_BASE is not set!  Run cmsenv!"}
+# inputs are staged once and shared by the HEAD and PR runs
+STAGE_DIR=${STAGE_DIR:-$CMSSW_BASE/src/DoubleElectronNANO/BParkingNano/test/input_cache}
+
+# options added after the reference master are passed only if the checked out
+# run_nano_cfg.py registers them, cmsRun rejects unknown options. The reference
+# timing is read from the TimeReport summary of its log (time_analysis.py)
+supported() {
+    grep -q "options.register('$1'" run_nano_cfg.py
+}
 
 echo "Getting the latest HEAD of the common repository"
 git fetch $remote master
@@ -21,10 +30,14 @@ scram b -j 4
 echo "...Done!"
 cd $CMSSW_BASE/src/DoubleElectronNANO/BParkingNano/test
 TAG=HEAD
+HEAD_OPTS=""
+if supported stageDir; then
+    HEAD_OPTS="stageDir=$STAGE_DIR"
+fi
 echo "Getting reference for data..."
-cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG &> nano_$TAG'_data.log'
+cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG $HEAD_OPTS &> nano_$TAG'_data.log'
 echo "Done! Now for MC..."
-cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG isMC=True &> nano_$TAG'_mc.log'
+cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG $HEAD_OPTS isMC=True &> nano_$TAG'_mc.log'
 
 echo "Now merging the changes for PR #"$PRID
 git fetch $remote pull/$PRID/head:TEMP_PR$PRID
@@ -37,9 +50,9 @@ echo "...Done!"
 cd $CMSSW_BASE/src/DoubleElectronNANO/BParkingNano/test
 TAG=PR$PRID
 echo "Testing on data..."
-cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG &> nano_$TAG'_data.log'
+cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG stageDir=$STAGE_DIR timingReport=timing_$TAG'_data' &> nano_$TAG'_data.log'
 echo "... Done! And now on MC..."
-cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG isMC=True &> nano_$TAG'_mc.log'
+cmsRun run_nano_cfg.py maxEvents=1000 reportEvery=10 tag=$TAG stageDir=$STAGE_DIR isMC=True timingReport=timing_$TAG'_mc' &> nano_$TAG'_mc.log'
 echo "...Done! Making validation plots"
 
 rm -rf validation
@@ -47,13 +60,13 @@ mkdir $TAG
 mv compilation_PR$PRID.log $TAG/.
 
 python validate_nano.py BParkNANO_data_HEAD.root BParkNANO_data_$TAG.root --plot-only-failing
-python time_analysis.py nano_HEAD_data.log:HEAD nano_$TAG'_data.log':$TAG
+python3 time_analysis.py nano_HEAD_data.log:HEAD timing_$TAG'_data':$TAG
 $CMSSW_BASE/src/PhysicsTools/NanoAOD/test/inspectNanoFile.py BParkNANO_data_HEAD.root -s validation/size_HEAD.html
 $CMSSW_BASE/src/PhysicsTools/NanoAOD/test/inspectNanoFile.py BParkNANO_data_$TAG.root -s validation/size_$TAG.html
 mv validation $TAG/validation_data
 
 python validate_nano.py BParkNANO_mc_HEAD.root BParkNANO_mc_$TAG.root --plot-only-failing
-python time_analysis.py nano_HEAD_mc.log:HEAD nano_$TAG'_mc.log':$TAG
+python3 time_analysis.py nano_HEAD_mc.log:HEAD timing_$TAG'_mc':$TAG
 $CMSSW_BASE/src/PhysicsTools/NanoAOD/test/inspectNanoFile.py BParkNANO_mc_HEAD.root -s validation/size_HEAD.html
 $CMSSW_BASE/src/PhysicsTools/NanoAOD/test/inspectNanoFile.py BParkNANO_mc_$TAG.root -s validation/size_$TAG.html
 mv validation $TAG/validation_mc